@@ -1,11 +1,23 @@
-from flask import Flask, render_template, request, jsonify, session, send_file, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context, g
 import time
 import os
+import json
 from dotenv import load_dotenv
 from linkedin_login import LinkedInLogin
-from lead_extractor import LeadExtractor, read_csv_data
+from lead_extractor import LeadExtractor
+from fan_out import parse_queries
+from score_cache import ScoreCache
+from search_url import FilterIdCache
+from driver_pool import DriverPool, DRIVER_POOL_SIZE
+from job_manager import JobManager
+from lead_store import LeadStore, LEAD_COLUMNS
+from embedding_index import EmbeddingIndex, get_embedding_backend
+from launch_profiles import browser_stats
+from message_queue import MessageQueue
+from lead_messenger import LeadMessenger, MESSAGE_PACE_SECONDS
+from metrics import render_metrics, HTTP_REQUESTS, HTTP_REQUEST_SECONDS
 from selenium.webdriver.common.by import By
-from openai import OpenAI
+from openai_clients import get_openai_client
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -19,12 +31,93 @@ app.secret_key = os.urandom(24)  # Required for session management
 # Global LinkedIn login instance
 linkedin = LinkedInLogin()
 
+# AI verdicts shared across runs so unchanged profiles are not re-scored
+score_cache = ScoreCache()
+
+# Geography and job title filter IDs resolved by earlier searches
+filter_cache = FilterIdCache()
+
+# Extra authenticated sessions for parallel profile visits, opened on first use
+driver_pool = DriverPool(linkedin, size=DRIVER_POOL_SIZE) if DRIVER_POOL_SIZE > 0 else None
+
+# Extractions run in the background and are polled by the frontend
+job_manager = JobManager()
+
+# Indexed store of all extracted leads, existing export CSVs are imported at startup
+lead_store = LeadStore()
+lead_store.import_exports_dir()
+
+# Bearer token required on /metrics when set, the endpoint is open otherwise
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Messaging campaigns with per-lead status, resumed after a restart
+message_queue = MessageQueue()
+
+# Lead pages served to the view and message templates
+LEADS_PAGE_SIZE = 50
+LEADS_MAX_PAGE_SIZE = 500
+
+# Loaded embedding indexes by backend name
+embedding_indexes = {}
+
+def get_embedding_index(openai_api_key=None):
+    backend = get_embedding_backend(get_openai_client(openai_api_key) if openai_api_key else None)
+    index = embedding_indexes.get(backend.name)
+    if index is None:
+        index = embedding_indexes[backend.name] = EmbeddingIndex(backend)
+    else:
+        # Keep the most recent API key
+        index.backend = backend
+    return index
+
+def make_extractor(job, openai_api_key, prefilter_threshold=None):
+    options = {}
+    if prefilter_threshold is not None:
+        options['prefilter_threshold'] = prefilter_threshold
+    return LeadExtractor(
+        linkedin.driver,
+        openai_api_key if openai_api_key else None,
+        score_cache=score_cache,
+        filter_cache=filter_cache,
+        driver_pool=driver_pool,
+        progress_callback=job.update_progress,
+        cancel_event=job.cancel_event,
+        lead_store=lead_store,
+        **options
+    )
+
 @app.route('/')
 def index():
     if not session.get('logged_in'):
-        return render_template('login.html')
+        return render_template('login.html', saved_session=linkedin.has_saved_session())
     return render_template('home.html')
 
+@app.route('/restore-session', methods=['POST'])
+def restore_session():
+    """
+    Warm start from the LinkedIn session saved by an earlier login, for the same email and password
+    """
+    email = request.form.get('email')
+    password = request.form.get('password')
+    if not email or not password:
+        return jsonify({'error': 'Email and password of the saved account are required'}), 400
+    try:
+        if linkedin.restore_session(email, password):
+            session['logged_in'] = True
+            return jsonify({'success': True, 'message': 'Restored saved session', 'redirect': url_for('index')})
+        return jsonify({'error': 'Saved session expired or credentials do not match, please sign in again'}), 401
+    except Exception as e:
+        print(e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/forget-session', methods=['POST'])
+def forget_session():
+    # Logged in users, or whoever knows the credentials of the saved account
+    if not session.get('logged_in') and not linkedin.load_session_for(request.form.get('email'), request.form.get('password')):
+        return jsonify({'error': 'Please log in first'}), 401
+    linkedin.forget_session()
+    return jsonify({'success': True, 'message': 'Saved session removed'})
+
 @app.route('/view-leads')
 def view_leads():
     if not session.get('logged_in'):
@@ -35,31 +128,136 @@ def view_leads():
         return render_template('home.html', error="No leads file available. Please extract leads first.")
     
     try:
-        data = read_csv_data(filename)
-        print(f"Debug: Loaded {len(data)} rows from {filename}")
-        if data:
-            print(f"Debug: First row keys: {list(data[0].keys())}")
-            print(f"Debug: First row: {data[0]}")
+        lead_store.ensure_run(filename)
         
-        # Filter leads with score > 0.5
-        filtered_data = [row for row in data if float(row.get('score', 0.0)) > 0.5]
-        
-        # Calculate stats
-        total = len(filtered_data)
-        match_yes = sum(1 for row in filtered_data if row.get('match', '').upper() == 'YES')
-        success_rate = (match_yes / total * 100) if total > 0 else 0
-        hot_leads_count = sum(1 for row in filtered_data if float(row.get('score', 0.0)) >= 0.7)
+        # Calculate stats for leads with score > 0.5, the rows themselves are fetched page by page from /api/leads
+        stats = lead_store.run_stats(filename, min_score=0.5, exclusive_min=True)
         
         return render_template('view_leads.html', 
-                             data=filtered_data,
                              filename=filename,
-                             count=total,
-                             success_rate=success_rate,
-                             hot_leads_count=hot_leads_count)
+                             has_ai=lead_store.run_has_ai(filename),
+                             page_size=LEADS_PAGE_SIZE,
+                             count=stats['total'],
+                             success_rate=stats['success_rate'],
+                             hot_leads_count=stats['hot_leads_count'])
     except Exception as e:
         print(f"Error in view_leads: {e}")
         return render_template('home.html', error=str(e))
 
+def parse_score_arg(name):
+    value = request.args.get(name, '').strip()
+    return float(value) if value else None
+
+@app.route('/api/leads')
+def api_leads():
+    """
+    One page of the current export's leads.
+
+    Query parameters: offset, limit, sort (position|score|name), order (asc|desc),
+    match (YES|NO), min_score, max_score, exclusive_min (1 for score > min_score),
+    q (text search), fields (comma separated columns) and text_limit (preview length).
+    """
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Please log in first'}), 401
+    
+    filename = session.get('last_export')
+    if not filename:
+        return jsonify({'error': 'No leads file available. Please extract leads first.'}), 404
+    
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(max(1, int(request.args.get('limit', LEADS_PAGE_SIZE))), LEADS_MAX_PAGE_SIZE)
+        text_limit = request.args.get('text_limit')
+        text_limit = int(text_limit) if text_limit else None
+        filters = {
+            'match': request.args.get('match', '').strip() or None,
+            'min_score': parse_score_arg('min_score'),
+            'max_score': parse_score_arg('max_score'),
+            'text': request.args.get('q', '').strip() or None,
+            'exclusive_min': request.args.get('exclusive_min') == '1'
+        }
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    unknown = [f for f in fields if f not in LEAD_COLUMNS]
+    if unknown:
+        return jsonify({'error': f'Unknown fields: {", ".join(unknown)}'}), 400
+    
+    lead_store.ensure_run(filename)
+    leads = lead_store.query_leads(
+        run_id=filename,
+        sort=request.args.get('sort', 'position'),
+        descending=request.args.get('order', 'asc') == 'desc',
+        offset=offset,
+        limit=limit,
+        fields=fields or None,
+        text_limit=text_limit,
+        **filters
+    )
+    total = lead_store.count_leads(run_id=filename, **filters)
+    return jsonify({
+        'leads': leads,
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'has_more': offset + len(leads) < total
+    })
+
+@app.route('/api/leads/rank', methods=['POST'])
+def rank_leads():
+    """
+    Rank stored leads by embedding similarity to a client description.
+
+    Form fields: base_prompt (required), openai_api_key (optional, the offline
+    hashing backend is used without it), scope (run for the current export, all
+    for every stored lead) and limit.
+    """
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Please log in first'}), 401
+    
+    base_prompt = request.form.get('base_prompt', '').strip()
+    if not base_prompt:
+        return jsonify({'error': 'Base prompt is required'}), 400
+    
+    scope = request.form.get('scope', 'run')
+    filename = session.get('last_export')
+    if scope == 'run' and not filename:
+        return jsonify({'error': 'No leads file available. Please extract leads first.'}), 404
+    limit = min(max(1, request.form.get('limit', LEADS_PAGE_SIZE, type=int)), LEADS_MAX_PAGE_SIZE)
+    
+    try:
+        started = time.time()
+        run_id = None
+        if scope == 'run':
+            lead_store.ensure_run(filename)
+            run_id = filename
+        leads = lead_store.lead_texts(run_id)
+        index = get_embedding_index(request.form.get('openai_api_key', '').strip())
+        embedded = index.ensure(leads)
+        ranked = index.rank(base_prompt, [lead['lead_id'] for lead in leads], top_k=limit)
+        by_id = {lead['lead_id']: lead for lead in leads}
+        results = []
+        for lead_id, similarity in ranked:
+            lead = by_id[lead_id]
+            results.append({
+                'url': lead['url'],
+                'first_name': lead['first_name'] or '',
+                'last_name': lead['last_name'] or '',
+                'headline': lead['headline'] or '',
+                'similarity': round(similarity, 4)
+            })
+        return jsonify({
+            'leads': results,
+            'total': len(leads),
+            'embedded': embedded,
+            'backend': index.backend.name,
+            'elapsed_ms': round((time.time() - started) * 1000, 1)
+        })
+    except Exception as e:
+        print(f"Error ranking leads: {e}")
+        return jsonify({'error': f'Error ranking leads: {str(e)}'}), 500
+
 @app.route('/extract-leads', methods=['POST'])
 def extract_leads():
     if 'logged_in' not in session:
@@ -83,34 +281,31 @@ def extract_leads():
         use_ai_filtering = request.form.get('use_ai_filtering', 'false').lower() == 'true'
         openai_api_key = request.form.get('openai_api_key', '')
         base_prompt = request.form.get('base_prompt', '').strip()
+        # Continue an interrupted run with the same parameters instead of starting over
+        resume = request.form.get('resume', 'true').lower() == 'true'
+        # Local relevance below which profiles are rejected without a GPT request (0 disables)
+        prefilter_threshold = request.form.get('prefilter_threshold', type=float)
+        # Visit profiles again even if an earlier run already scraped them
+        refresh = request.form.get('refresh', 'false').lower() == 'true'
         
-        # Create LeadExtractor instance
-        extractor = LeadExtractor(linkedin.driver, openai_api_key if openai_api_key else None)
+        def run(job):
+            # Extract leads with profile data and AI filtering
+            return make_extractor(job, openai_api_key, prefilter_threshold).extract_leads(
+                target_count=target_count,
+                search_term=search_term,
+                country_filter=country_filter,
+                include_country=include_country,
+                position_filter=position_filter,
+                include_position=include_position,
+                extract_profile_data=extract_profile_data,
+                use_ai_filtering=use_ai_filtering,
+                base_prompt=base_prompt,
+                resume=resume,
+                refresh=refresh
+            )
         
-        # Extract leads with profile data and AI filtering
-        result = extractor.extract_leads(
-            target_count=target_count,
-            search_term=search_term,
-            country_filter=country_filter,
-            include_country=include_country,
-            position_filter=position_filter,
-            include_position=include_position,
-            extract_profile_data=extract_profile_data,
-            use_ai_filtering=use_ai_filtering,
-            base_prompt=base_prompt
-        )
-        
-        if result['success']:
-            # Save filename in session for later use
-            session['last_export'] = result['filename']
-            
-            return jsonify({
-                'message': result['message'],
-                'count': result['count'],
-                'filename': result['filename']
-            })
-        else:
-            return jsonify({'error': result['error']}), 500
+        job = job_manager.submit('extract-leads', run, {'target_count': target_count, 'search_term': search_term})
+        return jsonify({'job_id': job.id, 'status': job.status}), 202
         
     except Exception as e:
         print(f"❌ Error during lead extraction: {e}")
@@ -145,42 +340,170 @@ def extract_from_link():
         openai_api_key = request.form.get('openaiApiKey', '').strip()
         base_prompt = request.form.get('basePrompt', '').strip()
         use_ai_filtering = bool(openai_api_key and base_prompt)
+        resume = request.form.get('resume', 'true').lower() == 'true'
+        prefilter_threshold = request.form.get('prefilterThreshold', type=float)
+        refresh = request.form.get('refresh', 'false').lower() == 'true'
 
-        extractor = LeadExtractor(linkedin.driver, openai_api_key if openai_api_key else None)
-
-        result = extractor.extract_leads_from_url(
-            linkedin_url=linkedin_url,
-            target_count=target_count,
-            use_ai_filtering=use_ai_filtering,
-            base_prompt=base_prompt if use_ai_filtering else None
-        )
+        def run(job):
+            return make_extractor(job, openai_api_key, prefilter_threshold).extract_leads_from_url(
+                linkedin_url=linkedin_url,
+                target_count=target_count,
+                use_ai_filtering=use_ai_filtering,
+                base_prompt=base_prompt if use_ai_filtering else None,
+                resume=resume,
+                refresh=refresh
+            )
         
-        if result['success']:
-            # Save filename in session for later use
-            session['last_export'] = result['filename']
-            
-            return jsonify({
-                'message': result['message'],
-                'count': result['count'],
-                'filename': result['filename']
-            })
-        else:
-            return jsonify({'error': result['error']}), 500
+        job = job_manager.submit('extract-from-link', run, {'target_count': target_count, 'linkedin_url': linkedin_url})
+        return jsonify({'job_id': job.id, 'status': job.status}), 202
         
     except Exception as e:
         print(f"❌ Error during lead extraction from link: {e}")
         return jsonify({'error': f'Error during lead extraction from link: {str(e)}'}), 500
 
+@app.route('/extract-leads-multi', methods=['POST'])
+def extract_leads_multi():
+    if 'logged_in' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
+    
+    if not linkedin.driver:
+        return jsonify({'error': 'Browser not available. Please log in again.'}), 400
+    
+    try:
+        # Search terms and Sales Navigator URLs, as repeated fields or one per line
+        queries = parse_queries(request.form.getlist('queries[]') + request.form.getlist('queries'))
+        if not queries:
+            return jsonify({'error': 'At least one search term or URL is required'}), 400
+        
+        target_count = request.form.get('target_count', 30, type=int)
+        if target_count <= 0:
+            target_count = 30
+        
+        country_filter = request.form.getlist('country_filter[]')
+        include_country = request.form.get('include_country', 'true').lower() == 'true'
+        position_filter = request.form.getlist('position_filter[]')
+        include_position = request.form.get('include_position', 'true').lower() == 'true'
+        extract_profile_data = request.form.get('extract_profile_data', 'true').lower() == 'true'
+        use_ai_filtering = request.form.get('use_ai_filtering', 'false').lower() == 'true'
+        openai_api_key = request.form.get('openai_api_key', '')
+        base_prompt = request.form.get('base_prompt', '').strip()
+        resume = request.form.get('resume', 'true').lower() == 'true'
+        prefilter_threshold = request.form.get('prefilter_threshold', type=float)
+        refresh = request.form.get('refresh', 'false').lower() == 'true'
+        
+        def run(job):
+            return make_extractor(job, openai_api_key, prefilter_threshold).extract_leads_multi(
+                queries,
+                target_count=target_count,
+                country_filter=country_filter,
+                include_country=include_country,
+                position_filter=position_filter,
+                include_position=include_position,
+                extract_profile_data=extract_profile_data,
+                use_ai_filtering=use_ai_filtering,
+                base_prompt=base_prompt,
+                resume=resume,
+                refresh=refresh
+            )
+        
+        job = job_manager.submit('extract-leads-multi', run, {'target_count': target_count, 'queries': queries})
+        return jsonify({'job_id': job.id, 'status': job.status}), 202
+        
+    except Exception as e:
+        print(f"❌ Error during multi-search lead extraction: {e}")
+        return jsonify({'error': f'Error during multi-search lead extraction: {str(e)}'}), 500
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    if 'logged_in' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
+    
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if job.status == 'completed' and job.result and job.result.get('filename'):
+        # Save filename in session for later use
+        session['last_export'] = job.result['filename']
+    
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    if 'logged_in' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
+    
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def stream():
+        version = None
+        while True:
+            version = job.wait_for_change(version)
+            yield f"data: {json.dumps(job.to_dict())}\n\n"
+            if job.finished:
+                break
+    
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    if 'logged_in' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
+    
+    job = job_manager.cancel(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.time()
+
+@app.after_request
+def record_request_metrics(response):
+    # Label by route pattern, not by path, to keep the number of series bounded
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(endpoint=endpoint).observe(time.time() - started)
+    HTTP_REQUESTS.labels(endpoint=endpoint, method=request.method, status=str(response.status_code)).inc()
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """
+    Stage latencies, AI usage, cache hits and selector errors in the Prometheus text format
+    """
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
+@app.route('/browser-stats')
+def browser_stats_summary():
+    """
+    Page load times and browser memory per Chrome launch profile
+    """
+    if 'logged_in' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
+    return jsonify(browser_stats.summary())
+
 @app.route('/download/<filename>')
 def download_file(filename):
     if not session.get('logged_in'):
         return redirect(url_for('index'))
     
     try:
-        return send_file(
-            os.path.join("static", "exports", filename),
-            as_attachment=True,
-            download_name=filename
+        if not lead_store.ensure_run(filename):
+            return jsonify({'error': 'Export not found'}), 404
+        # CSV is generated from the lead store on demand
+        return Response(
+            lead_store.export_csv(filename),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename="{os.path.basename(filename)}"'}
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 404
@@ -236,6 +559,8 @@ def submit_2fa():
 @app.route('/logout', methods=['POST'])
 def logout():
     try:
+        if driver_pool:
+            driver_pool.close()
         linkedin.quit()
         session.clear()
         return jsonify({'success': True, 'message': 'Logged out successfully'})
@@ -249,46 +574,71 @@ def message_leads():
     filename = session.get('last_export')
     if not filename:
         return redirect(url_for('view_leads'))
-    data = read_csv_data(filename)
-    return render_template('message_leads.html', data=data, count=len(data))
+    lead_store.ensure_run(filename)
+    # Recipients are listed lazily from /api/leads
+    count = lead_store.count_leads(run_id=filename)
+    return render_template('message_leads.html', count=count, page_size=LEADS_PAGE_SIZE, pace_seconds=MESSAGE_PACE_SECONDS)
 
 @app.route('/start-messaging', methods=['POST'])
 def start_messaging():
     if not session.get('logged_in'):
         return jsonify({'error': 'Not logged in'}), 401
+    if not linkedin.driver:
+        return jsonify({'error': 'Browser not available. Please log in again.'}), 400
     filename = session.get('last_export')
     if not filename:
         return jsonify({'error': 'No leads file found'}), 400
-    data = read_csv_data(filename)
     subject = request.form.get('subject', '').strip()
     message = request.form.get('message', '').strip()
     if not subject or not message:
         return jsonify({'error': 'Subject and message are required'}), 400
+    pace_seconds = request.form.get('pace_seconds', MESSAGE_PACE_SECONDS, type=float)
+    if pace_seconds < 0:
+        pace_seconds = MESSAGE_PACE_SECONDS
     try:
-        for row in data:
-            url = row.get('url')
-            if not url:
-                continue
-            linkedin.driver.get(url)
-            time.sleep(3)
-            try:
-                message_button = linkedin.driver.find_element(By.CLASS_NAME, "_message-cta_1xow7n")
-                message_button.click()
-                time.sleep(2)
-                subject_field = linkedin.driver.find_element(By.CLASS_NAME, "_subject-field_jrrmou")
-                subject_field.send_keys(subject)
-                message_field = linkedin.driver.find_element(By.XPATH, "/html/body/div[8]/section/div[2]/section/form[1]/fieldset[1]/div/div8")
-                message_field.send_keys(message)
-                send_button = linkedin.driver.find_element(By.XPATH, "/html/body/div[8]/section/div[2]/section/form[1]/fieldset[2]/section/div/button[2]")
-                send_button.click()
-                time.sleep(2)
-            except Exception as e:
-                print(f"Failed to message {url}: {e}")
-                continue
-        return jsonify({'success': True, 'message': 'Messaging started/completed.'})
+        # Resume an unfinished campaign with the same text instead of queueing the leads again
+        campaign_id = message_queue.find_unfinished(filename, subject, message)
+        if campaign_id:
+            print(f"📬 Resuming campaign {campaign_id}")
+        else:
+            lead_store.ensure_run(filename)
+            urls = [row['url'] for row in lead_store.query_leads(run_id=filename, fields=['url']) if row.get('url')]
+            campaign_id = message_queue.create_campaign(filename, subject, message, urls, pace_seconds)
+
+        def run(job):
+            messenger = LeadMessenger(linkedin.driver, message_queue, job.update_progress, job.cancel_event)
+            return messenger.run_campaign(campaign_id)
+
+        job = job_manager.submit('messaging', run, {'campaign_id': campaign_id, 'run_id': filename})
+        return jsonify({'job_id': job.id, 'campaign_id': campaign_id, 'status': job.status}), 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/messaging')
+def latest_messaging_status():
+    """
+    Status of the latest campaign for the current leads file
+    """
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Not logged in'}), 401
+    campaign_id = message_queue.latest_campaign(session.get('last_export'))
+    if not campaign_id:
+        return jsonify({'error': 'No campaign found'}), 404
+    return jsonify(message_queue.campaign_status(campaign_id))
+
+@app.route('/messaging/<campaign_id>')
+def messaging_status(campaign_id):
+    """
+    Per-status counts of a campaign, ?leads=1 adds the status of every lead
+    """
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Not logged in'}), 401
+    include_leads = request.args.get('leads', '0').lower() in ('1', 'true')
+    status = message_queue.campaign_status(campaign_id, include_leads=include_leads)
+    if not status:
+        return jsonify({'error': 'Campaign not found'}), 404
+    return jsonify(status)
+
 @app.route('/generate-keywords', methods=['POST'])
 def generate_keywords():
     try:
@@ -301,8 +651,8 @@ def generate_keywords():
         if not openai_api_key:
             return jsonify({'error': 'OpenAI API key is required'}), 400
         
-        # Initialize OpenAI client
-        client = OpenAI(api_key=openai_api_key)
+        # Shared client of this API key, connections stay open between requests
+        client = get_openai_client(openai_api_key)
         
         # Create prompt for keyword generation
         prompt = f"""
@@ -327,7 +677,7 @@ def generate_keywords():
         ["Software Engineer", "Product Manager", "Data Scientist", "Machine Learning", "Python", "React", "AWS", "DevOps", "Agile", "Scrum Master"]
         """
         
-        response = client.chat.completions.create(
+        response = client.chat_completion(
             model="gpt-4",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
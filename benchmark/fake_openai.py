@@ -0,0 +1,168 @@
+import re
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from lexical_filter import LexicalPrefilter
+
+TARGET_MARKER = "--- Target Client Description ---"
+PROFILE_RE = re.compile(r"URL:\s*(?P<url>\S+)\s*Headline:(?P<headline>.*?)\s*About:(?P<about>.*?)(?=--- Profile|--- Target|\Z)", re.S)
+SINGLE_RE = re.compile(r"Headline:(?P<headline>.*?)\s*About:(?P<about>.*?)(?=--- Target|\Z)", re.S)
+
+def split_prompt(prompt):
+    """
+    The profiles part and the target description of a scoring prompt
+    """
+    profiles, _, rest = prompt.partition(TARGET_MARKER)
+    description = rest.split("Please answer")[0].split("For every profile")[0]
+    return profiles, description.strip()
+
+def verdict(prefilter, headline, about):
+    _, relevance = prefilter.check({"headline": headline.strip(), "about": about.strip()})
+    score = round(min(1.0, relevance), 2)
+    return {
+        "match": "YES" if score >= 0.5 else "NO",
+        "reason": f"Fixture verdict from keyword overlap ({score})",
+        "score": score
+    }
+
+def answer(prompt):
+    """
+    Deterministic reply in the format the extractor asks for: an object for one profile, an array for a batch
+    """
+    profiles, description = split_prompt(prompt)
+    prefilter = LexicalPrefilter(description, threshold=0)
+    batch = list(PROFILE_RE.finditer(profiles))
+    if batch:
+        return json.dumps([
+            dict(verdict(prefilter, match["headline"], match["about"]), url=match["url"])
+            for match in batch
+        ])
+    single = SINGLE_RE.search(profiles)
+    if not single:
+        return json.dumps({"match": "NO", "reason": "No profile in prompt", "score": 0.0})
+    return json.dumps(verdict(prefilter, single["headline"], single["about"]))
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self.send_json({"error": {"message": f"Unknown endpoint {self.path}"}}, status=404)
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        allowed, rate_headers = self.server.take_request()
+        if not allowed:
+            return self.send_json(
+                {"error": {"message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429, headers=rate_headers
+            )
+        prompt = "\n".join(message.get("content", "") for message in request.get("messages", []))
+        content = answer(prompt)
+        self.server.delay(content.count('"url"') or 1)
+        self.send_json(self.server.completion(request.get("model", "gpt-4"), prompt, content), headers=rate_headers)
+
+    def send_json(self, payload, status=200, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    OpenAI-compatible /v1/chat/completions endpoint answering scoring prompts without a model
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=1.0, per_profile_latency=0.1, requests_per_minute=0):
+        super().__init__(("127.0.0.1", port), FakeOpenAIHandler)
+        self.latency = latency
+        self.per_profile_latency = per_profile_latency
+        self.requests_per_minute = requests_per_minute
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.window = deque()  # start times of the requests of the last minute
+
+    def take_request(self):
+        """
+        Count a request against the per-minute budget. Returns (allowed, x-ratelimit / Retry-After headers).
+        Without a budget every request is allowed and no headers are sent.
+        """
+        if not self.requests_per_minute:
+            return True, {}
+        now = time.time()
+        with self.lock:
+            while self.window and self.window[0] <= now - 60:
+                self.window.popleft()
+            reset = self.window[0] + 60 - now if self.window else 0
+            headers = {
+                "x-ratelimit-limit-requests": str(self.requests_per_minute),
+                "x-ratelimit-reset-requests": f"{reset:.3f}s"
+            }
+            if len(self.window) >= self.requests_per_minute:
+                self.rate_limited += 1
+                headers["x-ratelimit-remaining-requests"] = "0"
+                headers["retry-after"] = f"{reset:.3f}"
+                return False, headers
+            self.window.append(now)
+            headers["x-ratelimit-remaining-requests"] = str(self.requests_per_minute - len(self.window))
+            return True, headers
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def delay(self, profiles):
+        with self.lock:
+            self.requests += 1
+        seconds = self.latency + self.per_profile_latency * profiles
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def completion(self, model, prompt, content):
+        # About four characters per token, close enough for usage accounting
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-fixture-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+def start_fake_openai(**kwargs):
+    """
+    Start a FakeOpenAIServer on a background thread, point OPENAI_BASE_URL at server.base_url
+    """
+    server = FakeOpenAIServer(**kwargs)
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI chat completions endpoint")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per request")
+    parser.add_argument("--per-profile-latency", type=float, default=0.1, help="extra seconds per scored profile")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before answering 429 (0 is unlimited)")
+    args = parser.parse_args()
+    server = FakeOpenAIServer(port=args.port, latency=args.latency, per_profile_latency=args.per_profile_latency, requests_per_minute=args.rpm)
+    print(f"🧪 Fake OpenAI on {server.base_url} (set OPENAI_BASE_URL to this)")
+    server.serve_forever()
@@ -0,0 +1,245 @@
+import time
+import json
+import zlib
+import random
+import argparse
+import threading
+from html import escape
+from urllib.parse import urlsplit, parse_qs, urlencode
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIRST_NAMES = ["Anna", "Ben", "Carla", "David", "Elif", "Felix", "Greta", "Hugo", "Ines", "Jonas", "Kira", "Lars", "Mia", "Noah", "Olga", "Paul"]
+LAST_NAMES = ["Berg", "Costa", "Dahl", "Eriksen", "Fischer", "Garcia", "Hansen", "Ivanova", "Jensen", "Keller", "Larsen", "Moreau", "Novak", "Olsen"]
+
+# Roughly a third of the fixture leads match the default target description
+RELEVANT_PROFILES = [
+    ("Head of Corrosion Protection at NordShip Yards", "We build and coat ship hulls and railway underbodies with anti-corrosion systems."),
+    ("Process Engineer, Pipe Coatings", "Responsible for coating lines for underground water and oil pipes."),
+    ("Plant Manager, Forging Press Shop", "High-temperature press shop and forging machinery maintenance."),
+    ("Offshore Wind Maintenance Lead", "Corrosion protection of windmill towers in the splash zone."),
+    ("Purchasing Manager, Automotive Underbody Coatings", "Sourcing sealants, LSR and underbody protection for car plants."),
+]
+OTHER_PROFILES = [
+    ("Senior Frontend Developer", "React, TypeScript and design systems for fintech products."),
+    ("HR Business Partner", "Talent acquisition and employer branding for retail."),
+    ("Marketing Manager, Consumer Apps", "Growth marketing, paid social and lifecycle campaigns."),
+    ("Financial Controller", "Month-end closing, IFRS reporting and budgeting."),
+    ("Recruiter, Healthcare", "Placing nurses and physicians across private clinics."),
+    ("Data Scientist", "Forecasting and recommendation systems in e-commerce."),
+    ("Customer Success Manager, SaaS", "Onboarding and retention of mid-market software customers."),
+    ("Teacher of Mathematics", "Secondary school maths and exam preparation."),
+    ("Architect", "Residential buildings and urban renewal projects."),
+    ("Legal Counsel", "Commercial contracts and data protection compliance.")
+]
+
+def make_leads(count, seed=7):
+    """
+    Deterministic fixture leads: member ID, name, title, company, headline and about
+    """
+    rng = random.Random(seed)
+    leads = []
+    for index in range(count):
+        relevant = rng.random() < 0.33
+        headline, about = rng.choice(RELEVANT_PROFILES if relevant else OTHER_PROFILES)
+        leads.append({
+            "member_id": f"ACwAAB{index:06d}",
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "title": headline.split(",")[0].split(" at ")[0],
+            "company": f"Fixture Company {index % 37}",
+            "headline": headline,
+            "about": about
+        })
+    return leads
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Sales Navigator fixture</title></head>
+<body>
+<main>
+ <div>
+  <form action="/sales/search/people" method="get">
+   <input class="global-typeahead-search__input" name="query" value="{query}">
+  </form>
+  <div>{filters}</div>
+  <div>
+   <div></div>
+   <div>
+    <div></div>
+    <div>
+     <div></div><div></div><div></div>
+     <div class="_border-search-results_1igybl">
+      <ol>{results}</ol>
+      <button class="artdeco-pagination__button--next" {next_state} onclick="location.href='{next_url}'">Next</button>
+     </div>
+    </div>
+   </div>
+  </div>
+ </div>
+</main>
+<script>
+document.querySelectorAll('fieldset .ph4').forEach(function(toggle) {{
+    toggle.addEventListener('click', function() {{
+        const panel = toggle.parentElement.querySelector('.filter-panel');
+        panel.innerHTML = '<input class="search-filter__focus-target--input"><span class="suggestion"></span><ul class="pills"></ul>';
+        const input = panel.querySelector('input');
+        input.addEventListener('input', function() {{
+            panel.querySelector('.suggestion').innerHTML = input.value
+                ? '<button class="_include-button_1cz98z">Include</button><button class="_exclude-button_1cz98z">Exclude</button>'
+                : '';
+            panel.querySelectorAll('.suggestion button').forEach(function(button) {{
+                button.addEventListener('click', function() {{
+                    const pill = document.createElement('li');
+                    pill.textContent = button.textContent + ': ' + input.value;
+                    panel.querySelector('.pills').appendChild(pill);
+                    panel.querySelector('.suggestion').innerHTML = '';
+                }});
+            }});
+        }});
+    }});
+}});
+</script>
+</body></html>
+"""
+
+FILTER_FIELDSET = """<fieldset data-x-search-filter="{name}"><div class="ph4">{label}</div><div class="filter-panel"></div></fieldset>"""
+
+RESULT_ITEM = """<li><div class="artdeco-entity-lockup">
+ <div class="artdeco-entity-lockup__title"><a href="/sales/lead/{member_id},NAME_SEARCH,{token}">{first_name} {last_name}</a></div>
+ <span data-anonymize="title">{title}</span> <span data-anonymize="company-name">{company}</span>
+</div></li>"""
+
+# The headline sits exactly where the absolute XPath of the extractor expects it
+PROFILE_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{first_name} {last_name}</title></head>
+<body>
+<main>
+ <div>
+  <div></div><div></div>
+  <div><div><div><div><div><div>
+   <section>
+    <section>
+     <div>
+      <div><h1 class="_headingText_e3b563">{first_name} {last_name}</h1></div>
+      <div></div>
+      <div><span>{headline}</span></div>
+     </div>
+    </section>
+    <section id="about"><button class="button-text">Show more</button></section>
+   </section>
+  </div></div></div></div></div></div>
+ </div>
+</main>
+<script>
+document.querySelector('.button-text').addEventListener('click', function() {{
+    document.getElementById('about').innerHTML = '<div class="_content-width_1dtbsb">{about}</div>';
+}});
+</script>
+</body></html>
+"""
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.delay()
+        url = urlsplit(self.path)
+        if url.path == "/sales/search/people":
+            self.send_html(server.render_search(parse_qs(url.query)))
+        elif url.path == "/sales-api/salesApiFacetTypeahead":
+            self.send_json(server.render_typeahead(parse_qs(url.query)))
+        elif url.path.startswith("/sales/lead/"):
+            member_id = url.path[len("/sales/lead/"):].split(",")[0]
+            lead = server.leads_by_id.get(member_id)
+            if lead:
+                self.send_html(server.render_profile(lead))
+            else:
+                self.send_html("<html><body>Not found</body></html>", status=404)
+        else:
+            self.send_html("<html><body>Not found</body></html>", status=404)
+
+    def send_html(self, body, status=200, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, payload):
+        self.send_html(json.dumps(payload), content_type="application/json")
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the Sales Navigator search, pagination and lead pages
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.2, jitter=0.0, total_leads=500, page_size=25, seed=7):
+        super().__init__(("127.0.0.1", port), FixtureHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.leads = make_leads(total_leads, seed)
+        self.leads_by_id = {lead["member_id"]: lead for lead in self.leads}
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def delay(self):
+        with self.rng_lock:
+            seconds = self.latency + self.rng.uniform(0, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def render_search(self, params):
+        query = params.get("query", [""])[0]
+        page = max(1, int(params.get("page", ["1"])[0] or 1))
+        start = (page - 1) * self.page_size
+        results = "".join(
+            RESULT_ITEM.format(token=f"tok{page}", **{key: escape(str(value)) for key, value in lead.items()})
+            for lead in self.leads[start:start + self.page_size]
+        )
+        last_page = start + self.page_size >= len(self.leads)
+        filters = FILTER_FIELDSET.format(name="GEOGRAPHY", label="Geography") + FILTER_FIELDSET.format(name="CURRENT_TITLE", label="Current job title")
+        return SEARCH_PAGE.format(
+            query=escape(query),
+            filters=filters,
+            results=results,
+            next_state="disabled" if last_page else "",
+            next_url="/sales/search/people?" + urlencode({"query": query, "page": page + 1})
+        )
+
+    def render_typeahead(self, params):
+        # Stable made-up ID per typed value, enough for the search URL builder
+        text = params.get("query", [""])[0].strip()
+        if not text:
+            return {"elements": []}
+        return {"elements": [{"id": str(zlib.crc32(text.lower().encode("utf-8"))), "displayValue": text.title()}]}
+
+    def render_profile(self, lead):
+        # escape() also encodes quotes, so the about text is safe inside the script's string literal
+        return PROFILE_PAGE.format(**{key: escape(str(value)) for key, value in lead.items()})
+
+def start_fixture_server(**kwargs):
+    """
+    Start a FixtureServer on a background thread, returns the server (see server.base_url)
+    """
+    server = FixtureServer(**kwargs)
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fixture Sales Navigator pages")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra seconds up to this value")
+    parser.add_argument("--total-leads", type=int, default=500)
+    args = parser.parse_args()
+    server = FixtureServer(port=args.port, latency=args.latency, jitter=args.jitter, total_leads=args.total_leads)
+    print(f"🧪 Fixture Sales Navigator on {server.base_url}/sales/search/people")
+    server.serve_forever()
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import threading
+import metrics
+from launch_profiles import create_chrome, process_tree_rss, LAUNCH_PROFILES
+from lead_extractor import LeadExtractor, AI_BATCH_SIZE, PROFILE_PARSE_MODE
+from benchmark.fixture_server import start_fixture_server
+from benchmark.fake_openai import start_fake_openai
+
+BENCHMARK_SEARCH_TERM = "corrosion protection, pipe coatings"
+BENCHMARK_BASE_PROMPT = "Companies doing anti-corrosion protection, pipe coatings, underbody coatings and forging press shops"
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of durations
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class MemoryMonitor:
+    """
+    Peak resident memory of this process and its children (chromedriver and Chrome), sampled in the background
+    """
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.peak = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="memory-monitor", daemon=True)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.peak = max(self.peak, process_tree_rss(os.getpid()) or 0)
+            self.stop_event.wait(self.interval)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+
+def run_benchmark(args):
+    fixture = start_fixture_server(latency=args.page_latency, jitter=args.jitter, total_leads=args.total_leads)
+    fake_ai = start_fake_openai(latency=args.ai_latency, per_profile_latency=args.ai_per_profile_latency, requests_per_minute=args.ai_rpm) if args.ai else None
+    if fake_ai:
+        # Read by the OpenAI client when the extractor creates it
+        os.environ["OPENAI_BASE_URL"] = fake_ai.base_url
+    print(f"🧪 Fixture Sales Navigator on {fixture.base_url}" + (f", fake OpenAI on {fake_ai.base_url}" if fake_ai else ""))
+
+    # Run outputs and checkpoints go to a scratch directory instead of the real exports
+    workdir = tempfile.mkdtemp(prefix="sn-benchmark-")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    driver = create_chrome(args.launch_profile)
+    try:
+        extractor = LeadExtractor(
+            driver,
+            openai_api_key="benchmark" if fake_ai else None,
+            ai_batch_size=args.batch_size,
+            prefilter_threshold=args.prefilter_threshold,
+            parse_mode=args.parse_mode,
+            base_url=fixture.base_url,
+            profile_tabs=args.profile_tabs
+        )
+        metrics.start_sampling()
+        with MemoryMonitor() as memory:
+            started = time.time()
+            result = extractor.extract_leads(
+                target_count=args.leads,
+                search_term=BENCHMARK_SEARCH_TERM,
+                use_ai_filtering=bool(fake_ai),
+                base_prompt=BENCHMARK_BASE_PROMPT if fake_ai else None,
+                resume=False
+            )
+            elapsed = time.time() - started
+        samples = metrics.stop_sampling()
+    finally:
+        driver.quit()
+        os.chdir(previous_cwd)
+        fixture.shutdown()
+        if fake_ai:
+            fake_ai.shutdown()
+        if not args.keep_output:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if not result.get('success'):
+        raise SystemExit(f"❌ Benchmark run failed: {result.get('error')}")
+
+    profiles = extractor.progress["profiles_scraped"]
+    return {
+        "params": vars(args),
+        "elapsed_seconds": round(elapsed, 2),
+        "profiles_scraped": profiles,
+        "leads_saved": result["count"],
+        "leads_per_minute": round(profiles / elapsed * 60, 1) if elapsed else None,
+        "ai_requests": fake_ai.requests if fake_ai else 0,
+        "ai_rate_limited": fake_ai.rate_limited if fake_ai else 0,
+        "peak_rss_mb": round(memory.peak / (1024 * 1024), 1),
+        "python_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": {
+            series: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 0.5) * 1000, 1),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 1)
+            }
+            for series, values in sorted(samples.items())
+        },
+        "output_dir": workdir if args.keep_output else None
+    }
+
+def print_report(report):
+    print(f"\n📈 {report['profiles_scraped']} profiles in {report['elapsed_seconds']}s: "
+          f"{report['leads_per_minute']} leads/min, {report['leads_saved']} leads saved, {report['ai_requests']} AI requests "
+          f"({report['ai_rate_limited']} rate limited)")
+    print(f"🧠 Peak memory {report['peak_rss_mb']} MB (Python alone {report['python_peak_rss_mb']} MB)")
+    for series, stats in report["stages"].items():
+        print(f"⏱️ {series:<22} n={stats['count']:<5} p50 {stats['p50_ms']:>9} ms   p95 {stats['p95_ms']:>9} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extractor against local Sales Navigator and OpenAI stand-ins")
+    parser.add_argument("--leads", type=int, default=50, help="target lead count of the run")
+    parser.add_argument("--total-leads", type=int, default=500, help="leads served by the fixture search")
+    parser.add_argument("--page-latency", type=float, default=0.2, help="seconds added to every fixture page")
+    parser.add_argument("--jitter", type=float, default=0.05, help="random extra page latency up to this many seconds")
+    parser.add_argument("--no-ai", dest="ai", action="store_false", help="skip AI scoring")
+    parser.add_argument("--ai-latency", type=float, default=1.0, help="seconds per fake GPT request")
+    parser.add_argument("--ai-per-profile-latency", type=float, default=0.1, help="extra seconds per profile in a request")
+    parser.add_argument("--ai-rpm", type=int, default=0, help="fake OpenAI requests per minute before 429s (0 is unlimited)")
+    parser.add_argument("--batch-size", type=int, default=AI_BATCH_SIZE)
+    parser.add_argument("--prefilter-threshold", type=float, default=0)
+    parser.add_argument("--parse-mode", choices=("snapshot", "live"), default=PROFILE_PARSE_MODE)
+    parser.add_argument("--profile-tabs", type=int, default=1, help="profiles loaded at once in tabs of the browser")
+    parser.add_argument("--launch-profile", choices=sorted(LAUNCH_PROFILES), default="fast-headless")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--keep-output", action="store_true", help="keep the scratch directory with the run output")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import os
+import time
+import queue
+import threading
+
+# Number of extra authenticated Chrome sessions used to visit profiles (0 disables the pool)
+DRIVER_POOL_SIZE = int(os.getenv('DRIVER_POOL_SIZE', 0))
+# Delay each worker keeps between two profile visits
+PROFILE_DELAY = float(os.getenv('PROFILE_DELAY', 2))
+# Launch profile of the pool sessions, they default to the one of the main browser
+DRIVER_POOL_LAUNCH_PROFILE = os.getenv('DRIVER_POOL_LAUNCH_PROFILE') or None
+
+class DriverPool:
+    """
+    Pool of Chrome sessions cloned from the logged in LinkedIn session
+    """
+    def __init__(self, linkedin, size=DRIVER_POOL_SIZE, max_restarts=1, launch_profile=DRIVER_POOL_LAUNCH_PROFILE):
+        self.linkedin = linkedin
+        self.size = size
+        self.launch_profile = launch_profile
+        self.max_restarts = max_restarts
+        self.drivers = []
+        self.leased = set()  # indexes of the sessions busy with profile visits or lent out
+        self.lock = threading.Lock()
+        self.released = threading.Condition(self.lock)
+
+    def start(self):
+        """
+        Open the missing sessions; a session that fails to start is skipped
+        """
+        while len(self.drivers) < self.size:
+            try:
+                self.drivers.append(self.linkedin.clone_session(self.launch_profile))
+                print(f"🧩 Driver pool session {len(self.drivers)}/{self.size} ready")
+            except Exception as e:
+                print(f"❌ Could not start driver pool session: {e}")
+                break
+        return len(self.drivers)
+
+    @staticmethod
+    def empty_profile(url):
+        return {"url": url, "first_name": "", "last_name": "", "headline": "", "about": ""}
+
+    @staticmethod
+    def is_alive(driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def restart(self, index):
+        """
+        Replace a dead session with a fresh clone, returns None if that fails too
+        """
+        try:
+            self.drivers[index].quit()
+        except Exception:
+            pass
+        try:
+            self.drivers[index] = self.linkedin.clone_session(self.launch_profile)
+            print(f"♻️ Restarted driver pool session {index + 1}")
+            return self.drivers[index]
+        except Exception as e:
+            print(f"❌ Could not restart driver pool session {index + 1}: {e}")
+            return None
+
+    def extract_profiles(self, urls, extract_fn, on_profile=None, should_stop=None):
+        """
+        Spread profile URLs across the sessions and return the URLs that were not delivered.
+
+        extract_fn(url, driver) must return a profile dict; on_profile is called
+        from the worker threads as soon as each profile is available. Workers stop
+        picking up new URLs once should_stop() returns True. URLs left behind by
+        retired sessions are returned for the caller to visit elsewhere.
+        """
+        with self.lock:
+            if not self.start():
+                raise Exception("No driver pool session could be started")
+            # Sessions lent out (e.g. to multi-query searches) are used once they come back
+            while len(self.leased) >= len(self.drivers):
+                self.released.wait()
+            workers = [index for index in range(len(self.drivers)) if index not in self.leased]
+            self.leased.update(workers)
+
+        try:
+            todo = queue.Queue()
+            for index, url in enumerate(urls):
+                todo.put((index, url))
+            delivered = set()
+
+            def worker(worker_index):
+                driver = self.drivers[worker_index]
+                restarts = 0
+                while not (should_stop and should_stop()):
+                    try:
+                        index, url = todo.get_nowait()
+                    except queue.Empty:
+                        return
+                    print(f"🔍 [session {worker_index + 1}] Extracting profile {index + 1}/{len(urls)}: {url}")
+                    try:
+                        profile = extract_fn(url, driver)
+                    except Exception as e:
+                        print(f"❌ [session {worker_index + 1}] Failed on {url}: {e}")
+                        profile = self.empty_profile(url)
+
+                    # An empty result from a dead browser is a worker failure, not a profile failure
+                    empty = not any(profile.get(k) for k in ("first_name", "headline", "about"))
+                    if empty and not self.is_alive(driver):
+                        todo.put((index, url))
+                        if restarts >= self.max_restarts:
+                            print(f"🛑 [session {worker_index + 1}] Retiring session after repeated failures")
+                            return
+                        restarts += 1
+                        driver = self.restart(worker_index)
+                        if driver is None:
+                            return
+                        continue
+
+                    delivered.add(index)
+                    if on_profile:
+                        on_profile(profile)
+                    time.sleep(PROFILE_DELAY)
+
+            threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in workers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            for index in workers:
+                self.give_back(index)
+
+        leftover = [url for index, url in enumerate(urls) if index not in delivered]
+        if leftover and not (should_stop and should_stop()):
+            print(f"⚠️ No healthy session left for {len(leftover)} profiles, handing them back")
+        return leftover
+
+    def lease(self, count):
+        """
+        Lend up to count idle sessions for other work than profile visits, as (index, driver) pairs.
+        Each one must be returned with give_back(index).
+        """
+        with self.lock:
+            self.start()
+            free = [index for index in range(len(self.drivers)) if index not in self.leased][:max(0, count)]
+            self.leased.update(free)
+            return [(index, self.drivers[index]) for index in free]
+
+    def give_back(self, index):
+        with self.lock:
+            self.leased.discard(index)
+            self.released.notify_all()
+
+    def close(self):
+        with self.lock:
+            for driver in self.drivers:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            self.drivers = []
@@ -0,0 +1,192 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+from lexical_filter import TOKEN_RE
+
+EMBEDDING_INDEX_DIR = os.getenv('EMBEDDING_INDEX_DIR', os.path.join('cache', 'embeddings'))
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+# "openai" or "hashing" (deterministic, offline); by default OpenAI is used when an API key is given
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', '')
+EMBEDDING_BATCH_SIZE = 100
+
+def profile_text(headline, about):
+    return f"{headline or ''}\n{about or ''}".strip()
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class OpenAIEmbeddingBackend:
+    """
+    Embeddings from the OpenAI API
+    """
+    def __init__(self, client, model=EMBEDDING_MODEL):
+        self.client = client
+        self.model = model
+        self.name = f"openai-{model}"
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            batch = [text or " " for text in texts[start:start + EMBEDDING_BATCH_SIZE]]
+            response = self.client.create_embeddings(model=self.model, input=batch)
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return np.asarray(vectors, dtype=np.float32)
+
+class HashingEmbeddingBackend:
+    """
+    Deterministic bag-of-words embedding (signed feature hashing), needs no network.
+    Good enough to test ranking offline, not a substitute for a real model.
+    """
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in TOKEN_RE.findall((text or "").lower()):
+                digest = hashlib.md5(token.encode("utf-8")).digest()
+                index = int.from_bytes(digest[:4], "little") % self.dim
+                vectors[row, index] += 1.0 if digest[4] & 1 else -1.0
+        return vectors
+
+def get_embedding_backend(client=None):
+    """
+    Pick the embedding backend from EMBEDDING_BACKEND, falling back to the offline stub without a client
+    """
+    if EMBEDDING_BACKEND == "hashing" or (EMBEDDING_BACKEND != "openai" and client is None):
+        return HashingEmbeddingBackend()
+    if client is None:
+        raise ValueError("The OpenAI embedding backend needs an API key")
+    return OpenAIEmbeddingBackend(client)
+
+class EmbeddingIndex:
+    """
+    On-disk index of normalized profile embeddings, one .npy matrix plus a JSON row map per backend.
+    A lead is embedded once and only again when its headline/about change.
+    """
+    def __init__(self, backend, directory=EMBEDDING_INDEX_DIR):
+        self.backend = backend
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.query_cache = {}
+        self.lead_ids = []
+        self.text_hashes = []
+        self.rows = {}  # lead_id -> row in self.vectors
+        self.vectors = None
+        self.load()
+
+    @property
+    def matrix_path(self):
+        return os.path.join(self.directory, f"{self.backend.name}.npy")
+
+    @property
+    def rows_path(self):
+        return os.path.join(self.directory, f"{self.backend.name}.json")
+
+    def load(self):
+        if not (os.path.exists(self.matrix_path) and os.path.exists(self.rows_path)):
+            return
+        try:
+            with open(self.rows_path, encoding="utf-8") as f:
+                rows = json.load(f)
+            vectors = np.load(self.matrix_path)
+            if len(rows) != len(vectors):
+                raise ValueError("row map and matrix sizes differ")
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable embedding index {self.matrix_path}: {e}")
+            return
+        self.lead_ids = [row["lead_id"] for row in rows]
+        self.text_hashes = [row["text_hash"] for row in rows]
+        self.rows = {lead_id: position for position, lead_id in enumerate(self.lead_ids)}
+        self.vectors = vectors
+
+    def save(self):
+        """
+        Atomically write the index (caller holds the lock)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        rows = [{"lead_id": lead_id, "text_hash": text_hash} for lead_id, text_hash in zip(self.lead_ids, self.text_hashes)]
+        tmp_matrix = self.matrix_path + ".tmp.npy"
+        tmp_rows = self.rows_path + ".tmp"
+        np.save(tmp_matrix, self.vectors)
+        with open(tmp_rows, "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_rows, self.rows_path)
+
+    @staticmethod
+    def text_hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+    def ensure(self, leads):
+        """
+        Embed the leads ({lead_id, headline, about}) that are new or changed, returns how many were embedded
+        """
+        with self.lock:
+            missing = {}
+            for lead in leads:
+                text = profile_text(lead.get("headline"), lead.get("about"))
+                text_hash = self.text_hash(text)
+                row = self.rows.get(lead["lead_id"])
+                if row is None or self.text_hashes[row] != text_hash:
+                    missing[lead["lead_id"]] = (text, text_hash)
+            if not missing:
+                return 0
+
+            lead_ids = list(missing)
+            vectors = normalize_rows(self.backend.embed([missing[lead_id][0] for lead_id in lead_ids]))
+            if self.vectors is None:
+                self.vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            appended = []
+            for lead_id, vector in zip(lead_ids, vectors):
+                row = self.rows.get(lead_id)
+                if row is None:
+                    self.rows[lead_id] = len(self.lead_ids)
+                    appended.append(vector)
+                    self.lead_ids.append(lead_id)
+                    self.text_hashes.append(missing[lead_id][1])
+                else:
+                    self.vectors[row] = vector
+                    self.text_hashes[row] = missing[lead_id][1]
+            if appended:
+                self.vectors = np.vstack([self.vectors, np.asarray(appended, dtype=np.float32)])
+            self.save()
+            print(f"🧭 Embedded {len(lead_ids)} leads with {self.backend.name}")
+            return len(lead_ids)
+
+    def embed_query(self, text):
+        with self.lock:
+            cached = self.query_cache.get(text)
+        if cached is not None:
+            return cached
+        vector = normalize_rows(self.backend.embed([text]))[0]
+        with self.lock:
+            self.query_cache[text] = vector
+        return vector
+
+    def rank(self, query_text, lead_ids=None, top_k=None):
+        """
+        Cosine similarity of indexed leads to the query, best first, as [(lead_id, similarity)]
+        """
+        query = self.embed_query(query_text)
+        with self.lock:
+            if self.vectors is None or not len(self.lead_ids):
+                return []
+            if lead_ids is None:
+                rows = np.arange(len(self.lead_ids))
+            else:
+                rows = np.asarray([self.rows[lead_id] for lead_id in lead_ids if lead_id in self.rows], dtype=np.int64)
+            if not len(rows):
+                return []
+            similarities = self.vectors[rows] @ query
+            ids = [self.lead_ids[row] for row in rows]
+
+        order = np.argsort(-similarities, kind="stable")
+        if top_k:
+            order = order[:top_k]
+        return [(ids[position], float(similarities[position])) for position in order]
@@ -0,0 +1,146 @@
+import math
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+from lead_ids import canonical_lead_id
+
+def is_search_url(query):
+    """
+    True for a pasted Sales Navigator URL, False for a keyword search
+    """
+    return urlsplit(query).scheme in ("http", "https")
+
+def parse_queries(values):
+    """
+    Non-empty queries in their original order, without repeats. Every value may hold several queries, one per line.
+    """
+    queries = []
+    for value in values:
+        for line in (value or "").splitlines():
+            query = line.strip()
+            if query and query not in queries:
+                queries.append(query)
+    return queries
+
+class QueryFanOut:
+    """
+    Runs several searches (keywords or Sales Navigator URLs) at once, one per browser
+    session, and merges their result links into one deduped stream.
+
+    Each query is given a share of the target when it starts. A query that runs out
+    of results early leaves the rest of its share to the queries not started yet.
+    Every session stops as soon as the merged leads reach the target.
+    """
+    def __init__(self, extractor, queries, target_count, checkpoint=None, filters=None):
+        self.extractor = extractor
+        self.queries = list(queries)
+        self.target_count = target_count
+        self.checkpoint = checkpoint
+        self.filters = filters or {}
+        self.lock = threading.Lock()
+        self.todo = deque(range(len(self.queries)))
+        self.shares = {}  # index of a running query -> leads it may still add
+        self.counts = [0] * len(self.queries)
+        self.merged = set()
+        self.emit = None
+        self.should_stop = None
+
+    def done(self):
+        return len(self.merged) >= self.target_count or bool(self.should_stop and self.should_stop())
+
+    def run(self, all_hrefs, emit, should_stop):
+        """
+        Collect the hrefs of every query into all_hrefs, handing each page's new hrefs to emit(hrefs)
+        """
+        self.merged = all_hrefs
+        self.emit = emit
+        self.should_stop = should_stop
+        # Leads of a resumed run are known before any session dedupes its first page
+        with self.extractor.dedupe_lock:
+            self.extractor.collected_ids.update(canonical_lead_id(href) for href in all_hrefs)
+
+        pool = self.extractor.driver_pool
+        # Idle pool sessions paginate searches too, each goes back to profile visits once no query is left for it
+        leases = pool.lease(len(self.queries) - 1) if pool else []
+        sessions = [(None, self.extractor.search_session(self.extractor.driver))]
+        sessions += [(index, self.extractor.search_session(driver)) for index, driver in leases]
+        print(f"🔀 Running {len(self.queries)} searches on {len(sessions)} browser sessions")
+        threads = [
+            threading.Thread(target=self.worker, args=(session, number, lease), name=f"fan-out-{number}", daemon=True)
+            for number, (lease, session) in enumerate(sessions, 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.checkpoint and not should_stop():
+            self.checkpoint.mark_collection_done()
+        print(f"🔀 Searches merged into {len(all_hrefs)} unique leads")
+        return all_hrefs
+
+    def claim(self):
+        """
+        Next query and its share of the leads still missing, None when nothing is left to run
+        """
+        with self.lock:
+            if not self.todo or self.done():
+                return None
+            index = self.todo.popleft()
+            missing = self.target_count - len(self.merged) - sum(self.shares.values())
+            share = max(1, math.ceil(missing / (len(self.todo) + 1)))
+            self.shares[index] = share
+            return index, share
+
+    def release(self, index):
+        with self.lock:
+            self.shares.pop(index, None)
+
+    def worker(self, session, number, lease=None):
+        try:
+            self.run_queries(session, number)
+        finally:
+            if lease is not None:
+                self.extractor.driver_pool.give_back(lease)
+
+    def run_queries(self, session, number):
+        while True:
+            claimed = self.claim()
+            if claimed is None:
+                return
+            index, share = claimed
+            query = self.queries[index]
+            print(f"🔎 [session {number}] Query {index + 1}/{len(self.queries)}: {query} (up to {share} leads)")
+            try:
+                if is_search_url(query):
+                    session.open_url(query)
+                else:
+                    session.open_search(query, **self.filters)
+                session.collect_search_hrefs(set(), share, on_hrefs=lambda hrefs: self.merge(index, hrefs), should_stop=self.done)
+            except Exception as e:
+                print(f"❌ [session {number}] Query failed: {query}: {e}")
+            finally:
+                self.release(index)
+            print(f"✅ [session {number}] Query {index + 1} added {self.counts[index]} leads")
+
+    def merge(self, index, hrefs):
+        """
+        Add the new hrefs of one results page to the merged set, up to the target
+        """
+        with self.lock:
+            room = max(0, self.target_count - len(self.merged))
+            hrefs = [href for href in hrefs if href not in self.merged][:room]
+            self.merged.update(hrefs)
+            self.counts[index] += len(hrefs)
+            if index in self.shares:
+                self.shares[index] = max(0, self.shares[index] - len(hrefs))
+            if self.checkpoint:
+                self.checkpoint.add_hrefs(hrefs)
+            self.emit(hrefs)
+            total = len(self.merged)
+        self.extractor.report_progress(hrefs_collected=total, pages_crawled=1)
+        if total >= self.target_count:
+            print(f"🎯 Target count reached across searches: {total} leads")
+
+    def summary(self):
+        return [{"query": query, "leads": count} for query, count in zip(self.queries, self.counts)]
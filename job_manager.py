@@ -0,0 +1,137 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from metrics import JOBS_FINISHED
+
+# Finished jobs kept in memory for status polling
+MAX_FINISHED_JOBS = 50
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+class ExtractionJob:
+    """
+    A background extraction run with progress counters and a cancel flag
+    """
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"
+        self.progress = {
+            "pages_crawled": 0,
+            "hrefs_collected": 0,
+            "profiles_scraped": 0,
+            "profiles_scored": 0
+        }
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.changed = threading.Condition()
+        self.version = 0
+
+    def _notify(self):
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    def update_progress(self, progress):
+        self.progress.update(progress)
+        self._notify()
+
+    def set_status(self, status, result=None, error=None):
+        self.status = status
+        if status == "running":
+            self.started_at = time.time()
+        if status in FINISHED_STATUSES:
+            self.finished_at = time.time()
+        if result is not None:
+            self.result = result
+        if error is not None:
+            self.error = error
+        self._notify()
+
+    def wait_for_change(self, version, timeout=15):
+        """
+        Block until the job changes after the given version (used by the SSE stream)
+        """
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class JobManager:
+    """
+    Runs extraction jobs one at a time in the background, since they share one browser
+    """
+    def __init__(self, max_workers=1):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extraction-job")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, run, params=None):
+        """
+        Queue run(job) in the background and return the job immediately.
+        run must return the extractor result dict ({'success': ..., ...}).
+        """
+        job = ExtractionJob(kind, params)
+        with self.lock:
+            self.jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._execute, job, run)
+        print(f"🗂️ Queued {kind} job {job.id}")
+        return job
+
+    def _execute(self, job, run):
+        if job.cancel_event.is_set():
+            job.set_status("cancelled", error="Cancelled before start")
+            return
+        job.set_status("running")
+        try:
+            result = run(job)
+            if job.cancel_event.is_set():
+                job.set_status("cancelled", result=result, error="Cancelled by user")
+            elif result.get('success'):
+                job.set_status("completed", result=result)
+            else:
+                job.set_status("failed", result=result, error=result.get('error'))
+        except Exception as e:
+            print(f"❌ Job {job.id} crashed: {e}")
+            job.set_status("failed", error=str(e))
+        JOBS_FINISHED.labels(kind=job.kind, status=job.status).inc()
+        print(f"🗂️ Job {job.id} finished with status {job.status}")
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job and not job.finished:
+            job.cancel_event.set()
+            print(f"🛑 Cancellation requested for job {job_id}")
+        return job
+
+    def _prune(self):
+        finished = sorted((j for j in self.jobs.values() if j.finished), key=lambda j: j.finished_at)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.id]
@@ -0,0 +1,190 @@
+import os
+import time
+import threading
+import weakref
+from collections import deque
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from metrics import observe, PAGE_LOAD_SECONDS
+
+# Launch profile of the main browser and of the driver pool sessions
+CHROME_LAUNCH_PROFILE = os.getenv('CHROME_LAUNCH_PROFILE', 'default')
+
+# Page load samples kept per launch profile
+PAGE_LOAD_SAMPLES = 1000
+
+LAUNCH_PROFILES = {
+    # Visible browser with everything loading, as before
+    "default": {
+        "headless": False,
+        "block_resources": False,
+        "window_size": None,
+        "page_load_strategy": "normal",
+        "lean": False
+    },
+    # Visible browser without images, media and fonts
+    "light": {
+        "headless": False,
+        "block_resources": True,
+        "window_size": "1280,900",
+        "page_load_strategy": "eager",
+        "lean": True
+    },
+    # No window, no heavy resources, no extension/GPU stack
+    "fast-headless": {
+        "headless": True,
+        "block_resources": True,
+        "window_size": "1280,900",
+        "page_load_strategy": "eager",
+        "lean": True
+    }
+}
+
+# Requests dropped by profiles that block resources (images are also disabled through content settings)
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    "*media.licdn.com*"
+]
+
+def build_options(profile_name):
+    """
+    Chrome options of a launch profile
+    """
+    if profile_name not in LAUNCH_PROFILES:
+        raise ValueError(f"Unknown launch profile '{profile_name}', expected one of {', '.join(LAUNCH_PROFILES)}")
+    profile = LAUNCH_PROFILES[profile_name]
+
+    options = Options()
+    options.add_argument("--enable-javascript")
+    options.add_argument("--enable-cookies")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.page_load_strategy = profile["page_load_strategy"]
+
+    if profile["headless"]:
+        options.add_argument("--headless=new")
+    if profile["window_size"]:
+        options.add_argument(f"--window-size={profile['window_size']}")
+    if profile["lean"]:
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--mute-audio")
+        options.add_argument("--autoplay-policy=user-gesture-required")
+    if profile["block_resources"]:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2
+        })
+    return options
+
+def create_chrome(profile_name=CHROME_LAUNCH_PROFILE):
+    """
+    Start Chrome with a launch profile, the driver remembers its profile in driver.launch_profile
+    """
+    options = build_options(profile_name)
+    driver = webdriver.Chrome(options=options)
+    if LAUNCH_PROFILES[profile_name]["block_resources"]:
+        try:
+            # Fonts and media can only be blocked at the network level
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print(f"⚠️ Could not install resource blocking for {profile_name}: {e}")
+    driver.launch_profile = profile_name
+    browser_stats.register(driver, profile_name)
+    print(f"🌐 Started Chrome with launch profile '{profile_name}'")
+    return driver
+
+def process_tree_rss(pid):
+    """
+    Resident memory in bytes of a process and all its descendants (Linux /proc), None elsewhere
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    total, pending, seen = 0, [pid], set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+class BrowserStats:
+    """
+    Page load times per launch profile, and the memory of the live browsers of each profile
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.drivers = weakref.WeakKeyDictionary()  # driver -> profile name
+        self.page_loads = {}  # profile name -> recent page load seconds
+
+    def register(self, driver, profile_name):
+        with self.lock:
+            self.drivers[driver] = profile_name
+
+    def record_page_load(self, driver, seconds):
+        profile_name = getattr(driver, "launch_profile", "unknown")
+        observe(PAGE_LOAD_SECONDS, "page_load", seconds, launch_profile=profile_name)
+        with self.lock:
+            self.page_loads.setdefault(profile_name, deque(maxlen=PAGE_LOAD_SAMPLES)).append(seconds)
+
+    def timed_get(self, driver, url):
+        """
+        driver.get(url), recording how long the navigation took
+        """
+        started = time.time()
+        driver.get(url)
+        self.record_page_load(driver, time.time() - started)
+
+    def summary(self):
+        with self.lock:
+            drivers = list(self.drivers.items())
+            page_loads = {name: list(times) for name, times in self.page_loads.items()}
+
+        rss = {}
+        for driver, profile_name in drivers:
+            try:
+                process = driver.service.process
+                if process is None or process.poll() is not None:
+                    continue
+                pid = process.pid
+            except Exception:
+                continue
+            size = process_tree_rss(pid)
+            if size is not None:
+                rss.setdefault(profile_name, []).append(size)
+
+        summary = {}
+        for profile_name in set(page_loads) | set(rss):
+            times = sorted(page_loads.get(profile_name, []))
+            sizes = rss.get(profile_name, [])
+            summary[profile_name] = {
+                "page_loads": len(times),
+                "avg_page_load_ms": round(sum(times) / len(times) * 1000, 1) if times else None,
+                "p95_page_load_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 1) if times else None,
+                "browsers": len(sizes),
+                "rss_mb_per_browser": round(sum(sizes) / len(sizes) / (1024 * 1024), 1) if sizes else None
+            }
+        return summary
+
+    def print_summary(self):
+        for profile_name, stats in sorted(self.summary().items()):
+            print(f"🌐 {profile_name}: {stats['page_loads']} page loads, avg {stats['avg_page_load_ms']} ms, "
+                  f"p95 {stats['p95_page_load_ms']} ms, {stats['browsers']} browsers at {stats['rss_mb_per_browser']} MB each")
+
+browser_stats = BrowserStats()
@@ -5,24 +5,167 @@ import time
 import os
 import csv
 import json
+import threading
 from datetime import datetime
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openai_clients import get_openai_client
+from page_waits import PageWaiter, WaitStats
+from run_checkpoint import RunCheckpoint, AI_FIELDNAMES, BASIC_FIELDNAMES
+from lexical_filter import LEXICAL_PREFILTER_THRESHOLD
+from lead_ids import canonical_lead_id
+from pipeline import ExtractionPipeline
+from tab_loader import TabLoader, PROFILE_TABS
+from fan_out import QueryFanOut, is_search_url
+from search_url import SearchUrlBuilder, SEARCH_WITH_URL
+from launch_profiles import browser_stats
+from profile_parser import parse_profile_html, EXPAND_ABOUT_JS, NAME_CLASS, ABOUT_CLASS
+from metrics import (observe_stage, record_stage, timed, selector_error, record_ai_usage, AI_REQUEST_SECONDS, AI_REQUESTS,
+                     CACHE_LOOKUPS, PREFILTER_PROFILES, LEADS_RECORDED)
+
+# Number of GPT requests allowed in flight while the browser keeps scraping
+AI_SCORING_WORKERS = int(os.getenv('AI_SCORING_WORKERS', 4))
+AI_MODEL = "gpt-4"
+# "snapshot" reads each profile page with one page_source call and parses it offline, "live" queries every field through WebDriver
+PROFILE_PARSE_MODE = os.getenv('PROFILE_PARSE_MODE', 'snapshot')
+# Threads parsing profile snapshots while the browser moves on
+PROFILE_PARSE_WORKERS = int(os.getenv('PROFILE_PARSE_WORKERS', 2))
+# Profiles scored per GPT request, 1 sends one request per profile
+AI_BATCH_SIZE = int(os.getenv('AI_BATCH_SIZE', 5))
+# Origin serving Sales Navigator, the benchmark points it at a local fixture server
+SALES_NAVIGATOR_BASE_URL = os.getenv('SALES_NAVIGATOR_BASE_URL', 'https://www.linkedin.com')
+
+DEFAULT_TARGET_DESCRIPTION = """
+        We are looking for professionals or companies involved in anti-corrosion protection,
+        especially those in shipbuilding, railway, tram, and automotive underbody coatings, 
+        high-temperature press shops, forging machinery, outdoor equipment like windmills (esp. splash zones), 
+        pipe coatings (for water, oil, underground metal pipes), LSR sealants, glass-to-metal bonding, 
+        grease dispensing in machines, electric insulators, barrels, drums, and related industrial environments.
+        """
+
+# Harvest every search result card of the current page in a single WebDriver round trip
+HARVEST_RESULTS_JS = """
+const root = arguments[0] || document;
+const titles = root.querySelectorAll('.artdeco-entity-lockup__title');
+const cards = [];
+titles.forEach(title => {
+    const link = title.querySelector('a');
+    if (!link || !link.href) return;
+    const card = title.closest('li') || title.closest('.artdeco-entity-lockup') || title.parentElement;
+    const text = (selector) => {
+        const el = card ? card.querySelector(selector) : null;
+        return el ? el.innerText.trim() : '';
+    };
+    cards.push({
+        href: link.href,
+        name: (link.innerText || '').trim(),
+        title: text('[data-anonymize="title"]'),
+        company: text('[data-anonymize="company-name"]')
+    });
+});
+return [JSON.stringify(cards), titles.length ? titles[0] : null];
+"""
+
+class ExtractionCancelled(Exception):
+    pass
 
 class LeadExtractor:
-    def __init__(self, driver, openai_api_key=None):
+    def __init__(self, driver, openai_api_key=None, ai_workers=AI_SCORING_WORKERS, score_cache=None, driver_pool=None, harvest_with_script=True, progress_callback=None, cancel_event=None, lead_store=None, ai_batch_size=AI_BATCH_SIZE, prefilter_threshold=LEXICAL_PREFILTER_THRESHOLD, parse_mode=PROFILE_PARSE_MODE, base_url=SALES_NAVIGATOR_BASE_URL, profile_tabs=PROFILE_TABS, filter_cache=None, search_with_url=SEARCH_WITH_URL):
         self.driver = driver
+        self.base_url = base_url.rstrip("/")
+        self.driver_pool = driver_pool
+        self.lead_store = lead_store
+        self.harvest_with_script = harvest_with_script
+        self.search_with_url = search_with_url
+        self.filter_cache = filter_cache
+        self.parse_mode = parse_mode
+        self.profile_tabs = max(1, profile_tabs)
+        self.result_cards = {}  # href -> name/title/company seen on the search results
+        self.collected_ids = set()  # canonical lead IDs of the hrefs collected in this run
+        self.dedupe_lock = threading.Lock()
+        self.dedupe_stats = {"duplicates_skipped": 0, "known_reused": 0}
         self.wait = WebDriverWait(driver, 10)
+        self.wait_stats = WaitStats()
+        self.waiter = PageWaiter(driver, self.wait_stats)
         self.client = None
+        self.ai_workers = max(1, ai_workers)
+        self.ai_batch_size = max(1, ai_batch_size)
+        self.score_cache = score_cache
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self.prefilter_threshold = prefilter_threshold
+        self.prefilter = None  # set per run when AI filtering is on
+        self.prefilter_stats = {"checked": 0, "rejected": 0, "api_calls_saved": 0}
+        self.stats_lock = threading.Lock()
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self.progress = {
+            "pages_crawled": 0,
+            "hrefs_collected": 0,
+            "profiles_scraped": 0,
+            "profiles_scored": 0
+        }
         if openai_api_key:
-            self.client = OpenAI(api_key=openai_api_key)
+            self.client = get_openai_client(openai_api_key)
     
-    def extract_profile_data(self, url):
+    def report_progress(self, hrefs_collected=None, **increments):
+        """
+        Bump progress counters and forward a snapshot to the progress callback
+        """
+        with self.stats_lock:
+            for key, amount in increments.items():
+                self.progress[key] += amount
+            if hrefs_collected is not None:
+                self.progress["hrefs_collected"] = hrefs_collected
+            snapshot = dict(self.progress)
+        if self.progress_callback:
+            self.progress_callback(snapshot)
+
+    def is_cancelled(self):
+        return bool(self.cancel_event and self.cancel_event.is_set())
+
+    def check_cancelled(self):
+        if self.is_cancelled():
+            raise ExtractionCancelled("Extraction cancelled")
+
+    def capture_profile_snapshot(self, url, driver=None):
+        """
+        Load a profile, expand its About section and return the page HTML (None if the page failed)
+        """
+        driver = driver or self.driver
+        waiter = PageWaiter(driver, self.wait_stats)
+        try:
+            with observe_stage("profile_load"):
+                browser_stats.timed_get(driver, url)
+                if not waiter.element_present(By.CLASS_NAME, NAME_CLASS, timeout=10, name="profile header"):
+                    selector_error("profile header")
+                if driver.execute_script(EXPAND_ABOUT_JS):
+                    waiter.element_present(By.CLASS_NAME, ABOUT_CLASS, timeout=3, name="about section")
+                return driver.page_source
+        except Exception as e:
+            print(f"❌ Error loading profile page {url}: {e}")
+            return None
+
+    def extract_profile_data(self, url, driver=None):
         """
         Extract detailed profile data from a LinkedIn profile URL
         """
+        if self.parse_mode == "snapshot":
+            page_html = self.capture_profile_snapshot(url, driver)
+            with observe_stage("profile_parse"):
+                return parse_profile_html(url, page_html)
+
+        with observe_stage("profile_load"):
+            return self.extract_profile_live(url, driver)
+
+    def extract_profile_live(self, url, driver=None):
+        """
+        Read every profile field through WebDriver lookups on the loaded page
+        """
+        driver = driver or self.driver
+        waiter = PageWaiter(driver, self.wait_stats)
         try:
-            self.driver.get(url)
-            time.sleep(4)  # wait for page to load
+            browser_stats.timed_get(driver, url)
+            # wait for the profile header instead of a fixed delay
+            waiter.element_present(By.CLASS_NAME, "_headingText_e3b563", timeout=10, name="profile header")
 
             headline = ""
             about = ""
@@ -31,7 +174,7 @@ class LeadExtractor:
 
             # Extract name from heading
             try:
-                name_element = self.driver.find_element(By.CLASS_NAME, "_headingText_e3b563")
+                name_element = driver.find_element(By.CLASS_NAME, "_headingText_e3b563")
                 name = name_element.text
                 
                 # Split the name by spaces
@@ -44,26 +187,28 @@ class LeadExtractor:
                 print(f"First Name: {first_name}")
                 print(f"Last Name: {last_name}")
             except Exception as e:
+                selector_error("profile name")
                 print(f"❌ Error extracting name: {e}")
 
             # Extract headline
             try:
-                headline_elem = self.driver.find_element(By.XPATH, "/html/body/main/div[1]/div[3]/div/div/div/div/div/section[1]/section[1]/div[1]/div[3]/span")
+                headline_elem = driver.find_element(By.XPATH, "/html/body/main/div[1]/div[3]/div/div/div/div/div/section[1]/section[1]/div[1]/div[3]/span")
                 headline = headline_elem.text
             except:
-                pass
+                selector_error("profile headline")
 
             # Try to expand About section if collapsed
             try:
-                expand_btn = self.driver.find_element(By.CLASS_NAME, "button-text")
+                expand_btn = driver.find_element(By.CLASS_NAME, "button-text")
                 expand_btn.click()
-                time.sleep(1)
             except:
                 pass
+            else:
+                waiter.element_present(By.CLASS_NAME, "_content-width_1dtbsb", timeout=3, name="about section")
 
             # Extract about section
             try:
-                about_elem = self.driver.find_element(By.CLASS_NAME, "_content-width_1dtbsb")
+                about_elem = driver.find_element(By.CLASS_NAME, "_content-width_1dtbsb")
                 about = about_elem.text
             except:
                 pass
@@ -85,7 +230,168 @@ class LeadExtractor:
                 "headline": "",
                 "about": ""
             }
+
+    def extract_profiles(self, hrefs, on_profile=None, before_fallback=None):
+        """
+        Extract profile data for every href, spread across the driver pool when one is configured.
+        Profiles are handed to on_profile as they complete and are not kept; returns the number extracted.
+        before_fallback() is called before falling back from the pool to the main browser.
+        """
+        def profile_done(profile):
+            self.report_progress(profiles_scraped=1)
+            if on_profile:
+                on_profile(profile)
+
+        extracted = 0
+        if self.driver_pool:
+            try:
+                leftover = self.driver_pool.extract_profiles(hrefs, self.extract_profile_data, profile_done, should_stop=self.is_cancelled)
+                extracted = len(hrefs) - len(leftover)
+                if not leftover or self.is_cancelled():
+                    return extracted
+                print(f"↩️ Visiting {len(leftover)} profiles the pool could not finish on the main browser")
+                hrefs = leftover
+            except Exception as e:
+                print(f"⚠️ Driver pool unavailable, falling back to the main browser: {e}")
+            if before_fallback:
+                before_fallback()
+
+        if self.parse_mode == "snapshot":
+            if self.profile_tabs > 1:
+                return extracted + self.extract_profile_tabs(hrefs, profile_done)
+            return extracted + self.extract_profile_snapshots(hrefs, profile_done)
+
+        done = extracted
+        for i, href in enumerate(hrefs):
+            if self.is_cancelled():
+                print("🛑 Extraction cancelled, skipping remaining profiles")
+                break
+            print(f"🔍 Extracting profile {i+1}/{len(hrefs)}: {href}")
+            profile = self.extract_profile_data(href)
+            profile_done(profile)
+            done += 1
+            time.sleep(2)  # Small delay between profile extractions
+        return done
+
+    @staticmethod
+    def parse_and_deliver(href, page_html, profile_done):
+        try:
+            with observe_stage("profile_parse"):
+                profile = parse_profile_html(href, page_html)
+            print(f"First Name: {profile['first_name']}")
+            print(f"Last Name: {profile['last_name']}")
+            profile_done(profile)
+        except Exception as e:
+            print(f"❌ Error handling profile {href}: {e}")
+
+    def extract_profile_snapshots(self, hrefs, profile_done):
+        """
+        Sequential extraction on the main browser: the page HTML is captured with one call
+        and parsed in a worker thread while the browser opens the next profile
+        """
+        done = 0
+        with ThreadPoolExecutor(max_workers=max(1, PROFILE_PARSE_WORKERS), thread_name_prefix="profile-parse") as parse_pool:
+            for i, href in enumerate(hrefs):
+                if self.is_cancelled():
+                    print("🛑 Extraction cancelled, skipping remaining profiles")
+                    break
+                print(f"🔍 Extracting profile {i+1}/{len(hrefs)}: {href}")
+                parse_pool.submit(self.parse_and_deliver, href, self.capture_profile_snapshot(href), profile_done)
+                done += 1
+                time.sleep(2)  # Small delay between profile extractions
+        return done
     
+    def extract_profile_tabs(self, hrefs, profile_done):
+        """
+        Load a window of profiles at once in tabs of the main browser, parsing each
+        snapshot in a worker thread as soon as its tab is ready
+        """
+        with ThreadPoolExecutor(max_workers=max(1, PROFILE_PARSE_WORKERS), thread_name_prefix="profile-parse") as parse_pool:
+            loader = TabLoader(self.driver, self.profile_tabs)
+            return loader.load(
+                hrefs,
+                lambda href, page_html: parse_pool.submit(self.parse_and_deliver, href, page_html, profile_done),
+                should_stop=self.is_cancelled
+            )
+
+    def reuse_known_profiles(self, hrefs, on_profile):
+        """
+        Hand leads already scraped in an earlier run to on_profile from the lead store
+        instead of visiting them again. Returns the hrefs that still need a visit.
+        """
+        if not self.lead_store:
+            return hrefs
+        try:
+            known = {href: canonical_lead_id(href) for href in hrefs}
+            known = {href: lead_id for href, lead_id in known.items() if self.lead_store.is_scraped(lead_id)}
+            profiles = self.lead_store.get_profiles(known.values()) if known else {}
+        except Exception as e:
+            print(f"⚠️ Could not look up known leads: {e}")
+            return hrefs
+
+        remaining = []
+        for href in hrefs:
+            stored = profiles.get(known.get(href))
+            if not stored:
+                remaining.append(href)
+                continue
+            # Keep this run's link, the stored one may carry an expired session token
+            profile = dict(stored, url=href)
+            with self.stats_lock:
+                self.dedupe_stats["known_reused"] += 1
+            CACHE_LOOKUPS.labels(cache="scraped_profile", result="hit").inc()
+            on_profile(profile)
+        if len(remaining) < len(hrefs):
+            print(f"♻️ Reused {len(hrefs) - len(remaining)} already scraped profiles, visiting {len(remaining)}")
+        return remaining
+
+    def get_target_description(self, base_prompt=None):
+        return base_prompt.strip() if base_prompt else DEFAULT_TARGET_DESCRIPTION
+
+    def lookup_cached_score(self, profile_data, target_description):
+        """
+        Reuse a previous verdict for unchanged profile content and target description.
+        Returns (cache_key, hit); on a hit the verdict is already applied to profile_data.
+        """
+        if not self.score_cache:
+            return None, False
+        cache_key = self.score_cache.make_key(profile_data['headline'], profile_data['about'], target_description, AI_MODEL)
+        cached = self.score_cache.get(cache_key)
+        with self.stats_lock:
+            self.cache_stats["hits" if cached else "misses"] += 1
+        CACHE_LOOKUPS.labels(cache="ai_score", result="hit" if cached else "miss").inc()
+        if cached:
+            print(f"💾 Cached AI score for {profile_data['url']}: {cached['score']}")
+            profile_data.update(cached)
+        return cache_key, bool(cached)
+
+    def prefilter_profile(self, profile_data):
+        """
+        Run the local pre-filter on an uncached profile. Rejected profiles get a NO verdict
+        right away and are not sent to GPT. Returns True if the profile still needs scoring.
+        """
+        if not self.prefilter:
+            return True
+        passed, relevance = self.prefilter.check(profile_data)
+        with self.stats_lock:
+            self.prefilter_stats["checked"] += 1
+            if not passed:
+                self.prefilter_stats["rejected"] += 1
+        PREFILTER_PROFILES.labels(result="passed" if passed else "rejected").inc()
+        if not passed:
+            print(f"🚫 Pre-filter rejected {profile_data['url']} (relevance {relevance:.2f})")
+            profile_data.update({
+                "match": "NO",
+                "reason": f"Auto-rejected by keyword pre-filter (relevance {relevance:.2f})",
+                "score": 0.0
+            })
+        return passed
+
+    def count_saved_calls(self, saved):
+        if saved:
+            with self.stats_lock:
+                self.prefilter_stats["api_calls_saved"] += saved
+
     def analyze_profile_with_ai(self, profile_data, base_prompt=None):
         """
         Analyze profile using GPT-4 and assign relevance score
@@ -93,14 +399,21 @@ class LeadExtractor:
         if not self.client:
             return profile_data
         
-        target_description = base_prompt.strip() if base_prompt else """
-        We are looking for professionals or companies involved in anti-corrosion protection,
-        especially those in shipbuilding, railway, tram, and automotive underbody coatings, 
-        high-temperature press shops, forging machinery, outdoor equipment like windmills (esp. splash zones), 
-        pipe coatings (for water, oil, underground metal pipes), LSR sealants, glass-to-metal bonding, 
-        grease dispensing in machines, electric insulators, barrels, drums, and related industrial environments.
-        """
+        target_description = self.get_target_description(base_prompt)
+        cache_key, cached = self.lookup_cached_score(profile_data, target_description)
+        if not cached:
+            if self.prefilter_profile(profile_data):
+                self.score_profile(profile_data, target_description, cache_key)
+            else:
+                self.count_saved_calls(1)
 
+        self.report_progress(profiles_scored=1)
+        return profile_data
+
+    def score_profile(self, profile_data, target_description, cache_key=None):
+        """
+        Score a single profile with its own GPT request
+        """
         prompt = f"""
         You are an expert B2B sales assistant.
 
@@ -121,12 +434,16 @@ class LeadExtractor:
         {{"match": "YES or NO", "reason": "...", "score": float}}
         """
 
+        outcome = "error"
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-            )
+            with timed(AI_REQUEST_SECONDS, "ai_request_single", kind="single"):
+                response = self.client.chat_completion(
+                    model=AI_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.2,
+                )
+            record_ai_usage("single", response)
+            outcome = "invalid"
 
             content = response.choices[0].message.content
             print(f"🤖 GPT Response for {profile_data['url']}:\n{content}\n")
@@ -138,6 +455,10 @@ class LeadExtractor:
                 "reason": parsed.get("reason", "").strip(),
                 "score": float(parsed.get("score", 0.0))
             })
+            outcome = "ok"
+
+            if cache_key:
+                self.score_cache.set(cache_key, profile_data, AI_MODEL)
 
         except Exception as e:
             print(f"❌ GPT error for {profile_data['url']}: {e}")
@@ -146,207 +467,451 @@ class LeadExtractor:
                 "reason": "AI analysis failed",
                 "score": 0.0
             })
+        AI_REQUESTS.labels(kind="single", outcome=outcome).inc()
 
-        return profile_data
-    
-    def extract_leads_from_url(self, linkedin_url, target_count=30, use_ai_filtering=False, base_prompt=None):
+    def analyze_profiles_with_ai(self, profiles, base_prompt=None):
         """
-        Extract LinkedIn leads from a specific URL without any filters
+        Score several profiles with a single GPT request. Profiles whose verdict is
+        missing or invalid in the batch answer are re-scored one by one.
         """
-        if not self.driver:
-            raise Exception("Browser not initialized. Please login first.")
-        
+        if not self.client:
+            return profiles
+
+        target_description = self.get_target_description(base_prompt)
+        uncached = []
+        for profile_data in profiles:
+            cache_key, cached = self.lookup_cached_score(profile_data, target_description)
+            if not cached:
+                uncached.append((profile_data, cache_key))
+
+        # A batch costs one request as long as a single profile is left to score
+        to_score = [item for item in uncached if self.prefilter_profile(item[0])]
+        if uncached and not to_score:
+            self.count_saved_calls(1)
+        uncached = to_score
+
+        if len(uncached) == 1:
+            self.score_profile(uncached[0][0], target_description, uncached[0][1])
+        elif uncached:
+            failed = self.score_profile_batch(uncached, target_description)
+            if failed:
+                print(f"↩️ Re-scoring {len(failed)} of {len(uncached)} batched profiles individually")
+            for profile_data, cache_key in failed:
+                self.score_profile(profile_data, target_description, cache_key)
+
+        self.report_progress(profiles_scored=len(profiles))
+        return profiles
+
+    def score_profile_batch(self, items, target_description):
+        """
+        Score (profile, cache_key) items in one GPT request, returns the items that got no valid verdict
+        """
+        profiles_text = "\n\n".join(
+            f"""--- Profile {index} ---
+        URL: {profile_data['url']}
+        Headline: {profile_data['headline']}
+        About: {profile_data['about']}"""
+            for index, (profile_data, _) in enumerate(items, 1)
+        )
+
+        prompt = f"""
+        You are an expert B2B sales assistant.
+
+        Given the {len(items)} LinkedIn profiles below, evaluate how well each person or company matches the following client description.
+
+        {profiles_text}
+
+        --- Target Client Description ---
+        {target_description}
+
+        For every profile, answer the following:
+        1. Does this profile align with the target? (YES/NO)
+        2. Explain briefly why or why not.
+        3. Give a score from 0 to 1 indicating how closely they match (e.g. 0.2 = weak match, 0.9 = strong match).
+        Respond with a JSON array holding one object per profile, in the same order, in the following format:
+        [{{"url": "profile URL exactly as given", "match": "YES or NO", "reason": "...", "score": float}}]
+        """
+
+        outcome = "error"
         try:
-            # Navigate to the provided LinkedIn URL
-            print(f"🔍 Navigating to provided LinkedIn URL: {linkedin_url}")
-            self.driver.get(linkedin_url)
-            time.sleep(5)  # Wait for page to load
-            
-            all_hrefs = set()  # Use set to avoid duplicates
-            time.sleep(5)
-            
-            # Scroll to a specific target div
+            with timed(AI_REQUEST_SECONDS, "ai_request_batch", kind="batch"):
+                response = self.client.chat_completion(
+                    model=AI_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.2,
+                )
+            record_ai_usage("batch", response)
+            outcome = "invalid"
+
+            content = response.choices[0].message.content
+            print(f"🤖 GPT batch response for {len(items)} profiles:\n{content}\n")
+
+            parsed = parse_json_reply(content)
+            if not isinstance(parsed, list):
+                raise ValueError("expected a JSON array")
+        except Exception as e:
+            AI_REQUESTS.labels(kind="batch", outcome=outcome).inc()
+            print(f"❌ GPT batch error for {len(items)} profiles: {e}")
+            return list(items)
+        AI_REQUESTS.labels(kind="batch", outcome="ok").inc()
+
+        verdicts = {}
+        for position, item in enumerate(parsed):
+            if not isinstance(item, dict):
+                continue
+            url = item.get("url")
+            # Fall back to the position when the URL was not echoed back
+            if not url and len(parsed) == len(items):
+                url = items[position][0]['url']
+            verdict = validate_verdict(item)
+            if url and verdict and url not in verdicts:
+                verdicts[url] = verdict
+
+        failed = []
+        for profile_data, cache_key in items:
+            verdict = verdicts.get(profile_data['url'])
+            if not verdict:
+                failed.append((profile_data, cache_key))
+                continue
+            profile_data.update(verdict)
+            if cache_key:
+                self.score_cache.set(cache_key, profile_data, AI_MODEL)
+        return failed
+
+    def start_run(self, params, fieldnames, has_ai, resume):
+        """
+        Open (or resume) the checkpointed output of a run and register it in the lead store
+        """
+        checkpoint = RunCheckpoint.start(params, fieldnames, resume=resume)
+        if self.lead_store:
             try:
-                target_div = self.driver.find_element(By.XPATH, "/html/body/main/div[1]/div[2]/div[2]/div[2]/div[4]")
-                self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", target_div)
-                print("✅ Scrolled to the target div.")
+                self.lead_store.start_run(checkpoint.filename, has_ai, params)
             except Exception as e:
-                print(f"❌ Failed to locate or scroll to the div: {e}")
-            
-            time.sleep(5)
-            
-            # Loop through pages
-            while len(all_hrefs) < target_count:
+                print(f"⚠️ Could not register run in lead store: {e}")
+        return checkpoint
+
+    def record_lead(self, profile, checkpoint):
+        """
+        Hand one finished lead to the run output and the lead store
+        """
+        checkpoint.append(profile)
+        LEADS_RECORDED.inc()
+        if self.lead_store:
+            try:
+                self.lead_store.add_lead(checkpoint.filename, profile)
+            except Exception as e:
+                print(f"⚠️ Could not store lead {profile['url']}: {e}")
+
+    def finish_run(self, checkpoint, only_matches=False):
+        """
+        Finalize the export and sync the lead store with it, returns the lead count
+        """
+        count = checkpoint.finalize(only_matches=only_matches)
+        if self.lead_store:
+            try:
+                self.lead_store.import_csv(checkpoint.filename)
+            except Exception as e:
+                print(f"⚠️ Could not sync lead store with {checkpoint.filename}: {e}")
+        return count
+
+    def print_scoring_summary(self):
+        if self.score_cache:
+            print(f"💾 AI score cache: {self.cache_stats['hits']} hits, {self.cache_stats['misses']} misses")
+        if self.prefilter:
+            print(f"🚫 Pre-filter: {self.prefilter_stats['rejected']} of {self.prefilter_stats['checked']} profiles rejected, {self.prefilter_stats['api_calls_saved']} GPT requests saved")
+
+    def basic_profile(self, href):
+        """
+        Lead from the harvested result card only, names and titles come for free
+        """
+        card = self.result_cards.get(href, {})
+        parts = card.get("name", "").split()
+        return {
+            "url": href,
+            "first_name": parts[0] if parts else "",
+            "last_name": parts[-1] if len(parts) > 1 else "",
+            "headline": card.get("title", ""),
+            "about": ""
+        }
+
+    def search_session(self, driver):
+        """
+        Extractor paginating searches on another browser session, sharing the dedupe state and wait stats of this run
+        """
+        session = LeadExtractor(
+            driver, harvest_with_script=self.harvest_with_script, cancel_event=self.cancel_event, base_url=self.base_url,
+            filter_cache=self.filter_cache, search_with_url=self.search_with_url
+        )
+        session.result_cards = self.result_cards
+        session.collected_ids = self.collected_ids
+        session.dedupe_stats = self.dedupe_stats
+        session.dedupe_lock = self.dedupe_lock
+        session.wait_stats = self.wait_stats
+        session.waiter = PageWaiter(driver, self.wait_stats)
+        return session
+
+    def run_pipeline(self, checkpoint, target_count, open_results, use_ai_filtering, base_prompt, keywords=None, refresh=False, visit_profiles=True, fan_out=None):
+        """
+        Stream the leads of a run through the extraction pipeline. open_results() loads the
+        first search page; it is skipped when a resumed run already finished collecting.
+        A QueryFanOut replaces open_results with several searches run at once.
+        Profiles scraped in earlier runs are reused unless refresh is set.
+        """
+        all_hrefs = set(checkpoint.hrefs)  # Use set to avoid duplicates
+        pending_hrefs = checkpoint.pending_hrefs(target_count)
+        print(f"🚰 Starting pipeline with {len(pending_hrefs)} pending leads ({len(checkpoint.processed)} already done)")
+
+        collect = None
+        if checkpoint.collection_done:
+            print(f"♻️ Lead collection already finished ({len(all_hrefs)} leads), skipping search pages")
+        elif fan_out:
+            def collect(emit, should_stop):
+                fan_out.run(all_hrefs, emit, should_stop)
+        else:
+            def collect(emit, should_stop):
+                open_results()
+                self.collect_search_hrefs(all_hrefs, target_count, checkpoint, on_hrefs=emit, should_stop=should_stop)
+
+        pipeline = ExtractionPipeline(self, checkpoint, use_ai_filtering, base_prompt, keywords, refresh, visit_profiles)
+        return pipeline.run(pending_hrefs, collect)
+
+    def harvest_search_results(self, container=None):
+        """
+        Read href, name, title and company of every result card with one execute_script call.
+        Returns (cards, first title element).
+        """
+        raw, first_title = self.driver.execute_script(HARVEST_RESULTS_JS, container)
+        return json.loads(raw or "[]"), first_title
+
+    def add_href(self, href, all_hrefs):
+        """
+        Add a result link unless the same lead was already collected under another
+        search type or session token. Returns True if it was added.
+        """
+        if href in all_hrefs:
+            return False
+        lead_id = canonical_lead_id(href)
+        with self.dedupe_lock:
+            if lead_id in self.collected_ids:
+                self.dedupe_stats["duplicates_skipped"] += 1
+                return False
+            self.collected_ids.add(lead_id)
+        all_hrefs.add(href)
+        return True
+
+    def collect_result_hrefs(self, scroll_container, all_hrefs, target_count):
+        """
+        Add the result links of the current page to all_hrefs, returns (new hrefs, first title element)
+        """
+        new_hrefs = []
+        if self.harvest_with_script:
+            try:
+                container = None if scroll_container is self.driver else scroll_container
+                cards, first_title = self.harvest_search_results(container)
+                print(f"📋 Harvested {len(cards)} result cards")
+                for card in cards:
+                    if len(all_hrefs) >= target_count:
+                        break
+                    if self.add_href(card["href"], all_hrefs):
+                        self.result_cards[card["href"]] = card
+                        new_hrefs.append(card["href"])
+                        print(f"✅ Added href: {card['href']}")
+                if cards:
+                    return new_hrefs, first_title
+                selector_error("result cards")
+            except Exception as e:
+                selector_error("result cards script")
+                print(f"⚠️ Script harvesting failed, falling back to element lookups: {e}")
+
+        # Find all title elements inside that container
+        title_elements = scroll_container.find_elements(By.CLASS_NAME, "artdeco-entity-lockup__title")
+        
+        print(f"📋 Found {len(title_elements)} title elements")
+        
+        # Extract hrefs
+        for title in title_elements:
+            if len(all_hrefs) >= target_count:
+                break
+            try:
+                link = title.find_element(By.TAG_NAME, "a")
+                href = link.get_attribute("href")
+                if href and self.add_href(href, all_hrefs):
+                    new_hrefs.append(href)
+                    print(f"✅ Added href: {href}")
+            except Exception as e:
+                selector_error("result title link")
+                print(f"⚠️ Error extracting href from title element: {e}")
+                continue
+        return new_hrefs, (title_elements[0] if title_elements else None)
+    
+    def collect_search_hrefs(self, all_hrefs, target_count, checkpoint=None, on_hrefs=None, should_stop=None):
+        """
+        Walk the result pages of the search currently loaded and collect lead hrefs into all_hrefs.
+        The new hrefs of every page are handed to on_hrefs right away.
+        """
+        should_stop = should_stop or self.is_cancelled
+        self.collected_ids.update(canonical_lead_id(href) for href in all_hrefs)
+        self.waiter.result_count_stable(By.CLASS_NAME, "artdeco-entity-lockup__title", name="initial results")
+
+        # Scroll to a specific target div
+        try:
+            target_div = self.driver.find_element(By.XPATH, "/html/body/main/div[1]/div[2]/div[2]/div[2]/div[4]")
+            self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", target_div)
+            print("✅ Scrolled to the target div.")
+        except Exception as e:
+            selector_error("results scroll target")
+            print(f"❌ Failed to locate or scroll to the div: {e}")
+
+        self.waiter.network_idle(name="results after scroll")
+
+        # Loop through pages
+        while len(all_hrefs) < target_count and not should_stop():
+            page_started = time.time()
+            try:
+                # 1. Find the scrollable container and wait for it to be fully loaded
+                print("🔄 Waiting for page to load...")
+                scroll_container = self.wait.until(EC.presence_of_element_located(
+                    (By.CLASS_NAME, "_border-search-results_1igybl")
+                ))
+
+                # 2. Find the target div using XPath and scroll to it
                 try:
-                    # 1. Find the scrollable container and wait for it to be fully loaded
-                    print("🔄 Waiting for page to load...")
-                    scroll_container = self.wait.until(EC.presence_of_element_located(
-                        (By.CLASS_NAME, "_border-search-results_1igybl")
+                    target_div = self.driver.find_element(By.XPATH, "/html/body/main/div[1]/div[2]/div[2]/div[2]/div[4]")
+
+                    # Scroll the element into view
+                    self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", target_div)
+
+                    print("✅ Scrolled to the target div.")
+
+                except Exception as e:
+                    selector_error("results scroll target")
+                    print(f"❌ Failed to locate or scroll to the div: {e}")
+                    # Continue anyway, maybe the div structure changed
+
+                # Wait until the lazily rendered result cards stop appearing
+                print("⏳ Waiting for results to finish loading...")
+                loaded = self.waiter.result_count_stable(
+                    By.CLASS_NAME, "artdeco-entity-lockup__title",
+                    container=scroll_container, stable_for=1.5, name="page results"
+                )
+                print(f"✅ {loaded} results rendered")
+
+                # 3. Extract hrefs using the specified approach
+                print("🔍 Extracting hrefs from current page...")
+
+                # Find the scrollable container again (in case page structure changed)
+                try:
+                    scroll_container = self.driver.find_element(By.CLASS_NAME, "_border-search-results_1igybl")
+                except:
+                    selector_error("results container")
+                    print("⚠️ Could not find scroll container, trying alternative approach")
+                    scroll_container = self.driver
+
+                # Collect the result links of this page
+                new_hrefs, first_result = self.collect_result_hrefs(scroll_container, all_hrefs, target_count)
+                record_stage("results_page", time.time() - page_started)
+                page_hrefs = len(new_hrefs)
+                if checkpoint:
+                    checkpoint.add_hrefs(new_hrefs)
+                if on_hrefs:
+                    on_hrefs(new_hrefs)
+                self.report_progress(hrefs_collected=len(all_hrefs), pages_crawled=1)
+
+                print(f"✅ Collected {len(all_hrefs)} total leads (added {page_hrefs} from this page)")
+
+                if len(all_hrefs) >= target_count:
+                    print(f"🎯 Target count reached: {len(all_hrefs)} leads")
+                    break
+
+                # 4. Check if Next button exists and is clickable
+                try:
+                    print("🔍 Looking for Next button...")
+                    next_btn = self.wait.until(EC.element_to_be_clickable(
+                        (By.CLASS_NAME, "artdeco-pagination__button--next")
                     ))
-                    
-                    # 2. Find the target div using XPath and scroll to it
-                    try:
-                        target_div = self.driver.find_element(By.XPATH, "/html/body/main/div[1]/div[2]/div[2]/div[2]/div[4]")
-                        
-                        # Scroll the element into view
-                        self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", target_div)
-                        
-                        print("✅ Scrolled to the target div.")
-                        
-                        # Wait for 7 seconds as requested
-                        print("⏳ Waiting 7 seconds for page to fully load...")
-                        time.sleep(7)
-                        
-                    except Exception as e:
-                        print(f"❌ Failed to locate or scroll to the div: {e}")
-                        # Continue anyway, maybe the div structure changed
-                        time.sleep(5)
-
-                    # 3. Extract hrefs using the specified approach
-                    print("🔍 Extracting hrefs from current page...")
-                    
-                    # Find the scrollable container again (in case page structure changed)
-                    try:
-                        scroll_container = self.driver.find_element(By.CLASS_NAME, "_border-search-results_1igybl")
-                    except:
-                        print("⚠️ Could not find scroll container, trying alternative approach")
-                        scroll_container = self.driver
-                    
-                    # Find all title elements inside that container
-                    title_elements = scroll_container.find_elements(By.CLASS_NAME, "artdeco-entity-lockup__title")
-                    
-                    print(f"📋 Found {len(title_elements)} title elements")
-                    
-                    # Extract hrefs
-                    page_hrefs = 0
-                    for title in title_elements:
-                        if len(all_hrefs) >= target_count:
-                            break
-                        try:
-                            link = title.find_element(By.TAG_NAME, "a")
-                            href = link.get_attribute("href")
-                            if href:
-                                all_hrefs.add(href)
-                                page_hrefs += 1
-                                print(f"✅ Added href: {href}")
-                        except Exception as e:
-                            print(f"⚠️ Error extracting href from title element: {e}")
-                            continue
-
-                    print(f"✅ Collected {len(all_hrefs)} total leads (added {page_hrefs} from this page)")
 
-                    if len(all_hrefs) >= target_count:
-                        print(f"🎯 Target count reached: {len(all_hrefs)} leads")
+                    if not next_btn.is_enabled():
+                        print("🔚 Reached last page - Next button is disabled.")
                         break
 
-                    # 4. Check if Next button exists and is clickable
-                    try:
-                        print("🔍 Looking for Next button...")
-                        next_btn = self.wait.until(EC.element_to_be_clickable(
-                            (By.CLASS_NAME, "artdeco-pagination__button--next")
-                        ))
-                        
-                        if not next_btn.is_enabled():
-                            print("🔚 Reached last page - Next button is disabled.")
-                            break
-                        
-                        # Click Next button
-                        print("➡️ Clicking Next button...")
+                    # Click Next button (first_result tells us when the page is replaced)
+                    print("➡️ Clicking Next button...")
+                    with observe_stage("pagination"):
                         next_btn.click()
-                        
+
                         # Wait for page to load properly
                         print("⏳ Waiting for next page to load...")
-                        time.sleep(8)  # Increased wait time for page load
-                        
+                        if not self.waiter.staleness_of(first_result, name="next page"):
+                            self.waiter.network_idle(name="next page network")
+
                         # Wait for the scroll container to be present on the new page
                         self.wait.until(EC.presence_of_element_located(
                             (By.CLASS_NAME, "_border-search-results_1igybl")
                         ))
-                        
-                        # Additional wait to ensure page is fully loaded
-                        time.sleep(3)
-                        
-                        print("✅ Next page loaded successfully")
-                        
-                    except Exception as e:
-                        print(f"⚠️ No Next button found or cannot click it: {e}")
-                        print("🔚 Stopping extraction - reached end of results")
-                        break
+
+                    print("✅ Next page loaded successfully")
 
                 except Exception as e:
-                    print(f"⚠️ Page error: {e}")
-                    print("🔄 Retrying current page...")
-                    time.sleep(5)
-                    continue
+                    print(f"⚠️ No Next button found or cannot click it: {e}")
+                    print("🔚 Stopping extraction - reached end of results")
+                    break
 
-            # Always extract profile data for all leads
-            print(f"📊 Extracting profile data for {len(all_hrefs)} leads...")
-            profile_data = []
-            for i, href in enumerate(list(all_hrefs)[:target_count]):
-                print(f"🔍 Extracting profile {i+1}/{min(len(all_hrefs), target_count)}: {href}")
-                profile = self.extract_profile_data(href)
-                
-                # Add AI analysis if AI filtering is enabled
-                if use_ai_filtering and self.client:
-                    profile = self.analyze_profile_with_ai(profile, base_prompt)
-                else:
-                    # Add default values for non-AI filtering
-                    profile.update({
-                        "match": "NO",
-                        "reason": "",
-                        "score": 0.0
-                    })
-                
-                profile_data.append(profile)
-                time.sleep(2)  # Small delay between profile extractions
+            except Exception as e:
+                selector_error("results page")
+                print(f"⚠️ Page error: {e}")
+                print("🔄 Retrying current page...")
+                self.waiter.network_idle(name="retry page")
+                continue
 
-            print(f"📊 Final profile data count: {len(profile_data)}")
-            if profile_data:
-                print(f"📋 Sample profile data: {profile_data[0]}")
+        if checkpoint and not should_stop():
+            checkpoint.mark_collection_done()
+        return all_hrefs
 
-            # Save to CSV with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"linkedin_leads_{timestamp}.csv"
-            filepath = os.path.join('static', 'exports', filename)
-            
-            # Ensure exports directory exists
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            
+    def extract_leads_from_url(self, linkedin_url, target_count=30, use_ai_filtering=False, base_prompt=None, resume=True, refresh=False):
+        """
+        Extract LinkedIn leads from a specific URL without any filters
+        """
+        if not self.driver:
+            raise Exception("Browser not initialized. Please login first.")
+        
+        try:
+            use_ai = bool(use_ai_filtering and self.client)
             # Determine fieldnames based on whether AI filtering was used
-            if use_ai_filtering and self.client:
-                fieldnames = ["url", "first_name", "last_name", "headline", "about", "match", "reason", "score"]
-            else:
-                fieldnames = ["url", "first_name", "last_name", "headline", "about"]
-            
-            with open(filepath, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                # Ensure all rows have the required fields
-                for profile in profile_data:
-                    row = {}
-                    for field in fieldnames:
-                        if field in profile:
-                            row[field] = profile[field]
-                        else:
-                            # Set default values for missing fields
-                            if field == "match":
-                                row[field] = "NO"
-                            elif field == "reason":
-                                row[field] = ""
-                            elif field == "score":
-                                row[field] = 0.0
-                            else:
-                                row[field] = ""
-                    writer.writerow(row)
-
-            print(f"✅ Finished. Saved {len(profile_data)} leads to {filename}")
+            fieldnames = AI_FIELDNAMES if use_ai else BASIC_FIELDNAMES
+            checkpoint = self.start_run({
+                "mode": "url",
+                "linkedin_url": linkedin_url,
+                "target_count": target_count,
+                "use_ai_filtering": use_ai,
+                "base_prompt": base_prompt
+            }, fieldnames, use_ai, resume)
+
+            def open_results():
+                self.open_url(linkedin_url)
+
+            # Always extract profile data for all leads
+            pipeline_stats = self.run_pipeline(checkpoint, target_count, open_results, use_ai, base_prompt, refresh=refresh)
+
+            self.check_cancelled()
+
+            count = self.finish_run(checkpoint)
+            filename = checkpoint.filename
+
+            print(f"✅ Finished. Saved {count} leads to {filename}")
+            self.wait_stats.print_summary()
+            browser_stats.print_summary()
             
             return {
                 'success': True,
                 'filename': filename,
-                'count': len(profile_data),
-                'message': f'Successfully extracted {len(profile_data)} leads from URL'
+                'count': count,
+                'cache_stats': dict(self.cache_stats),
+                'prefilter_stats': dict(self.prefilter_stats),
+                'dedupe_stats': dict(self.dedupe_stats),
+                'pipeline_stats': pipeline_stats,
+                'browser_stats': browser_stats.summary(),
+                'wait_stats': self.wait_stats.summary(),
+                'message': f'Successfully extracted {count} leads from URL'
             }
             
         except Exception as e:
@@ -356,312 +921,203 @@ class LeadExtractor:
                 'error': f'Error during lead extraction from URL: {str(e)}'
             }
 
-    def extract_leads(self, target_count=30, search_term='', country_filter='', include_country=True, position_filter='', include_position=True, extract_profile_data=True, use_ai_filtering=False, base_prompt=None):
+    def open_url(self, linkedin_url):
         """
-        Extract LinkedIn leads using pagination approach with optional profile data extraction, country filtering, and position filtering
+        Load a Sales Navigator search from its URL
         """
-        if not self.driver:
-            raise Exception("Browser not initialized. Please login first.")
-        
-        try:
-            search_url = "https://www.linkedin.com/sales/search/people"
-            print(f"🔍 Navigating to search URL...")
-            self.driver.get(search_url)
-            time.sleep(5)
+        # Navigate to the provided LinkedIn URL
+        print(f"🔍 Navigating to provided LinkedIn URL: {linkedin_url}")
+        with observe_stage("search_page_load"):
+            browser_stats.timed_get(self.driver, linkedin_url)
+            if not self.waiter.element_present(By.CLASS_NAME, "_border-search-results_1igybl", name="search results"):
+                selector_error("search results")
 
-            # If a search term is provided, enter it in the search bar and submit
-            if search_term:
-                try:
-                    print(f"🔎 Entering search term: {search_term}")
-                    search_input = self.driver.find_element(By.CLASS_NAME, "global-typeahead-search__input")
-                    search_input.clear()
-                    search_input.send_keys(search_term)
-                    from selenium.webdriver.common.keys import Keys
-                    search_input.send_keys(Keys.ENTER)
-                    time.sleep(5)
-                except Exception as e:
-                    print(f"❌ Could not perform search: {e}")
-
-            # Apply country filters if provided
-            if country_filter:
-                try:
-                    print("🌍 Opening location filter panel...")
-                    # Use the more reliable approach to find and click the GEOGRAPHY fieldset
-                    from selenium.webdriver.common.action_chains import ActionChains
-                    
-                    # Wait for the GEOGRAPHY fieldset
-                    fieldset = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.XPATH, "//fieldset[@data-x-search-filter='GEOGRAPHY']"))
-                    )
-                    
-                    # Scroll into view
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", fieldset)
-                    
-                    # Now try to click a likely clickable child
-                    click_target = fieldset.find_element(By.XPATH, ".//div[contains(@class, 'ph4')]")
-                    
-                    # Use ActionChains to click reliably
-                    actions = ActionChains(self.driver)
-                    actions.move_to_element(click_target).click().perform()
-                    
-                    print("✅ Found and clicked location filter button")
-                    time.sleep(2)  # Wait for filter panel to open
-                    
-                    # Now add all countries
-                    for country in country_filter:
-                        try:
-                            print(f"🌍 Applying country filter: {country}")
-                            country_input = self.driver.find_element(By.CLASS_NAME, "search-filter__focus-target--input")
-                            country_input.clear()
-                            time.sleep(0.5)
-                            country_input.send_keys(country)
-                            time.sleep(0.5)
-                            if include_country:
-                                self.driver.find_element(By.CLASS_NAME, "_include-button_1cz98z").click()
-                            else:
-                                self.driver.find_element(By.CLASS_NAME, "_exclude-button_1cz98z").click()
-                            print(f"✅ Country filter applied: {country}")
-                            time.sleep(1.5)  # Let UI update
-                        except Exception as e:
-                            print(f"❌ Could not apply country filter for {country}: {e}")
-                except Exception as e:
-                    print(f"❌ Could not open location filter panel: {e}")
+    def open_search(self, search_term='', country_filter='', include_country=True, position_filter='', include_position=True):
+        """
+        Load the Sales Navigator people search with the search term and filters, straight from
+        a built search URL or, when that is off or a filter cannot be resolved, through the UI
+        """
+        if self.search_with_url:
+            with observe_stage("search_url_build"):
+                search_url = SearchUrlBuilder(self.driver, self.base_url, self.filter_cache).build(
+                    search_term, country_filter, include_country, position_filter, include_position
+                )
+            if search_url:
+                self.open_url(search_url)
+                return
+            print("⚠️ Could not build the search URL, applying the filters on the search page")
 
-            # Apply position filters if provided
-            if position_filter:
-                try:
-                    print("👔 Opening position filter panel...")
-                    # Use the more reliable approach to find and click the TITLE fieldset
-                    # Wait for the TITLE fieldset
-                    fieldset = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.XPATH, "//fieldset[@data-x-search-filter='CURRENT_TITLE']"))
-                    )
-                    
-                    # Scroll into view
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", fieldset)
-                    
-                    # Now try to click a likely clickable child
-                    click_target = fieldset.find_element(By.XPATH, ".//div[contains(@class, 'ph4')]")
-                    
-                    # Use ActionChains to click reliably
-                    actions = ActionChains(self.driver)
-                    actions.move_to_element(click_target).click().perform()
-                    
-                    print("✅ Found and clicked position filter button")
-                    time.sleep(2)  # Wait for filter panel to open
-                    
-                    # Now add all positions
-                    for position in position_filter:
-                        try:
-                            print(f"👔 Applying position filter: {position}")
-                            position_input = self.driver.find_element(By.CLASS_NAME, "search-filter__focus-target--input")
-                            position_input.clear()
-                            time.sleep(0.5)
-                            position_input.send_keys(position)
-                            time.sleep(0.5)
-                            if include_position:
-                                self.driver.find_element(By.CLASS_NAME, "_include-button_1cz98z").click()
-                            else:
-                                self.driver.find_element(By.CLASS_NAME, "_exclude-button_1cz98z").click()
-                            print(f"✅ Position filter applied: {position}")
-                            time.sleep(1.5)  # Let UI update
-                        except Exception as e:
-                            print(f"❌ Could not apply position filter for {position}: {e}")
-                except Exception as e:
-                    print(f"❌ Could not open position filter panel: {e}")
+        search_url = f"{self.base_url}/sales/search/people"
+        print(f"🔍 Navigating to search URL...")
+        with observe_stage("search_page_load"):
+            browser_stats.timed_get(self.driver, search_url)
+            if not self.waiter.element_present(By.CLASS_NAME, "global-typeahead-search__input", name="search bar"):
+                selector_error("search bar")
 
-            all_hrefs = set()  # Use set to avoid duplicates
-            time.sleep(5)
-            
-            # Scroll to a specific target div
+        # If a search term is provided, enter it in the search bar and submit
+        if search_term:
             try:
-                target_div = self.driver.find_element(By.XPATH, "/html/body/main/div[1]/div[2]/div[2]/div[2]/div[4]")
-                self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", target_div)
-                print("✅ Scrolled to the target div.")
+                print(f"🔎 Entering search term: {search_term}")
+                search_input = self.driver.find_element(By.CLASS_NAME, "global-typeahead-search__input")
+                search_input.clear()
+                search_input.send_keys(search_term)
+                from selenium.webdriver.common.keys import Keys
+                with observe_stage("search_submit"):
+                    search_input.send_keys(Keys.ENTER)
+                    self.waiter.element_present(By.CLASS_NAME, "_border-search-results_1igybl", name="search results")
+                    self.waiter.network_idle(name="search network")
             except Exception as e:
-                print(f"❌ Failed to locate or scroll to the div: {e}")
-            
-            time.sleep(5)
-            
-            # Loop through pages
-            while len(all_hrefs) < target_count:
-                try:
-                    # 1. Find the scrollable container and wait for it to be fully loaded
-                    print("🔄 Waiting for page to load...")
-                    scroll_container = self.wait.until(EC.presence_of_element_located(
-                        (By.CLASS_NAME, "_border-search-results_1igybl")
-                    ))
-                    
-                    # 2. Find the target div using XPath and scroll to it
+                selector_error("search bar")
+                print(f"❌ Could not perform search: {e}")
+
+        # Apply country filters if provided
+        if country_filter:
+            try:
+                print("🌍 Opening location filter panel...")
+                # Use the more reliable approach to find and click the GEOGRAPHY fieldset
+                from selenium.webdriver.common.action_chains import ActionChains
+
+                # Wait for the GEOGRAPHY fieldset
+                fieldset = WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.XPATH, "//fieldset[@data-x-search-filter='GEOGRAPHY']"))
+                )
+
+                # Scroll into view
+                self.driver.execute_script("arguments[0].scrollIntoView(true);", fieldset)
+
+                # Now try to click a likely clickable child
+                click_target = fieldset.find_element(By.XPATH, ".//div[contains(@class, 'ph4')]")
+
+                # Use ActionChains to click reliably
+                actions = ActionChains(self.driver)
+                actions.move_to_element(click_target).click().perform()
+
+                print("✅ Found and clicked location filter button")
+                # Wait for filter panel to open
+                self.waiter.element_present(By.CLASS_NAME, "search-filter__focus-target--input", timeout=5, name="filter panel")
+
+                # Now add all countries
+                for country in country_filter:
                     try:
-                        target_div = self.driver.find_element(By.XPATH, "/html/body/main/div[1]/div[2]/div[2]/div[2]/div[4]")
-                        
-                        # Scroll the element into view
-                        self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", target_div)
-                        
-                        print("✅ Scrolled to the target div.")
-                        
-                        # Wait for 7 seconds as requested
-                        print("⏳ Waiting 7 seconds for page to fully load...")
-                        time.sleep(7)
-                        
+                        print(f"🌍 Applying country filter: {country}")
+                        country_input = self.driver.find_element(By.CLASS_NAME, "search-filter__focus-target--input")
+                        country_input.clear()
+                        country_input.send_keys(country)
+                        # Include/exclude buttons show up once the typeahead has a suggestion
+                        button_class = "_include-button_1cz98z" if include_country else "_exclude-button_1cz98z"
+                        button = self.waiter.element_clickable(By.CLASS_NAME, button_class, timeout=5, name="filter suggestion")
+                        (button or self.driver.find_element(By.CLASS_NAME, button_class)).click()
+                        print(f"✅ Country filter applied: {country}")
+                        # Let UI update
+                        self.waiter.network_idle(idle_for=0.3, timeout=5, name="filter applied")
                     except Exception as e:
-                        print(f"❌ Failed to locate or scroll to the div: {e}")
-                        # Continue anyway, maybe the div structure changed
-                        time.sleep(5)
-
-                    # 3. Extract hrefs using the specified approach
-                    print("🔍 Extracting hrefs from current page...")
-                    
-                    # Find the scrollable container again (in case page structure changed)
-                    try:
-                        scroll_container = self.driver.find_element(By.CLASS_NAME, "_border-search-results_1igybl")
-                    except:
-                        print("⚠️ Could not find scroll container, trying alternative approach")
-                        scroll_container = self.driver
-                    
-                    # Find all title elements inside that container
-                    title_elements = scroll_container.find_elements(By.CLASS_NAME, "artdeco-entity-lockup__title")
-                    
-                    print(f"📋 Found {len(title_elements)} title elements")
-                    
-                    # Extract hrefs
-                    page_hrefs = 0
-                    for title in title_elements:
-                        if len(all_hrefs) >= target_count:
-                            break
-                        try:
-                            link = title.find_element(By.TAG_NAME, "a")
-                            href = link.get_attribute("href")
-                            if href:
-                                all_hrefs.add(href)
-                                page_hrefs += 1
-                                print(f"✅ Added href: {href}")
-                        except Exception as e:
-                            print(f"⚠️ Error extracting href from title element: {e}")
-                            continue
-
-                    print(f"✅ Collected {len(all_hrefs)} total leads (added {page_hrefs} from this page)")
+                        selector_error("filter suggestion")
+                        print(f"❌ Could not apply country filter for {country}: {e}")
+            except Exception as e:
+                selector_error("geography filter")
+                print(f"❌ Could not open location filter panel: {e}")
 
-                    if len(all_hrefs) >= target_count:
-                        print(f"🎯 Target count reached: {len(all_hrefs)} leads")
-                        break
+        # Apply position filters if provided
+        if position_filter:
+            try:
+                print("👔 Opening position filter panel...")
+                # Use the more reliable approach to find and click the TITLE fieldset
+                # Wait for the TITLE fieldset
+                fieldset = WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.XPATH, "//fieldset[@data-x-search-filter='CURRENT_TITLE']"))
+                )
+
+                # Scroll into view
+                self.driver.execute_script("arguments[0].scrollIntoView(true);", fieldset)
+
+                # Now try to click a likely clickable child
+                click_target = fieldset.find_element(By.XPATH, ".//div[contains(@class, 'ph4')]")
+
+                # Use ActionChains to click reliably
+                actions = ActionChains(self.driver)
+                actions.move_to_element(click_target).click().perform()
 
-                    # 4. Check if Next button exists and is clickable
+                print("✅ Found and clicked position filter button")
+                # Wait for filter panel to open
+                self.waiter.element_present(By.CLASS_NAME, "search-filter__focus-target--input", timeout=5, name="filter panel")
+
+                # Now add all positions
+                for position in position_filter:
                     try:
-                        print("🔍 Looking for Next button...")
-                        next_btn = self.wait.until(EC.element_to_be_clickable(
-                            (By.CLASS_NAME, "artdeco-pagination__button--next")
-                        ))
-                        
-                        if not next_btn.is_enabled():
-                            print("🔚 Reached last page - Next button is disabled.")
-                            break
-                        
-                        # Click Next button
-                        print("➡️ Clicking Next button...")
-                        next_btn.click()
-                        
-                        # Wait for page to load properly
-                        print("⏳ Waiting for next page to load...")
-                        time.sleep(8)  # Increased wait time for page load
-                        
-                        # Wait for the scroll container to be present on the new page
-                        self.wait.until(EC.presence_of_element_located(
-                            (By.CLASS_NAME, "_border-search-results_1igybl")
-                        ))
-                        
-                        # Additional wait to ensure page is fully loaded
-                        time.sleep(3)
-                        
-                        print("✅ Next page loaded successfully")
-                        
+                        print(f"👔 Applying position filter: {position}")
+                        position_input = self.driver.find_element(By.CLASS_NAME, "search-filter__focus-target--input")
+                        position_input.clear()
+                        position_input.send_keys(position)
+                        # Include/exclude buttons show up once the typeahead has a suggestion
+                        button_class = "_include-button_1cz98z" if include_position else "_exclude-button_1cz98z"
+                        button = self.waiter.element_clickable(By.CLASS_NAME, button_class, timeout=5, name="filter suggestion")
+                        (button or self.driver.find_element(By.CLASS_NAME, button_class)).click()
+                        print(f"✅ Position filter applied: {position}")
+                        # Let UI update
+                        self.waiter.network_idle(idle_for=0.3, timeout=5, name="filter applied")
                     except Exception as e:
-                        print(f"⚠️ No Next button found or cannot click it: {e}")
-                        print("🔚 Stopping extraction - reached end of results")
-                        break
-
-                except Exception as e:
-                    print(f"⚠️ Page error: {e}")
-                    print("🔄 Retrying current page...")
-                    time.sleep(5)
-                    continue
+                        selector_error("filter suggestion")
+                        print(f"❌ Could not apply position filter for {position}: {e}")
+            except Exception as e:
+                selector_error("title filter")
+                print(f"❌ Could not open position filter panel: {e}")
 
-            # Extract profile data if requested
-            profile_data = []
-            if extract_profile_data:
-                print(f"📊 Extracting profile data for {len(all_hrefs)} leads...")
-                for i, href in enumerate(list(all_hrefs)[:target_count]):
-                    print(f"🔍 Extracting profile {i+1}/{min(len(all_hrefs), target_count)}: {href}")
-                    profile = self.extract_profile_data(href)
-                    print(f"📋 Extracted profile data: {profile}")
-                    
-                    # AI filtering if enabled
-                    if use_ai_filtering:
-                        profile = self.analyze_profile_with_ai(profile, base_prompt)
-                        print(f"�� AI analysis result: {profile}")
-                    
-                    profile_data.append(profile)
-                    time.sleep(2)  # Small delay between profile extractions
-            else:
-                # Just create basic profile data with URLs
-                print(f"📋 Creating basic profile data for {len(all_hrefs)} leads...")
-                profile_data = [{"url": href, "first_name": "", "last_name": "", "headline": "", "about": "", "match": "NO", "reason": "", "score": 0.0} 
-                              for href in list(all_hrefs)[:target_count]]
-
-            print(f"📊 Final profile data count: {len(profile_data)}")
-            if profile_data:
-                print(f"📋 Sample profile data: {profile_data[0]}")
-
-            # Sort by relevance score if AI filtering was used
-            if use_ai_filtering:
-                profile_data.sort(key=lambda x: x.get("score", 0.0), reverse=True)
-                # Filter to only include matches
-                profile_data = [p for p in profile_data if p.get("match", "").upper() == "YES"]
-
-            # Save to CSV with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"linkedin_leads_{timestamp}.csv"
-            filepath = os.path.join('static', 'exports', filename)
-            
-            # Ensure exports directory exists
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            
+    def extract_leads(self, target_count=30, search_term='', country_filter='', include_country=True, position_filter='', include_position=True, extract_profile_data=True, use_ai_filtering=False, base_prompt=None, resume=True, refresh=False):
+        """
+        Extract LinkedIn leads using pagination approach with optional profile data extraction, country filtering, and position filtering
+        """
+        if not self.driver:
+            raise Exception("Browser not initialized. Please login first.")
+        
+        try:
             # Determine fieldnames based on whether AI filtering was used
-            if use_ai_filtering:
-                fieldnames = ["url", "first_name", "last_name", "headline", "about", "match", "reason", "score"]
-            else:
-                fieldnames = ["url", "first_name", "last_name", "headline", "about"]
-            
-            with open(filepath, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                # Ensure all rows have the required fields
-                for profile in profile_data:
-                    row = {}
-                    for field in fieldnames:
-                        if field in profile:
-                            row[field] = profile[field]
-                        else:
-                            # Set default values for missing fields
-                            if field == "match":
-                                row[field] = "NO"
-                            elif field == "reason":
-                                row[field] = ""
-                            elif field == "score":
-                                row[field] = 0.0
-                            else:
-                                row[field] = ""
-                    writer.writerow(row)
-
-            print(f"✅ Finished. Saved {len(profile_data)} leads to {filename}")
+            fieldnames = AI_FIELDNAMES if use_ai_filtering else BASIC_FIELDNAMES
+            checkpoint = self.start_run({
+                "mode": "search",
+                "target_count": target_count,
+                "search_term": search_term,
+                "country_filter": list(country_filter or []),
+                "include_country": include_country,
+                "position_filter": list(position_filter or []),
+                "include_position": include_position,
+                "extract_profile_data": extract_profile_data,
+                "use_ai_filtering": use_ai_filtering,
+                "base_prompt": base_prompt
+            }, fieldnames, use_ai_filtering, resume)
+
+            def open_results():
+                self.open_search(search_term, country_filter, include_country, position_filter, include_position)
+
+            # With AI filtering the search term holds the generated keywords
+            keywords = [k.strip() for k in search_term.split(',') if k.strip()] if use_ai_filtering else None
+            # Without profile data the leads are built from the result cards and not scored
+            pipeline_stats = self.run_pipeline(
+                checkpoint, target_count, open_results,
+                use_ai_filtering and extract_profile_data, base_prompt, keywords, refresh,
+                visit_profiles=extract_profile_data
+            )
+
+            self.check_cancelled()
+
+            # Sort by relevance score and keep only matches if AI filtering was used
+            count = self.finish_run(checkpoint, only_matches=use_ai_filtering)
+            filename = checkpoint.filename
+
+            print(f"✅ Finished. Saved {count} leads to {filename}")
+            self.wait_stats.print_summary()
+            browser_stats.print_summary()
             
             return {
                 'success': True,
                 'filename': filename,
-                'count': len(profile_data),
-                'message': f'Successfully extracted {len(profile_data)} leads with profile data'
+                'count': count,
+                'cache_stats': dict(self.cache_stats),
+                'prefilter_stats': dict(self.prefilter_stats),
+                'dedupe_stats': dict(self.dedupe_stats),
+                'pipeline_stats': pipeline_stats,
+                'browser_stats': browser_stats.summary(),
+                'wait_stats': self.wait_stats.summary(),
+                'message': f'Successfully extracted {count} leads with profile data'
             }
             
         except Exception as e:
@@ -671,6 +1127,78 @@ class LeadExtractor:
                 'error': f'Error during lead extraction: {str(e)}'
             }
     
+    def extract_leads_multi(self, queries, target_count=30, country_filter='', include_country=True, position_filter='', include_position=True, extract_profile_data=True, use_ai_filtering=False, base_prompt=None, resume=True, refresh=False):
+        """
+        Extract leads from several search terms or Sales Navigator URLs at once, merged into one deduped export.
+        The country and position filters apply to the search terms.
+        """
+        if not self.driver:
+            raise Exception("Browser not initialized. Please login first.")
+        if not queries:
+            return {
+                'success': False,
+                'error': 'At least one search term or URL is required'
+            }
+
+        try:
+            fieldnames = AI_FIELDNAMES if use_ai_filtering else BASIC_FIELDNAMES
+            checkpoint = self.start_run({
+                "mode": "multi",
+                "queries": list(queries),
+                "target_count": target_count,
+                "country_filter": list(country_filter or []),
+                "include_country": include_country,
+                "position_filter": list(position_filter or []),
+                "include_position": include_position,
+                "extract_profile_data": extract_profile_data,
+                "use_ai_filtering": use_ai_filtering,
+                "base_prompt": base_prompt
+            }, fieldnames, use_ai_filtering, resume)
+
+            fan_out = QueryFanOut(self, queries, target_count, checkpoint, filters={
+                "country_filter": country_filter,
+                "include_country": include_country,
+                "position_filter": position_filter,
+                "include_position": include_position
+            })
+            # The search terms double as keywords of the lexical pre-filter
+            keywords = [query for query in queries if not is_search_url(query)] if use_ai_filtering else None
+            pipeline_stats = self.run_pipeline(
+                checkpoint, target_count, None,
+                use_ai_filtering and extract_profile_data, base_prompt, keywords, refresh,
+                visit_profiles=extract_profile_data, fan_out=fan_out
+            )
+
+            self.check_cancelled()
+
+            count = self.finish_run(checkpoint, only_matches=use_ai_filtering)
+            filename = checkpoint.filename
+
+            print(f"✅ Finished. Saved {count} leads from {len(queries)} searches to {filename}")
+            self.wait_stats.print_summary()
+            browser_stats.print_summary()
+
+            return {
+                'success': True,
+                'filename': filename,
+                'count': count,
+                'query_stats': fan_out.summary(),
+                'cache_stats': dict(self.cache_stats),
+                'prefilter_stats': dict(self.prefilter_stats),
+                'dedupe_stats': dict(self.dedupe_stats),
+                'pipeline_stats': pipeline_stats,
+                'browser_stats': browser_stats.summary(),
+                'wait_stats': self.wait_stats.summary(),
+                'message': f'Successfully extracted {count} leads from {len(queries)} searches'
+            }
+
+        except Exception as e:
+            print(f"❌ Error during multi-search lead extraction: {e}")
+            return {
+                'success': False,
+                'error': f'Error during multi-search lead extraction: {str(e)}'
+            }
+
     def extract_leads_old_method(self):
         """
         Old method using scrolling approach (kept for reference)
@@ -755,48 +1283,83 @@ class LeadExtractor:
                 'error': str(e)
             }
 
+def parse_json_reply(content):
+    """
+    Parse a JSON answer, tolerating a surrounding markdown code fence
+    """
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else ""
+        content = content.rsplit("```", 1)[0]
+    return json.loads(content)
+
+def validate_verdict(item):
+    """
+    Normalized {match, reason, score} of one batch answer item, or None if it is malformed
+    """
+    match = str(item.get("match", "")).strip().upper()
+    if match not in ("YES", "NO"):
+        return None
+    try:
+        score = float(item.get("score"))
+    except (TypeError, ValueError):
+        return None
+    if not 0.0 <= score <= 1.0:
+        return None
+    return {
+        "match": match,
+        "reason": str(item.get("reason") or "").strip(),
+        "score": score
+    }
+
+def parse_csv_file(filepath):
+    """
+    Parse an export CSV into typed rows
+    """
+    data = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            # Handle both old and new CSV formats
+            if 'LinkedIn Profile URL' in row:
+                # Old format - convert to new format
+                data.append({
+                    'url': row['LinkedIn Profile URL'],
+                    'first_name': '',
+                    'last_name': '',
+                    'headline': '',
+                    'about': '',
+                    'match': 'NO',
+                    'reason': '',
+                    'score': 0.0
+                })
+            else:
+                # New format - check if AI columns exist
+                profile_data = {
+                    'url': row.get('url', ''),
+                    'first_name': row.get('first_name', ''),
+                    'last_name': row.get('last_name', ''),
+                    'headline': row.get('headline', ''),
+                    'about': row.get('about', ''),
+                }
+
+                # Only add AI columns if they exist in the CSV
+                if 'match' in row:
+                    profile_data['match'] = row.get('match', 'NO')
+                if 'reason' in row:
+                    profile_data['reason'] = row.get('reason', '')
+                if 'score' in row:
+                    profile_data['score'] = float(row.get('score', 0.0)) if row.get('score') else 0.0
+
+                data.append(profile_data)
+    return data
+
 def read_csv_data(filename):
     """
     Read CSV data from the exports directory
     """
-    data = []
     try:
-        filepath = os.path.join("static", "exports", filename)
-        with open(filepath, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Handle both old and new CSV formats
-                if 'LinkedIn Profile URL' in row:
-                    # Old format - convert to new format
-                    data.append({
-                        'url': row['LinkedIn Profile URL'],
-                        'first_name': '',
-                        'last_name': '',
-                        'headline': '',
-                        'about': '',
-                        'match': 'NO',
-                        'reason': '',
-                        'score': 0.0
-                    })
-                else:
-                    # New format - check if AI columns exist
-                    profile_data = {
-                        'url': row.get('url', ''),
-                        'first_name': row.get('first_name', ''),
-                        'last_name': row.get('last_name', ''),
-                        'headline': row.get('headline', ''),
-                        'about': row.get('about', ''),
-                    }
-                    
-                    # Only add AI columns if they exist in the CSV
-                    if 'match' in row:
-                        profile_data['match'] = row.get('match', 'NO')
-                    if 'reason' in row:
-                        profile_data['reason'] = row.get('reason', '')
-                    if 'score' in row:
-                        profile_data['score'] = float(row.get('score', 0.0)) if row.get('score') else 0.0
-                    
-                    data.append(profile_data)
+        return parse_csv_file(os.path.join("static", "exports", filename))
     except Exception as e:
         print(f"Error reading CSV: {str(e)}")
-    return data 
\ No newline at end of file
+        return []
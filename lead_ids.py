@@ -0,0 +1,25 @@
+import re
+from urllib.parse import urlsplit
+
+# /sales/lead/<member id>,<search type>,<session token>  or  /sales/people/<member id>,...
+SALES_LEAD_RE = re.compile(r"/sales/(?:lead|people)/([^,/?#]+)")
+# /in/<public slug>
+PUBLIC_PROFILE_RE = re.compile(r"/in/([^/?#]+)")
+
+def canonical_lead_id(url):
+    """
+    Reduce a LinkedIn / Sales Navigator profile URL to a stable lead ID.
+
+    The search type, session token and query parameters of Sales Navigator
+    links change between searches, only the member ID identifies the person.
+    """
+    if not url:
+        return ""
+    path = urlsplit(url.strip()).path
+    match = SALES_LEAD_RE.search(path)
+    if match:
+        return f"sales:{match.group(1)}"
+    match = PUBLIC_PROFILE_RE.search(path)
+    if match:
+        return f"in:{match.group(1).lower()}"
+    return url.strip().split("?")[0].split("#")[0].rstrip("/")
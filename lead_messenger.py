@@ -0,0 +1,121 @@
+import os
+import time
+from selenium.webdriver.common.by import By
+from page_waits import PageWaiter, WaitStats
+from launch_profiles import browser_stats
+
+# Seconds between two sent messages
+MESSAGE_PACE_SECONDS = float(os.getenv('MESSAGE_PACE_SECONDS', 10))
+
+MESSAGE_BUTTON_CLASS = "_message-cta_1xow7n"
+SUBJECT_FIELD_CLASS = "_subject-field_jrrmou"
+MESSAGE_FIELD_XPATH = "/html/body/div[8]/section/div[2]/section/form[1]/fieldset[1]/div/div8"
+SEND_BUTTON_XPATH = "/html/body/div[8]/section/div[2]/section/form[1]/fieldset[2]/section/div/button[2]"
+
+class LeadMessenger:
+    """
+    Works through a queued campaign of the MessageQueue with the logged in browser
+    """
+    def __init__(self, driver, queue, progress_callback=None, cancel_event=None):
+        self.driver = driver
+        self.queue = queue
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self.wait_stats = WaitStats()
+        self.waiter = PageWaiter(driver, self.wait_stats)
+
+    def is_cancelled(self):
+        return bool(self.cancel_event and self.cancel_event.is_set())
+
+    def report_progress(self, campaign_id):
+        if self.progress_callback:
+            self.progress_callback(self.queue.counts(campaign_id))
+
+    def send_message(self, url, subject, message):
+        """
+        Open the lead and send the message. Raises if the message could not be sent;
+        once the send button is clicked the message counts as sent.
+        """
+        browser_stats.timed_get(self.driver, url)
+        message_button = self.waiter.element_clickable(By.CLASS_NAME, MESSAGE_BUTTON_CLASS, timeout=10, name="message button")
+        if not message_button:
+            raise Exception("Message button not found")
+        message_button.click()
+
+        subject_field = self.waiter.element_present(By.CLASS_NAME, SUBJECT_FIELD_CLASS, timeout=10, name="subject field")
+        if not subject_field:
+            raise Exception("Message composer did not open")
+        subject_field.send_keys(subject)
+        message_field = self.driver.find_element(By.XPATH, MESSAGE_FIELD_XPATH)
+        message_field.send_keys(message)
+        send_button = self.driver.find_element(By.XPATH, SEND_BUTTON_XPATH)
+        send_button.click()
+
+        # The composer is replaced once the message went out
+        self.waiter.staleness_of(send_button, timeout=5, name="message sent")
+
+    def pause(self, seconds):
+        """
+        Wait between two messages, returns early when the campaign is cancelled
+        """
+        if self.cancel_event:
+            self.cancel_event.wait(seconds)
+        else:
+            time.sleep(seconds)
+
+    def run_campaign(self, campaign_id):
+        """
+        Send the pending messages of a campaign at its pace. Safe to call again after
+        a restart: sent leads stay sent and interrupted sends are never retried.
+        """
+        campaign = self.queue.get_campaign(campaign_id)
+        if not campaign:
+            return {'success': False, 'error': 'Campaign not found'}
+
+        interrupted = self.queue.recover_interrupted(campaign_id)
+        if interrupted:
+            print(f"⚠️ {interrupted} messages were interrupted while sending and will not be retried")
+        self.queue.set_campaign_status(campaign_id, "running")
+        self.report_progress(campaign_id)
+
+        attempted = False
+        while True:
+            if self.is_cancelled():
+                self.queue.set_campaign_status(campaign_id, "paused")
+                print(f"⏸️ Campaign {campaign_id} paused")
+                break
+
+            lead = self.queue.next_pending(campaign_id)
+            if not lead:
+                self.queue.set_campaign_status(campaign_id, "completed")
+                break
+
+            # Pace the sends, before claiming so a pause never leaves a lead half-sent
+            if attempted:
+                self.pause(campaign["pace_seconds"])
+                if self.is_cancelled():
+                    continue
+
+            if not self.queue.claim(campaign_id, lead["lead_id"]):
+                print(f"⏭️ Skipping {lead['url']}, it was already messaged")
+                self.report_progress(campaign_id)
+                continue
+
+            attempted = True
+            try:
+                self.send_message(lead["url"], campaign["subject"], campaign["message"])
+                self.queue.mark(campaign_id, lead["lead_id"], "sent")
+                print(f"✉️ Message sent to {lead['url']}")
+            except Exception as e:
+                self.queue.mark(campaign_id, lead["lead_id"], "failed", str(e))
+                print(f"Failed to message {lead['url']}: {e}")
+            self.report_progress(campaign_id)
+
+        counts = self.queue.counts(campaign_id)
+        self.wait_stats.print_summary()
+        return {
+            'success': True,
+            'campaign_id': campaign_id,
+            'counts': counts,
+            'message': f"Sent {counts['sent']} messages, {counts['failed']} failed, {counts['skipped']} skipped, {counts['pending']} pending"
+        }
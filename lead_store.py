@@ -0,0 +1,353 @@
+import os
+import io
+import csv
+import json
+import time
+import sqlite3
+import threading
+from lead_ids import canonical_lead_id
+from run_checkpoint import EXPORTS_DIR, AI_FIELDNAMES, BASIC_FIELDNAMES, build_row
+
+LEAD_STORE_PATH = os.getenv('LEAD_STORE_PATH', os.path.join('cache', 'leads.db'))
+
+# Columns a query may project
+LEAD_COLUMNS = ("url", "first_name", "last_name", "headline", "about", "match", "reason", "score")
+
+class LeadStore:
+    """
+    Indexed SQLite store of every lead of every run. Export CSVs are imported into it
+    and generated back from it on demand.
+    """
+    def __init__(self, path=LEAD_STORE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        # Run stats are computed once per version of the run's data
+        self.stats_cache = {}
+        # Bumped on every change of a run, stats computed against an older generation are not kept
+        self.stats_generations = {}
+        # IDs of leads whose profile was scraped, loaded on first use
+        self.scraped_ids = None
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shared by request and job threads, access is serialized through self.lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                has_ai INTEGER NOT NULL DEFAULT 0,
+                params TEXT,
+                file_mtime REAL,
+                file_size INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS leads (
+                lead_id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                first_name TEXT,
+                last_name TEXT,
+                headline TEXT,
+                about TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS run_leads (
+                run_id TEXT NOT NULL,
+                lead_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                match TEXT,
+                reason TEXT,
+                score REAL,
+                PRIMARY KEY (run_id, lead_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_run_leads_lead ON run_leads (lead_id);
+            CREATE INDEX IF NOT EXISTS idx_run_leads_run_score ON run_leads (run_id, score DESC);
+            CREATE INDEX IF NOT EXISTS idx_run_leads_score ON run_leads (score DESC);
+            CREATE INDEX IF NOT EXISTS idx_run_leads_match ON run_leads (match, score DESC);
+            CREATE INDEX IF NOT EXISTS idx_run_leads_run_position ON run_leads (run_id, position);
+        """)
+        self.conn.commit()
+
+    # --- writes
+
+    def start_run(self, run_id, has_ai, params=None):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, created_at, has_ai, params) VALUES (?, ?, ?, ?)",
+                (run_id, time.time(), int(bool(has_ai)), json.dumps(params or {}))
+            )
+            self.conn.commit()
+
+    def _upsert(self, run_id, profile, position):
+        lead_id = canonical_lead_id(profile.get("url", ""))
+        if not lead_id:
+            return
+        self.conn.execute("""
+            INSERT INTO leads (lead_id, url, first_name, last_name, headline, about, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (lead_id) DO UPDATE SET
+                url = COALESCE(NULLIF(leads.url, ''), excluded.url),
+                first_name = COALESCE(NULLIF(excluded.first_name, ''), leads.first_name),
+                last_name = COALESCE(NULLIF(excluded.last_name, ''), leads.last_name),
+                headline = COALESCE(NULLIF(excluded.headline, ''), leads.headline),
+                about = COALESCE(NULLIF(excluded.about, ''), leads.about),
+                updated_at = excluded.updated_at
+        """, (lead_id, profile.get("url", ""), profile.get("first_name", ""), profile.get("last_name", ""),
+              profile.get("headline", ""), profile.get("about", ""), time.time()))
+        score = profile.get("score")
+        self.conn.execute("""
+            INSERT OR REPLACE INTO run_leads (run_id, lead_id, position, match, reason, score)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (run_id, lead_id, position, profile.get("match"), profile.get("reason"),
+              float(score) if score not in (None, "") else None))
+        if self.scraped_ids is not None and (profile.get("headline") or profile.get("about")):
+            self.scraped_ids.add(lead_id)
+
+    def add_lead(self, run_id, profile):
+        """
+        Record one finished lead of a run as soon as it is available
+        """
+        with self.lock:
+            position = self.conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM run_leads WHERE run_id = ?", (run_id,)
+            ).fetchone()[0]
+            self._upsert(run_id, profile, position)
+            self.conn.commit()
+            self._invalidate_stats(run_id)
+
+    def import_csv(self, filename):
+        """
+        (Re)load a run from its export CSV, replacing whatever the store had for it
+        """
+        # Imported here to avoid a circular import with lead_extractor
+        from lead_extractor import read_csv_data
+
+        filepath = os.path.join(EXPORTS_DIR, filename)
+        stat = os.stat(filepath)
+        rows = read_csv_data(filename)
+        has_ai = bool(rows) and "match" in rows[0]
+        with self.lock:
+            self.conn.execute("DELETE FROM run_leads WHERE run_id = ?", (filename,))
+            self.conn.execute("""
+                INSERT INTO runs (run_id, created_at, has_ai, file_mtime, file_size) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (run_id) DO UPDATE SET
+                    has_ai = excluded.has_ai, file_mtime = excluded.file_mtime, file_size = excluded.file_size
+            """, (filename, stat.st_mtime, int(has_ai), stat.st_mtime, stat.st_size))
+            for position, row in enumerate(rows):
+                self._upsert(filename, row, position)
+            self.conn.commit()
+            self._invalidate_stats(filename)
+        print(f"🗄️ Imported {len(rows)} leads from {filename}")
+        return len(rows)
+
+    def _invalidate_stats(self, run_id):
+        self.stats_generations[run_id] = self.stats_generations.get(run_id, 0) + 1
+        for key in [key for key in self.stats_cache if key[0] == run_id]:
+            del self.stats_cache[key]
+
+    def ensure_run(self, filename):
+        """
+        Make sure a run is in the store and up to date with its export file.
+        Returns False if neither exists.
+        """
+        filepath = os.path.join(EXPORTS_DIR, filename)
+        with self.lock:
+            run = self.conn.execute(
+                "SELECT file_mtime, file_size FROM runs WHERE run_id = ?", (filename,)
+            ).fetchone()
+        if not os.path.exists(filepath):
+            return run is not None
+        stat = os.stat(filepath)
+        if run is None or run["file_mtime"] != stat.st_mtime or run["file_size"] != stat.st_size:
+            self.import_csv(filename)
+        return True
+
+    def import_exports_dir(self):
+        """
+        Import every export CSV that is new or changed since the last import
+        """
+        if not os.path.isdir(EXPORTS_DIR):
+            return 0
+        imported = 0
+        for filename in sorted(os.listdir(EXPORTS_DIR)):
+            if filename.endswith(".csv"):
+                try:
+                    self.ensure_run(filename)
+                    imported += 1
+                except Exception as e:
+                    print(f"⚠️ Could not import {filename}: {e}")
+        return imported
+
+    # --- reads
+
+    def _where(self, run_id=None, match=None, min_score=None, max_score=None, text=None, exclusive_min=False):
+        clauses, args = [], []
+        if run_id:
+            clauses.append("rl.run_id = ?")
+            args.append(run_id)
+        if match:
+            clauses.append("UPPER(rl.match) = ?")
+            args.append(match.upper())
+        if min_score is not None:
+            clauses.append("COALESCE(rl.score, 0) > ?" if exclusive_min else "COALESCE(rl.score, 0) >= ?")
+            args.append(float(min_score))
+        if max_score is not None:
+            clauses.append("COALESCE(rl.score, 0) <= ?")
+            args.append(float(max_score))
+        if text:
+            clauses.append("(l.first_name LIKE ? OR l.last_name LIKE ? OR l.headline LIKE ? OR l.about LIKE ? OR rl.reason LIKE ?)")
+            args.extend([f"%{text}%"] * 5)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def query_leads(self, run_id=None, match=None, min_score=None, max_score=None, text=None,
+                    sort="position", descending=False, offset=0, limit=None, fields=None, exclusive_min=False,
+                    text_limit=None):
+        """
+        Return lead dicts shaped like read_csv_data rows; AI columns are omitted for runs without them.
+        With text_limit, headline, about and reason are cut to text_limit + 1 characters so
+        callers can tell a preview was truncated without receiving the full text.
+        """
+        sort_columns = {"position": "rl.position", "score": "COALESCE(rl.score, 0)", "name": "l.last_name"}
+        order = sort_columns.get(sort, "rl.position") + (" DESC" if descending else " ASC")
+        where, args = self._where(run_id, match, min_score, max_score, text, exclusive_min)
+        if text_limit is not None:
+            cut = int(text_limit) + 1
+            text_columns = f"SUBSTR(l.headline, 1, {cut}) AS headline, SUBSTR(l.about, 1, {cut}) AS about, SUBSTR(rl.reason, 1, {cut}) AS reason"
+        else:
+            text_columns = "l.headline, l.about, rl.reason"
+        sql = f"""
+            SELECT l.url, l.first_name, l.last_name, {text_columns},
+                   rl.match, rl.score, r.has_ai
+            FROM run_leads rl
+            JOIN leads l ON l.lead_id = rl.lead_id
+            JOIN runs r ON r.run_id = rl.run_id
+            {where}
+            ORDER BY {order}, rl.position ASC
+        """
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            args.extend([int(limit), int(offset)])
+        with self.lock:
+            rows = self.conn.execute(sql, args).fetchall()
+
+        wanted = [f for f in (fields or LEAD_COLUMNS) if f in LEAD_COLUMNS]
+        leads = []
+        for row in rows:
+            lead = {}
+            for field in wanted:
+                if field in ("match", "reason", "score") and not row["has_ai"]:
+                    continue
+                value = row[field]
+                if field == "score":
+                    value = float(value or 0.0)
+                lead[field] = value if value is not None else ""
+            leads.append(lead)
+        return leads
+
+    def count_leads(self, run_id=None, match=None, min_score=None, max_score=None, text=None, exclusive_min=False):
+        """
+        Number of leads query_leads would return without offset/limit
+        """
+        where, args = self._where(run_id, match, min_score, max_score, text, exclusive_min)
+        with self.lock:
+            return self.conn.execute(f"""
+                SELECT COUNT(*) FROM run_leads rl
+                JOIN leads l ON l.lead_id = rl.lead_id
+                {where}
+            """, args).fetchone()[0]
+
+    def lead_texts(self, run_id=None):
+        """
+        Lead ID, name, URL and profile text of every lead (of one run, or of all runs)
+        """
+        if run_id:
+            sql = """
+                SELECT l.lead_id, l.url, l.first_name, l.last_name, l.headline, l.about
+                FROM run_leads rl JOIN leads l ON l.lead_id = rl.lead_id
+                WHERE rl.run_id = ? ORDER BY rl.position
+            """
+            args = (run_id,)
+        else:
+            sql = "SELECT lead_id, url, first_name, last_name, headline, about FROM leads"
+            args = ()
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, args).fetchall()]
+
+    def is_scraped(self, lead_id):
+        """
+        Whether a profile with this lead ID was already scraped in any run
+        """
+        with self.lock:
+            if self.scraped_ids is None:
+                self.scraped_ids = {row[0] for row in self.conn.execute(
+                    "SELECT lead_id FROM leads WHERE COALESCE(headline, '') != '' OR COALESCE(about, '') != ''"
+                )}
+            return lead_id in self.scraped_ids
+
+    def get_profiles(self, lead_ids):
+        """
+        Stored profile data by lead ID
+        """
+        lead_ids = list(lead_ids)
+        profiles = {}
+        with self.lock:
+            for start in range(0, len(lead_ids), 500):
+                chunk = lead_ids[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT lead_id, url, first_name, last_name, headline, about FROM leads WHERE lead_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for row in rows:
+                    profiles[row["lead_id"]] = {field: row[field] or "" for field in ("url", "first_name", "last_name", "headline", "about")}
+        return profiles
+
+    def run_has_ai(self, run_id):
+        with self.lock:
+            run = self.conn.execute("SELECT has_ai FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return bool(run and run["has_ai"])
+
+    def run_stats(self, run_id, min_score=None, hot_score=0.7, exclusive_min=False):
+        """
+        Total, matches and hot leads of a run computed in SQL
+        """
+        cache_key = (run_id, min_score, hot_score, exclusive_min)
+        with self.lock:
+            cached = self.stats_cache.get(cache_key)
+            generation = self.stats_generations.get(run_id, 0)
+        if cached:
+            return dict(cached)
+
+        where, args = self._where(run_id, min_score=min_score, exclusive_min=exclusive_min)
+        with self.lock:
+            row = self.conn.execute(f"""
+                SELECT COUNT(*) AS total,
+                       SUM(CASE WHEN UPPER(rl.match) = 'YES' THEN 1 ELSE 0 END) AS match_yes,
+                       SUM(CASE WHEN COALESCE(rl.score, 0) >= ? THEN 1 ELSE 0 END) AS hot
+                FROM run_leads rl
+                JOIN leads l ON l.lead_id = rl.lead_id
+                {where}
+            """, [hot_score] + args).fetchone()
+        total = row["total"] or 0
+        match_yes = row["match_yes"] or 0
+        stats = {
+            "total": total,
+            "match_yes": match_yes,
+            "success_rate": (match_yes / total * 100) if total > 0 else 0,
+            "hot_leads_count": row["hot"] or 0
+        }
+        with self.lock:
+            # An add_lead or import since the query means these stats are already stale
+            if self.stats_generations.get(run_id, 0) == generation:
+                self.stats_cache[cache_key] = stats
+        return dict(stats)
+
+    def export_csv(self, run_id):
+        """
+        Generate the CSV export of a run
+        """
+        fieldnames = AI_FIELDNAMES if self.run_has_ai(run_id) else BASIC_FIELDNAMES
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=fieldnames)
+        writer.writeheader()
+        for lead in self.query_leads(run_id=run_id):
+            writer.writerow(build_row(lead, fieldnames))
+        return output.getvalue()
@@ -0,0 +1,78 @@
+import os
+import re
+
+# Profiles scoring below this are rejected without a GPT request, 0 disables the pre-filter
+LEXICAL_PREFILTER_THRESHOLD = float(os.getenv('LEXICAL_PREFILTER_THRESHOLD', 0.1))
+
+# Matched term weight at which a profile counts as fully relevant
+SATURATION_WEIGHT = 3.0
+KEYWORD_WEIGHT = 2.0
+PROMPT_WEIGHT = 1.0
+
+TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Common English words plus the boilerplate of a target description ("we are looking for companies ...")
+STOPWORDS = set("""
+a about above after again all also an and any are as at be been being below between both but by can
+could did do does doing down during each esp especially etc few for from further had has have having
+he her here hers him his how i if in into is it its itself just like looking may me more most my no
+nor not of off on once only or other our ours out over own per related same she should so some such
+than that the their theirs them then there these they this those through to too under until up very
+was we were what when where which while who whom why will with within would you your yours
+company companies professional professionals people person persons someone client clients target
+involved working work works find finding want wants need needs
+""".split())
+
+def stem(token):
+    """
+    Crude suffix stripping so "coatings", "coated" and "coating" meet
+    """
+    for suffix in ("ings", "ing", "ies", "ers", "er", "ed", "s"):
+        if len(token) - len(suffix) >= 3 and token.endswith(suffix):
+            return token[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return token
+
+def tokenize(text):
+    return [stem(token) for token in TOKEN_RE.findall((text or "").lower())
+            if token not in STOPWORDS and len(token) > 1 and not token.isdigit()]
+
+class LexicalPrefilter:
+    """
+    Cheap local relevance check of a profile against the target description and search keywords.
+    Only profiles with no meaningful overlap are rejected, everything else still goes to GPT.
+    """
+    def __init__(self, target_description, keywords=None, threshold=LEXICAL_PREFILTER_THRESHOLD):
+        self.threshold = threshold
+        self.weights = {}
+        for token in tokenize(target_description):
+            self.weights[token] = PROMPT_WEIGHT
+        # Multi-word keywords also match as a phrase
+        self.phrases = []
+        for keyword in keywords or []:
+            tokens = tokenize(keyword)
+            for token in tokens:
+                self.weights[token] = KEYWORD_WEIGHT
+            if len(tokens) > 1:
+                self.phrases.append(tokens)
+
+    def score(self, profile_data):
+        """
+        Relevance between 0 and 1 from the weighted query terms found in headline and about
+        """
+        tokens = tokenize(f"{profile_data.get('headline', '')} {profile_data.get('about', '')}")
+        if not tokens:
+            return 0.0
+        present = set(tokens)
+        matched = sum(weight for token, weight in self.weights.items() if token in present)
+        joined = f" {' '.join(tokens)} "
+        matched += sum(KEYWORD_WEIGHT for phrase in self.phrases if f" {' '.join(phrase)} " in joined)
+        return min(1.0, matched / SATURATION_WEIGHT)
+
+    def check(self, profile_data):
+        """
+        Returns (passed, relevance)
+        """
+        if not self.weights:
+            return True, 1.0
+        relevance = self.score(profile_data)
+        return relevance >= self.threshold, relevance
@@ -1,26 +1,188 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import os
+import json
 import time
+from werkzeug.security import generate_password_hash, check_password_hash
+from launch_profiles import create_chrome, CHROME_LAUNCH_PROFILE
+
+# Authenticated state (cookies and local storage) saved after a successful login
+LINKEDIN_SESSION_PATH = os.getenv('LINKEDIN_SESSION_PATH', os.path.join('cache', 'linkedin_session.json'))
+LINKEDIN_SESSION_MAX_AGE_DAYS = float(os.getenv('LINKEDIN_SESSION_MAX_AGE_DAYS', 14))
+
+# Lightweight LinkedIn page used to get onto the domain before cookies can be set
+SESSION_BOOTSTRAP_URL = "https://www.linkedin.com/robots.txt"
+
+# Ask the API who we are: 200 means the session cookies are still accepted
+SESSION_PROBE_JS = """
+const done = arguments[arguments.length - 1];
+const csrf = document.cookie.match(/JSESSIONID="?([^";]+)"?/);
+fetch('/voyager/api/me', {credentials: 'include', headers: {'csrf-token': csrf ? csrf[1] : ''}})
+    .then(response => done(response.status))
+    .catch(() => done(0));
+"""
 
 class LinkedInLogin:
-    def __init__(self):
+    def __init__(self, launch_profile=CHROME_LAUNCH_PROFILE, session_path=LINKEDIN_SESSION_PATH):
         self.driver = None
+        self.launch_profile = launch_profile
+        self.session_path = session_path
+        self.email = None
+        # Hash of the password of the current login, saved with the session to guard its reuse
+        self.password_hash = None
+
+    def create_driver(self, launch_profile=None):
+        return create_chrome(launch_profile or self.launch_profile)
 
     def setup_browser(self):
         if self.driver is None:
-            options = Options()
-            options.add_argument("--enable-javascript")
-            options.add_argument("--enable-cookies")
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option('useAutomationExtension', False)
-            options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36")
-            
-            self.driver = webdriver.Chrome()
+            self.driver = self.create_driver()
         return self.driver
 
+    def capture_session(self, driver=None):
+        """
+        Cookies and local storage of the current LinkedIn page
+        """
+        driver = driver or self.driver
+        return {
+            "cookies": driver.get_cookies(),
+            "local_storage": driver.execute_script("return Object.entries(window.localStorage);") or []
+        }
+
+    def apply_session(self, driver, state):
+        """
+        Load an authenticated state into a browser
+        """
+        # Cookies can only be set for the domain currently loaded
+        driver.get(SESSION_BOOTSTRAP_URL)
+        for cookie in state.get("cookies", []):
+            cookie = dict(cookie)
+            cookie.pop('sameSite', None)
+            if "expiry" in cookie:
+                cookie["expiry"] = int(cookie["expiry"])
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                print(f"⚠️ Could not copy cookie {cookie.get('name')}: {e}")
+        if state.get("local_storage"):
+            driver.execute_script(
+                "for (const [key, value] of arguments[0]) { window.localStorage.setItem(key, value); }",
+                state["local_storage"]
+            )
+
+    def clone_session(self, launch_profile=None):
+        """
+        Start an extra Chrome session authenticated with the cookies of the logged in one
+        """
+        if not self.driver:
+            raise Exception("Browser not initialized. Please login first.")
+        state = self.capture_session()
+        driver = self.create_driver(launch_profile)
+        try:
+            self.apply_session(driver, state)
+            return driver
+        except Exception:
+            driver.quit()
+            raise
+
+    def save_session(self):
+        """
+        Persist the authenticated state so the next start can skip the login
+        """
+        try:
+            state = self.capture_session()
+            state.update({"saved_at": time.time(), "email": self.email, "password_hash": self.password_hash})
+            if os.path.dirname(self.session_path):
+                os.makedirs(os.path.dirname(self.session_path), exist_ok=True)
+            tmp_path = self.session_path + ".tmp"
+            # Session cookies are credentials, keep the file private
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.session_path)
+            print(f"🔐 Saved LinkedIn session ({len(state['cookies'])} cookies)")
+        except Exception as e:
+            print(f"⚠️ Could not save LinkedIn session: {e}")
+
+    def load_saved_session(self, email=None):
+        """
+        The saved state, unless it is missing, too old or belongs to another account
+        """
+        if not os.path.exists(self.session_path):
+            return None
+        try:
+            with open(self.session_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable saved session: {e}")
+            return None
+        if time.time() - state.get("saved_at", 0) > LINKEDIN_SESSION_MAX_AGE_DAYS * 86400:
+            print("⌛ Saved LinkedIn session is too old")
+            return None
+        if email and state.get("email") and state["email"].lower() != email.lower():
+            return None
+        return state
+
+    def has_saved_session(self):
+        return self.load_saved_session() is not None
+
+    def load_session_for(self, email, password):
+        """
+        The saved state if email and password match the login that saved it, None otherwise
+        """
+        state = self.load_saved_session(email)
+        if not state or not email or not password or not state.get("email") or not state.get("password_hash"):
+            return None
+        if not check_password_hash(state["password_hash"], password):
+            print("🔐 Password does not match the saved session")
+            return None
+        return state
+
+    def forget_session(self):
+        if os.path.exists(self.session_path):
+            os.remove(self.session_path)
+            print("🗑️ Removed saved LinkedIn session")
+
+    def is_session_valid(self, driver=None):
+        """
+        Cheap probe of the LinkedIn API with the current cookies (page must be on www.linkedin.com)
+        """
+        driver = driver or self.driver
+        try:
+            driver.set_script_timeout(10)
+            status = driver.execute_async_script(SESSION_PROBE_JS)
+        except Exception as e:
+            print(f"⚠️ Session probe failed: {e}")
+            return False
+        print(f"🔎 Session probe answered {status}")
+        return status == 200
+
+    def restore_session(self, email, password):
+        """
+        Start (or reuse) the browser with the saved authenticated state of this account.
+        Returns True if the credentials match and the session is still valid.
+        """
+        state = self.load_session_for(email, password)
+        if not state:
+            return False
+        started = time.time()
+        try:
+            self.driver = self.setup_browser()
+            self.apply_session(self.driver, state)
+            valid = self.is_session_valid()
+        except Exception as e:
+            print(f"⚠️ Could not restore LinkedIn session: {e}")
+            valid = False
+        if not valid:
+            print("🔐 Saved LinkedIn session is no longer valid, a fresh login is needed")
+            self.forget_session()
+            return False
+        self.email = state.get("email")
+        self.password_hash = state.get("password_hash")
+        print(f"⚡ Restored LinkedIn session in {time.time() - started:.1f}s")
+        return True
+
     def wait_and_find_element(self, by, value, timeout=10):
         return WebDriverWait(self.driver, timeout).until(
             EC.presence_of_element_located((by, value))
@@ -28,7 +190,13 @@ class LinkedInLogin:
 
     def login(self, email, password):
         try:
+            # A saved session of the same account and password skips the login form (and 2FA)
+            if self.restore_session(email, password):
+                return True, "Restored saved session"
+
             # Get or create driver instance
+            self.email = email
+            self.password_hash = generate_password_hash(password)
             self.driver = self.setup_browser()
             self.driver.get("https://www.linkedin.com/login")
             username_field = self.wait_and_find_element(By.ID, "username")
@@ -62,6 +230,8 @@ class LinkedInLogin:
                 print("No Sales Navigator login required or error:", str(e))
 
             time.sleep(3)
+            if self.is_session_valid():
+                self.save_session()
             return True, "Successfully logged in"
         except Exception as e:
             print(f"Login error: {str(e)}")
@@ -75,6 +245,11 @@ class LinkedInLogin:
             submit_btn = self.driver.find_element(By.CLASS_NAME, "form__submit")
             submit_btn.click()
             time.sleep(3)
+            # Only a finished challenge leaves a session worth saving
+            if self.is_session_valid():
+                self.save_session()
+            else:
+                print("⚠️ Login not confirmed after 2FA, session not saved")
             return True, "2FA code submitted. Login should continue."
         except Exception as e:
             print(f"2FA submission error: {str(e)}")
@@ -0,0 +1,213 @@
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from lead_ids import canonical_lead_id
+
+MESSAGE_QUEUE_PATH = os.getenv('MESSAGE_QUEUE_PATH', os.path.join('cache', 'messages.db'))
+
+LEAD_STATUSES = ("pending", "sending", "sent", "failed", "skipped")
+UNFINISHED_CAMPAIGN_STATUSES = ("queued", "running", "paused")
+# Error of leads whose send was interrupted, they count as possibly messaged
+INTERRUPTED_ERROR = "Interrupted while sending, not retried"
+
+class MessageQueue:
+    """
+    Persistent outbox of messaging campaigns with one status row per lead
+    (pending, sending, sent, failed, skipped). A lead marked sent in any
+    campaign is never messaged again.
+    """
+    def __init__(self, path=MESSAGE_QUEUE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shared by request and job threads, access is serialized through self.lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS campaigns (
+                campaign_id TEXT PRIMARY KEY,
+                run_id TEXT,
+                subject TEXT NOT NULL,
+                message TEXT NOT NULL,
+                pace_seconds REAL NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS campaign_leads (
+                campaign_id TEXT NOT NULL,
+                lead_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (campaign_id, lead_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_campaign_leads_status ON campaign_leads (campaign_id, status, position);
+            CREATE INDEX IF NOT EXISTS idx_campaign_leads_lead ON campaign_leads (lead_id, status);
+        """)
+        self.conn.commit()
+
+    def create_campaign(self, run_id, subject, message, urls, pace_seconds):
+        """
+        Queue a campaign for the given lead URLs, duplicates of the same lead are dropped
+        """
+        campaign_id = uuid.uuid4().hex
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO campaigns (campaign_id, run_id, subject, message, pace_seconds, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (campaign_id, run_id, subject, message, float(pace_seconds), now, now)
+            )
+            position = 0
+            for url in urls:
+                lead_id = canonical_lead_id(url)
+                if not lead_id:
+                    continue
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO campaign_leads (campaign_id, lead_id, url, position, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (campaign_id, lead_id, url, position, now)
+                )
+                position += cursor.rowcount
+            self.conn.commit()
+        print(f"📬 Queued campaign {campaign_id} for {position} leads")
+        return campaign_id
+
+    def find_unfinished(self, run_id, subject, message):
+        """
+        The latest unfinished campaign with the same leads and text, so it can be resumed
+        """
+        with self.lock:
+            row = self.conn.execute(f"""
+                SELECT campaign_id FROM campaigns
+                WHERE run_id = ? AND subject = ? AND message = ?
+                  AND status IN ({','.join('?' * len(UNFINISHED_CAMPAIGN_STATUSES))})
+                ORDER BY created_at DESC LIMIT 1
+            """, (run_id, subject, message) + UNFINISHED_CAMPAIGN_STATUSES).fetchone()
+        return row["campaign_id"] if row else None
+
+    def get_campaign(self, campaign_id):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM campaigns WHERE campaign_id = ?", (campaign_id,)).fetchone()
+        return dict(row) if row else None
+
+    def latest_campaign(self, run_id=None):
+        with self.lock:
+            if run_id:
+                row = self.conn.execute(
+                    "SELECT campaign_id FROM campaigns WHERE run_id = ? ORDER BY created_at DESC LIMIT 1", (run_id,)
+                ).fetchone()
+            else:
+                row = self.conn.execute("SELECT campaign_id FROM campaigns ORDER BY created_at DESC LIMIT 1").fetchone()
+        return row["campaign_id"] if row else None
+
+    def set_campaign_status(self, campaign_id, status):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE campaigns SET status = ?, updated_at = ? WHERE campaign_id = ?",
+                (status, time.time(), campaign_id)
+            )
+            self.conn.commit()
+
+    def recover_interrupted(self, campaign_id):
+        """
+        A lead left in 'sending' may or may not have received the message before the
+        process stopped. It is marked failed rather than retried, to never send twice.
+        """
+        with self.lock:
+            cursor = self.conn.execute("""
+                UPDATE campaign_leads SET status = 'failed', error = ?, updated_at = ?
+                WHERE campaign_id = ? AND status = 'sending'
+            """, (INTERRUPTED_ERROR, time.time(), campaign_id))
+            self.conn.commit()
+        return cursor.rowcount
+
+    def next_pending(self, campaign_id):
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT lead_id, url FROM campaign_leads
+                WHERE campaign_id = ? AND status = 'pending'
+                ORDER BY position LIMIT 1
+            """, (campaign_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim(self, campaign_id, lead_id):
+        """
+        Move a pending lead to 'sending' unless another campaign already reached it.
+        Returns False (and marks the lead skipped) if it was messaged before.
+        """
+        now = time.time()
+        with self.lock:
+            already = self.conn.execute("""
+                SELECT 1 FROM campaign_leads
+                WHERE lead_id = ? AND campaign_id != ?
+                  AND (status IN ('sent', 'sending') OR (status = 'failed' AND error = ?))
+                LIMIT 1
+            """, (lead_id, campaign_id, INTERRUPTED_ERROR)).fetchone()
+            if already:
+                self.conn.execute(
+                    "UPDATE campaign_leads SET status = 'skipped', error = 'Already messaged', updated_at = ? WHERE campaign_id = ? AND lead_id = ?",
+                    (now, campaign_id, lead_id)
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE campaign_leads SET status = 'sending', updated_at = ? WHERE campaign_id = ? AND lead_id = ? AND status = 'pending'",
+                    (now, campaign_id, lead_id)
+                )
+            self.conn.commit()
+        return not already
+
+    def mark(self, campaign_id, lead_id, status, error=None):
+        if status not in LEAD_STATUSES:
+            raise ValueError(f"Unknown lead status {status}")
+        with self.lock:
+            self.conn.execute(
+                "UPDATE campaign_leads SET status = ?, error = ?, updated_at = ? WHERE campaign_id = ? AND lead_id = ?",
+                (status, error, time.time(), campaign_id, lead_id)
+            )
+            self.conn.commit()
+
+    def counts(self, campaign_id):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) AS n FROM campaign_leads WHERE campaign_id = ? GROUP BY status", (campaign_id,)
+            ).fetchall()
+        counts = {status: 0 for status in LEAD_STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        counts["total"] = sum(row["n"] for row in rows)
+        return counts
+
+    def campaign_status(self, campaign_id, include_leads=False, failed_limit=50):
+        """
+        Campaign details with per-status counts (and optionally the per-lead statuses)
+        """
+        campaign = self.get_campaign(campaign_id)
+        if not campaign:
+            return None
+        status = {
+            "campaign_id": campaign_id,
+            "run_id": campaign["run_id"],
+            "subject": campaign["subject"],
+            "pace_seconds": campaign["pace_seconds"],
+            "status": campaign["status"],
+            "created_at": campaign["created_at"],
+            "updated_at": campaign["updated_at"],
+            "counts": self.counts(campaign_id)
+        }
+        with self.lock:
+            if include_leads:
+                rows = self.conn.execute(
+                    "SELECT url, status, error, updated_at FROM campaign_leads WHERE campaign_id = ? ORDER BY position", (campaign_id,)
+                ).fetchall()
+                status["leads"] = [dict(row) for row in rows]
+            else:
+                rows = self.conn.execute(
+                    "SELECT url, error FROM campaign_leads WHERE campaign_id = ? AND status = 'failed' ORDER BY position LIMIT ?",
+                    (campaign_id, failed_limit)
+                ).fetchall()
+                status["failed"] = [dict(row) for row in rows]
+        return status
@@ -0,0 +1,132 @@
+import time
+import threading
+from contextlib import contextmanager
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, ProcessCollector, generate_latest, CONTENT_TYPE_LATEST
+
+# Own registry so /metrics only holds the app metrics plus the process collector
+REGISTRY = CollectorRegistry()
+ProcessCollector(registry=REGISTRY)
+
+# Browser stages take seconds, so the buckets reach further than the client defaults
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60, 120)
+AI_BUCKETS = (0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90)
+
+STAGE_SECONDS = Histogram(
+    'sn_stage_seconds', 'Duration of extraction stages',
+    ['stage'], buckets=STAGE_BUCKETS, registry=REGISTRY
+)
+PAGE_LOAD_SECONDS = Histogram(
+    'sn_page_load_seconds', 'driver.get navigation time per Chrome launch profile',
+    ['launch_profile'], buckets=STAGE_BUCKETS, registry=REGISTRY
+)
+WAIT_SECONDS = Histogram(
+    'sn_wait_seconds', 'Readiness waits by name and outcome (ok or timeout)',
+    ['wait', 'outcome'], buckets=STAGE_BUCKETS, registry=REGISTRY
+)
+AI_REQUEST_SECONDS = Histogram(
+    'sn_ai_request_seconds', 'GPT request latency, kind is single or batch',
+    ['kind'], buckets=AI_BUCKETS, registry=REGISTRY
+)
+AI_REQUESTS = Counter(
+    'sn_ai_requests', 'GPT requests by kind and outcome (ok, error, invalid)',
+    ['kind', 'outcome'], registry=REGISTRY
+)
+AI_TOKENS = Counter(
+    'sn_ai_tokens', 'Tokens reported by the OpenAI API, type is prompt or completion',
+    ['kind', 'type'], registry=REGISTRY
+)
+AI_RETRIES = Counter(
+    'sn_ai_retries', 'OpenAI requests retried, reason is rate_limit, server_error or connection',
+    ['reason'], registry=REGISTRY
+)
+AI_CONCURRENCY_LIMIT = Gauge(
+    'sn_ai_concurrency_limit', 'OpenAI requests currently allowed in flight for the last API key used',
+    registry=REGISTRY
+)
+CACHE_LOOKUPS = Counter(
+    'sn_cache_lookups', 'Lookups of the AI score cache, of already scraped profiles and of filter IDs',
+    ['cache', 'result'], registry=REGISTRY
+)
+PREFILTER_PROFILES = Counter(
+    'sn_prefilter_profiles', 'Profiles checked by the lexical pre-filter, result is passed or rejected',
+    ['result'], registry=REGISTRY
+)
+SELECTOR_ERRORS = Counter(
+    'sn_selector_errors', 'Page elements that could not be found, a rising count usually means a DOM change',
+    ['selector'], registry=REGISTRY
+)
+LEADS_RECORDED = Counter(
+    'sn_leads_recorded', 'Leads written to run outputs', registry=REGISTRY
+)
+JOBS_FINISHED = Counter(
+    'sn_jobs_finished', 'Background jobs by kind and final status',
+    ['kind', 'status'], registry=REGISTRY
+)
+HTTP_REQUESTS = Counter(
+    'sn_http_requests', 'Flask requests by route, method and status code',
+    ['endpoint', 'method', 'status'], registry=REGISTRY
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'sn_http_request_seconds', 'Flask request handling time by route',
+    ['endpoint'], registry=REGISTRY
+)
+
+# Raw durations per series while sampling is on (benchmarks need exact percentiles), None otherwise
+samples = None
+samples_lock = threading.Lock()
+
+def start_sampling():
+    global samples
+    with samples_lock:
+        samples = {}
+
+def stop_sampling():
+    """
+    Turn sampling off and return the durations recorded since start_sampling, by series
+    """
+    global samples
+    with samples_lock:
+        taken, samples = samples, None
+    return taken or {}
+
+def observe(histogram, series, seconds, **labels):
+    """
+    Record a duration in a histogram, and under series name while sampling
+    """
+    histogram.labels(**labels).observe(seconds)
+    if samples is not None:
+        with samples_lock:
+            if samples is not None:
+                samples.setdefault(series, []).append(seconds)
+
+@contextmanager
+def timed(histogram, series, **labels):
+    """
+    Time the enclosed block, also when it raises
+    """
+    started = time.time()
+    try:
+        yield
+    finally:
+        observe(histogram, series, time.time() - started, **labels)
+
+def observe_stage(stage):
+    return timed(STAGE_SECONDS, stage, stage=stage)
+
+def record_stage(stage, seconds):
+    observe(STAGE_SECONDS, stage, seconds, stage=stage)
+
+def selector_error(selector):
+    SELECTOR_ERRORS.labels(selector=selector).inc()
+
+def record_ai_usage(kind, response):
+    usage = getattr(response, "usage", None)
+    if usage:
+        AI_TOKENS.labels(kind=kind, type="prompt").inc(usage.prompt_tokens or 0)
+        AI_TOKENS.labels(kind=kind, type="completion").inc(usage.completion_tokens or 0)
+
+def render_metrics():
+    """
+    The metrics in the Prometheus text format, as (body, content type)
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
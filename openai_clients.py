@@ -0,0 +1,256 @@
+import os
+import re
+import time
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+import httpx
+from openai import OpenAI, APIStatusError, APIConnectionError, RateLimitError
+from metrics import AI_RETRIES, AI_CONCURRENCY_LIMIT
+
+# Keep-alive connections per API key, shared by every extractor and request of the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', 20))
+OPENAI_KEEPALIVE_SECONDS = float(os.getenv('OPENAI_KEEPALIVE_SECONDS', 60))
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 120))
+# Attempts of a request that hit a rate limit, a server error or a dropped connection
+OPENAI_MAX_ATTEMPTS = int(os.getenv('OPENAI_MAX_ATTEMPTS', 6))
+OPENAI_BACKOFF_BASE = float(os.getenv('OPENAI_BACKOFF_BASE', 1))
+OPENAI_BACKOFF_MAX = float(os.getenv('OPENAI_BACKOFF_MAX', 60))
+# Retries per minute per API key across all callers, refilled continuously
+OPENAI_RETRY_BUDGET = float(os.getenv('OPENAI_RETRY_BUDGET', 30))
+# Requests in flight per API key, lowered while the rate limit headers report little headroom
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', 8))
+# Share of the request or token budget left below which concurrency is lowered
+RATE_LIMIT_HEADROOM = 0.1
+# API keys with a client kept in the registry, the least recently used one is dropped beyond that
+OPENAI_MAX_CLIENTS = int(os.getenv('OPENAI_MAX_CLIENTS', 8))
+
+# Status codes worth another attempt besides 429
+RETRY_STATUSES = {408, 409, 500, 502, 503, 504}
+
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_duration(value):
+    """
+    Seconds of a rate limit reset header such as "1s", "6m0s" or "20ms", None if absent
+    """
+    parts = DURATION_RE.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+def retry_after(headers):
+    """
+    Seconds the server asked us to wait (retry-after-ms, or Retry-After in seconds or as a date), None if it did not
+    """
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+    except ValueError:
+        pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def header_int(headers, name):
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+def backoff(attempt, base=OPENAI_BACKOFF_BASE, cap=OPENAI_BACKOFF_MAX):
+    """
+    Exponential delay with jitter: half of the step is fixed, the other half random
+    """
+    step = min(cap, base * 2 ** (attempt - 1))
+    return step / 2 + random.uniform(0, step / 2)
+
+class AdaptiveLimiter:
+    """
+    Caps the requests in flight for one API key. The cap is halved on a 429 and while
+    the rate limit headers report little headroom, and grows back by one after a run
+    of successful requests. A Retry-After pauses every request of the key.
+    Retries of all callers draw from one budget that refills over a minute.
+    """
+    def __init__(self, max_concurrency=OPENAI_MAX_CONCURRENCY, retry_budget=OPENAI_RETRY_BUDGET):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self.successes = 0
+        self.paused_until = 0.0
+        self.retry_budget = max(0.0, retry_budget)
+        self.retry_tokens = self.retry_budget
+        self.retry_refilled = time.monotonic()
+        self.condition = threading.Condition()
+        AI_CONCURRENCY_LIMIT.set(self.limit)
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                pause = self.paused_until - time.time()
+                if pause <= 0 and self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                self.condition.wait(timeout=pause if pause > 0 else None)
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def take_retry(self):
+        """
+        Spend one retry of the shared budget, False once it is used up
+        """
+        with self.condition:
+            now = time.monotonic()
+            self.retry_tokens = min(self.retry_budget, self.retry_tokens + (now - self.retry_refilled) * self.retry_budget / 60)
+            self.retry_refilled = now
+            if self.retry_tokens < 1:
+                return False
+            self.retry_tokens -= 1
+            return True
+
+    def set_limit(self, limit, reason):
+        limit = max(1, min(self.max_concurrency, limit))
+        if limit != self.limit:
+            print(f"🚦 OpenAI concurrency {self.limit} -> {limit} ({reason})")
+            self.limit = limit
+            AI_CONCURRENCY_LIMIT.set(limit)
+        self.successes = 0
+
+    def throttle(self, pause):
+        """
+        Back off after a 429: halve the cap and hold every request for pause seconds
+        """
+        with self.condition:
+            self.set_limit(self.limit // 2, "rate limited")
+            self.paused_until = max(self.paused_until, time.time() + pause)
+            self.condition.notify_all()
+
+    def update(self, headers):
+        """
+        Adjust the cap to the x-ratelimit-* headers of a successful response
+        """
+        remaining_requests = header_int(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = header_int(headers, "x-ratelimit-remaining-tokens")
+        limit_requests = header_int(headers, "x-ratelimit-limit-requests")
+        limit_tokens = header_int(headers, "x-ratelimit-limit-tokens")
+        headroom = [
+            remaining / limit
+            for remaining, limit in ((remaining_requests, limit_requests), (remaining_tokens, limit_tokens))
+            if remaining is not None and limit
+        ]
+        with self.condition:
+            if remaining_requests == 0 or remaining_tokens == 0:
+                # Budget used up: wait for the window to reset instead of collecting 429s
+                reset = max(
+                    parse_duration(headers.get("x-ratelimit-reset-requests")) or 0,
+                    parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0
+                )
+                self.paused_until = max(self.paused_until, time.time() + reset)
+                self.set_limit(1, "rate limit budget used up")
+            elif headroom and min(headroom) < RATE_LIMIT_HEADROOM:
+                self.set_limit(self.limit // 2, "rate limit headroom low")
+            elif remaining_requests is not None and remaining_requests < self.limit:
+                self.set_limit(remaining_requests, "few requests left")
+            elif self.limit < self.max_concurrency:
+                self.successes += 1
+                if self.successes >= self.limit:
+                    self.set_limit(self.limit + 1, "rate limit headroom recovered")
+            self.condition.notify_all()
+
+class SharedOpenAIClient:
+    """
+    One OpenAI client per API key with pooled keep-alive connections. Requests go
+    through the adaptive limiter and are retried with backoff on rate limits,
+    server errors and dropped connections.
+    """
+    def __init__(self, api_key, max_attempts=OPENAI_MAX_ATTEMPTS, max_concurrency=OPENAI_MAX_CONCURRENCY):
+        self.http_client = httpx.Client(
+            timeout=OPENAI_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_SECONDS
+            )
+        )
+        # Retries are handled here, where the limiter sees every 429
+        self.client = OpenAI(api_key=api_key, http_client=self.http_client, max_retries=0)
+        self.max_attempts = max(1, max_attempts)
+        self.limiter = AdaptiveLimiter(max_concurrency)
+
+    def chat_completion(self, **params):
+        return self.request(self.client.chat.completions.with_raw_response.create, **params)
+
+    def create_embeddings(self, **params):
+        return self.request(self.client.embeddings.with_raw_response.create, **params)
+
+    def request(self, create, **params):
+        """
+        Call a with_raw_response method of the client and return the parsed response
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            self.limiter.acquire()
+            try:
+                raw = create(**params)
+            except RateLimitError as e:
+                if e.code == "insufficient_quota":
+                    raise
+                error, reason = e, "rate_limit"
+                delay = retry_after(e.response.headers)
+                delay = backoff(attempt) if delay is None else delay + random.uniform(0, 0.1 * delay + 0.1)
+                self.limiter.throttle(delay)
+            except APIStatusError as e:
+                if e.status_code not in RETRY_STATUSES:
+                    raise
+                error, reason = e, "server_error"
+                delay = retry_after(e.response.headers)
+                delay = backoff(attempt) if delay is None else delay
+            except APIConnectionError as e:
+                error, reason, delay = e, "connection", backoff(attempt)
+            else:
+                self.limiter.update(raw.headers)
+                return raw.parse()
+            finally:
+                self.limiter.release()
+
+            if attempt == self.max_attempts:
+                raise error
+            if not self.limiter.take_retry():
+                print(f"🛑 OpenAI retry budget used up, giving up after {reason.replace('_', ' ')}")
+                raise error
+            AI_RETRIES.labels(reason=reason).inc()
+            print(f"⏳ OpenAI {reason.replace('_', ' ')}, retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+clients = OrderedDict()  # sha256 of the API key -> its client, least recently used first
+clients_lock = threading.Lock()
+
+def get_openai_client(api_key):
+    """
+    The process-wide client of an API key, created on first use
+    """
+    key = hashlib.sha256(api_key.encode()).hexdigest()
+    with clients_lock:
+        shared = clients.get(key)
+        if shared is None:
+            shared = clients[key] = SharedOpenAIClient(api_key)
+        clients.move_to_end(key)
+        # Extractors may still hold an evicted client, its connections close once the last one lets go of it
+        while len(clients) > max(1, OPENAI_MAX_CLIENTS):
+            clients.popitem(last=False)
+        return shared
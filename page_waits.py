@@ -0,0 +1,165 @@
+import os
+import time
+import threading
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from metrics import WAIT_SECONDS
+
+DEFAULT_WAIT_TIMEOUT = float(os.getenv('PAGE_WAIT_TIMEOUT', 15))
+
+# Counts in-flight fetch/XHR requests so the page can be probed for network idleness
+NETWORK_PROBE_JS = """
+if (!window.__snPendingRequests) {
+    window.__snPendingRequests = {count: 0};
+    const pending = window.__snPendingRequests;
+    const origFetch = window.fetch;
+    if (origFetch) {
+        window.fetch = function() {
+            pending.count++;
+            return origFetch.apply(this, arguments).finally(() => { pending.count--; });
+        };
+    }
+    const origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        pending.count++;
+        this.addEventListener('loadend', () => { pending.count--; });
+        return origSend.apply(this, arguments);
+    };
+}
+return [
+    document.readyState,
+    window.__snPendingRequests.count,
+    performance.getEntriesByType('resource').length
+];
+"""
+
+class WaitStats:
+    """
+    Thread-safe record of how long each named readiness wait actually took
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waits = {}
+
+    def record(self, name, elapsed, ok):
+        WAIT_SECONDS.labels(wait=name, outcome="ok" if ok else "timeout").observe(elapsed)
+        with self.lock:
+            entry = self.waits.setdefault(name, {"count": 0, "timeouts": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+            if not ok:
+                entry["timeouts"] += 1
+
+    def summary(self):
+        with self.lock:
+            return {
+                name: {
+                    "count": entry["count"],
+                    "timeouts": entry["timeouts"],
+                    "avg": round(entry["total"] / entry["count"], 3),
+                    "max": round(entry["max"], 3),
+                    "total": round(entry["total"], 3)
+                }
+                for name, entry in self.waits.items()
+            }
+
+    def print_summary(self):
+        for name, entry in self.summary().items():
+            print(f"⏱️ {name}: {entry['count']} waits, avg {entry['avg']}s, max {entry['max']}s, {entry['timeouts']} timeouts")
+
+class PageWaiter:
+    """
+    Condition-based replacements for fixed sleeps. Every wait has a timeout, records
+    its duration in the shared WaitStats and never raises on timeout.
+    """
+    def __init__(self, driver, stats=None, timeout=DEFAULT_WAIT_TIMEOUT, poll_frequency=0.2):
+        self.driver = driver
+        self.stats = stats if stats is not None else WaitStats()
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+
+    def _until(self, name, condition, timeout=None):
+        start = time.time()
+        try:
+            result = WebDriverWait(self.driver, timeout or self.timeout, poll_frequency=self.poll_frequency).until(condition)
+            self.stats.record(name, time.time() - start, True)
+            return result
+        except TimeoutException:
+            elapsed = time.time() - start
+            self.stats.record(name, elapsed, False)
+            print(f"⚠️ Timed out after {elapsed:.1f}s waiting for {name}")
+            return None
+
+    def element_present(self, by, value, timeout=None, name=None):
+        """
+        Wait until an element is in the DOM, returns it or None
+        """
+        return self._until(name or f"presence of {value}", EC.presence_of_element_located((by, value)), timeout)
+
+    def element_clickable(self, by, value, timeout=None, name=None):
+        return self._until(name or f"clickable {value}", EC.element_to_be_clickable((by, value)), timeout)
+
+    def any_element_present(self, locators, timeout=None, name=None):
+        """
+        Wait until any of several (by, value) locators matches, returns the element or None
+        """
+        def condition(driver):
+            for by, value in locators:
+                found = driver.find_elements(by, value)
+                if found:
+                    return found[0]
+            return False
+        return self._until(name or "any of " + ", ".join(v for _, v in locators), condition, timeout)
+
+    def staleness_of(self, element, timeout=None, name="page change"):
+        """
+        Wait until a previously found element is detached, e.g. after clicking Next
+        """
+        if element is None:
+            return False
+        return self._until(name, EC.staleness_of(element), timeout) is not None
+
+    def result_count_stable(self, by, value, container=None, stable_for=1.0, min_count=1, timeout=None, name=None):
+        """
+        Wait until the number of matching elements stops changing for stable_for seconds.
+        Returns the final count (possibly below min_count on timeout).
+        """
+        root = container or self.driver
+        state = {"count": -1, "since": time.time()}
+
+        def condition(driver):
+            try:
+                count = len(root.find_elements(by, value))
+            except Exception:
+                return False
+            now = time.time()
+            if count != state["count"]:
+                state["count"] = count
+                state["since"] = now
+                return False
+            return count >= min_count and now - state["since"] >= stable_for
+
+        self._until(name or f"stable count of {value}", condition, timeout)
+        return max(state["count"], 0)
+
+    def network_idle(self, idle_for=0.5, timeout=None, name="network idle"):
+        """
+        Wait until the document is loaded and no fetch/XHR has been in flight for idle_for seconds
+        """
+        state = {"resources": -1, "since": time.time()}
+
+        def condition(driver):
+            try:
+                ready_state, pending, resources = driver.execute_script(NETWORK_PROBE_JS)
+            except Exception:
+                return False
+            now = time.time()
+            if ready_state != "complete" or pending > 0 or resources != state["resources"]:
+                state["resources"] = resources
+                state["since"] = now
+                return False
+            return now - state["since"] >= idle_for
+
+        return self._until(name, condition, timeout) is not None
@@ -0,0 +1,286 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from lexical_filter import LexicalPrefilter
+from metrics import record_stage
+
+# Items a stage may leave waiting for the next one before it blocks
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 50))
+# A partial AI batch is sent once no new profile arrived for this many seconds
+AI_BATCH_FLUSH_SECONDS = float(os.getenv('AI_BATCH_FLUSH_SECONDS', 5))
+
+# End of stream marker, every stage passes it on exactly once
+DONE = object()
+
+class ExtractionPipeline:
+    """
+    search pages -> hrefs -> profiles -> scores -> sink
+
+    Every stage runs in its own thread and hands items to the next one through a
+    queue, so profiles are visited and scored while the search is still paginating.
+    The profile and lead queues are bounded, a slow scorer or sink holds back the
+    stage feeding it. Stages always
+    consume their input up to DONE, a cancelled or failed pipeline only stops
+    producing new work.
+
+    With only the main browser, the search stage visits the profiles of every
+    results page itself, in a second tab, before it moves on to the next page.
+    The results tab stays loaded, so pagination continues where it left off.
+    """
+    def __init__(self, extractor, checkpoint, use_ai_filtering=False, base_prompt=None, keywords=None, refresh=False, visit_profiles=True, queue_size=PIPELINE_QUEUE_SIZE):
+        self.extractor = extractor
+        self.checkpoint = checkpoint
+        self.use_ai = bool(use_ai_filtering and extractor.client)
+        self.base_prompt = base_prompt
+        self.keywords = keywords
+        self.refresh = refresh
+        self.visit_profiles = visit_profiles
+        # Without pool sessions, profiles are visited on the main browser between two results pages
+        self.shares_browser = visit_profiles and not extractor.driver_pool
+        self.profile_tab = None
+        self.results_tab = None
+        # Never bounded: the profile stage may have to wait for the search to finish, and target_count caps it anyway
+        self.hrefs = queue.Queue()
+        self.profiles = queue.Queue(maxsize=queue_size)
+        self.leads = queue.Queue(maxsize=queue_size)
+        self.browser_free = threading.Event()
+        self.stop_event = threading.Event()
+        self.exhausted = set()  # ids of the queues whose DONE was consumed
+        self.errors = []
+        self.started = None
+        self.stats = {"hrefs_queued": 0, "leads_recorded": 0, "first_lead_seconds": None}
+
+    def stopped(self):
+        return self.stop_event.is_set() or self.extractor.is_cancelled()
+
+    def run(self, pending_hrefs, collect=None):
+        """
+        Feed pending_hrefs, then whatever collect(emit, should_stop) finds on the search pages,
+        through the stages. Returns the pipeline stats once the sink has recorded the last lead.
+        """
+        self.started = time.time()
+        stages = [
+            ("search", lambda: self.search_stage(pending_hrefs, collect), None, self.hrefs),
+            ("profile", self.profile_stage, self.hrefs, self.profiles),
+            ("score", self.score_stage, self.profiles, self.leads),
+            ("sink", self.sink_stage, self.leads, None)
+        ]
+        threads = [
+            threading.Thread(target=self.run_stage, args=stage, name=f"pipeline-{stage[0]}", daemon=True)
+            for stage in stages
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+        return dict(self.stats)
+
+    def run_stage(self, name, body, source, target):
+        try:
+            body()
+        except Exception as e:
+            print(f"❌ Pipeline {name} stage failed: {e}")
+            self.errors.append(e)
+            self.stop_event.set()
+            # Keep upstream stages from blocking on a full queue until they notice the stop
+            if source is not None:
+                while id(source) not in self.exhausted:
+                    self.next(source)
+        finally:
+            if name == "search":
+                self.browser_free.set()
+            if target is not None:
+                target.put(DONE)
+
+    def search_stage(self, pending_hrefs, collect):
+        def emit(hrefs):
+            if self.stopped():
+                return
+            self.stats["hrefs_queued"] += len(hrefs)
+            if self.shares_browser:
+                self.visit_in_profile_tab(hrefs)
+                return
+            for href in hrefs:
+                self.hrefs.put(href)
+
+        try:
+            emit(pending_hrefs)
+            if collect and not self.stopped():
+                collect(emit, self.stopped)
+        finally:
+            self.close_profile_tab()
+
+    def visit_in_profile_tab(self, hrefs):
+        """
+        Visit the profiles of one results page in a tab next to the results, then switch back
+        """
+        if not hrefs:
+            return
+        driver = self.extractor.driver
+        origin = driver.current_window_handle
+        if self.profile_tab is None:
+            self.results_tab = origin
+            driver.switch_to.new_window('tab')
+            self.profile_tab = driver.current_window_handle
+        else:
+            driver.switch_to.window(self.profile_tab)
+        try:
+            self.visit(hrefs)
+        finally:
+            driver.switch_to.window(origin)
+
+    def close_profile_tab(self):
+        if self.profile_tab is None:
+            return
+        driver = self.extractor.driver
+        try:
+            driver.switch_to.window(self.profile_tab)
+            driver.close()
+            driver.switch_to.window(self.results_tab)
+        except Exception as e:
+            print(f"⚠️ Could not close the profile tab: {e}")
+        self.profile_tab = None
+
+    def visit(self, hrefs):
+        """
+        Hand the profiles of hrefs to the score stage: reused from earlier runs, built from the result cards or visited
+        """
+        if not self.refresh:
+            hrefs = self.extractor.reuse_known_profiles(hrefs, self.profiles.put)
+        if not self.visit_profiles:
+            for href in hrefs:
+                self.profiles.put(self.extractor.basic_profile(href))
+        elif hrefs:
+            self.extractor.extract_profiles(hrefs, self.profiles.put, before_fallback=self.wait_for_browser)
+
+    def wait_for_browser(self):
+        """
+        Block until the search stage no longer needs the main browser (a pool falling back to it)
+        """
+        if not self.browser_free.is_set():
+            print("⏳ Profile visits wait for the search to release the browser")
+            self.browser_free.wait()
+
+    def next(self, source, timeout=None):
+        """
+        source.get() that remembers when the end of the stream was reached
+        """
+        item = source.get(timeout=timeout)
+        if item is DONE:
+            self.exhausted.add(id(source))
+        return item
+
+    def take(self, source, limit):
+        """
+        Block for one item, then take whatever else is already queued up to limit.
+        Returns (items, done).
+        """
+        item = self.next(source)
+        if item is DONE:
+            return [], True
+        items = [item]
+        while len(items) < limit:
+            try:
+                item = self.next(source, timeout=0)
+            except queue.Empty:
+                break
+            if item is DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def profile_stage(self):
+        pool = self.extractor.driver_pool
+        # Hand the pool enough URLs to keep every session busy
+        chunk_size = max(1, 2 * pool.size) if pool else PIPELINE_QUEUE_SIZE
+
+        # On a shared browser the search stage visits the profiles itself, only DONE comes through here
+        done = False
+        while not done:
+            hrefs, done = self.take(self.hrefs, chunk_size)
+            if not hrefs or self.stopped():
+                continue
+            self.visit(hrefs)
+
+    def score_stage(self):
+        if not self.use_ai:
+            while True:
+                profile = self.next(self.profiles)
+                if profile is DONE:
+                    return
+                self.leads.put(profile)
+
+        extractor = self.extractor
+        if extractor.prefilter_threshold > 0:
+            extractor.prefilter = LexicalPrefilter(extractor.get_target_description(self.base_prompt), self.keywords, extractor.prefilter_threshold)
+        # At most two batches per worker wait for a GPT slot, further profiles stay queued upstream
+        slots = threading.Semaphore(extractor.ai_workers * 2)
+        batch = []
+
+        def flush():
+            if not batch:
+                return
+            ready = batch[:]
+            batch.clear()
+            if self.stopped():
+                return
+            slots.acquire()
+            scoring_pool.submit(self.score, ready, slots.release)
+
+        with ThreadPoolExecutor(max_workers=extractor.ai_workers, thread_name_prefix="ai-scoring") as scoring_pool:
+            while True:
+                try:
+                    profile = self.next(self.profiles, timeout=AI_BATCH_FLUSH_SECONDS if batch else None)
+                except queue.Empty:
+                    flush()
+                    continue
+                if profile is DONE:
+                    flush()
+                    break
+                batch.append(profile)
+                if len(batch) >= extractor.ai_batch_size:
+                    flush()
+        extractor.print_scoring_summary()
+
+    def score(self, profiles, release):
+        """
+        Score a batch (or a single profile) and pass the leads to the sink
+        """
+        try:
+            if self.stopped():
+                return
+            try:
+                if len(profiles) == 1:
+                    self.extractor.analyze_profile_with_ai(profiles[0], self.base_prompt)
+                else:
+                    self.extractor.analyze_profiles_with_ai(profiles, self.base_prompt)
+            except Exception as e:
+                print(f"❌ AI scoring task failed for {len(profiles)} profiles: {e}")
+                for profile in profiles:
+                    if "score" not in profile:
+                        profile.update({
+                            "match": "NO",
+                            "reason": "AI analysis failed",
+                            "score": 0.0
+                        })
+            for profile in profiles:
+                self.leads.put(profile)
+        finally:
+            release()
+
+    def sink_stage(self):
+        while True:
+            profile = self.next(self.leads)
+            if profile is DONE:
+                return
+            self.extractor.record_lead(profile, self.checkpoint)
+            self.stats["leads_recorded"] += 1
+            if self.stats["first_lead_seconds"] is None:
+                elapsed = time.time() - self.started
+                self.stats["first_lead_seconds"] = round(elapsed, 2)
+                record_stage("first_lead", elapsed)
+                print(f"🚰 First lead recorded {elapsed:.1f}s after the pipeline started")
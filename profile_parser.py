@@ -0,0 +1,63 @@
+from lxml import html as lxml_html
+from metrics import selector_error
+
+# Selectors of the Sales Navigator lead page, shared with the live WebDriver lookups
+NAME_CLASS = "_headingText_e3b563"
+HEADLINE_XPATH = "/html/body/main/div[1]/div[3]/div/div/div/div/div/section[1]/section[1]/div[1]/div[3]/span"
+EXPAND_BUTTON_CLASS = "button-text"
+ABOUT_CLASS = "_content-width_1dtbsb"
+
+# Expand a collapsed About section, in the same round trip that finds the button
+EXPAND_ABOUT_JS = f"""
+const button = document.querySelector('.{EXPAND_BUTTON_CLASS}');
+if (!button) return false;
+button.click();
+return true;
+"""
+
+def class_xpath(class_name):
+    return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+def element_text(element):
+    """
+    Text of an element laid out roughly like WebElement.text: line breaks kept, runs of spaces collapsed
+    """
+    for br in element.iter("br"):
+        br.tail = "\n" + (br.tail or "")
+    lines = (" ".join(line.split()) for line in element.text_content().splitlines())
+    return "\n".join(line for line in lines if line)
+
+def first_text(tree, xpath):
+    found = tree.xpath(xpath)
+    return element_text(found[0]) if found else ""
+
+def parse_profile_html(url, page_html):
+    """
+    Extract name, headline and about from a snapshot of a lead page, without touching the browser
+    """
+    profile = {
+        "url": url,
+        "first_name": "",
+        "last_name": "",
+        "headline": "",
+        "about": ""
+    }
+    if not page_html:
+        return profile
+    try:
+        tree = lxml_html.fromstring(page_html)
+    except Exception as e:
+        print(f"❌ Could not parse profile page of {url}: {e}")
+        return profile
+
+    parts = first_text(tree, class_xpath(NAME_CLASS)).split()
+    profile["first_name"] = parts[0] if parts else ""
+    profile["last_name"] = parts[-1] if len(parts) > 1 else ""
+    profile["headline"] = first_text(tree, HEADLINE_XPATH)
+    # A missing about section is normal, a missing name or headline points to a DOM change
+    if not parts:
+        selector_error("profile name")
+    if not profile["headline"]:
+        selector_error("profile headline")
+    profile["about"] = first_text(tree, class_xpath(ABOUT_CLASS))
+    return profile
@@ -0,0 +1,212 @@
+import os
+import csv
+import json
+import hashlib
+import itertools
+import threading
+from datetime import datetime
+
+EXPORTS_DIR = os.path.join('static', 'exports')
+CHECKPOINT_DIR = os.getenv('RUN_CHECKPOINT_DIR', os.path.join('cache', 'runs'))
+
+AI_FIELDNAMES = ["url", "first_name", "last_name", "headline", "about", "match", "reason", "score"]
+BASIC_FIELDNAMES = ["url", "first_name", "last_name", "headline", "about"]
+
+# Set default values for missing fields
+FIELD_DEFAULTS = {"match": "NO", "reason": "", "score": 0.0}
+
+def build_row(profile, fieldnames):
+    """
+    Ensure a row has every required field
+    """
+    return {field: profile.get(field, FIELD_DEFAULTS.get(field, "")) for field in fieldnames}
+
+class RunCheckpoint:
+    """
+    Streams finished leads to the export CSV and remembers the run state
+    (collected hrefs, processed hrefs) so an interrupted run can resume.
+
+    New hrefs and processed leads are appended to a log next to the checkpoint
+    file; the checkpoint itself is only rewritten (and the log compacted into it)
+    when the run starts, finishes collecting or is finalized.
+    """
+    def __init__(self, run_key, params, fieldnames, filename, hrefs=None, processed=None, collection_done=False, finished=False):
+        self.run_key = run_key
+        self.params = params
+        self.fieldnames = fieldnames
+        self.filename = filename
+        self.hrefs = list(hrefs or [])
+        self.known_hrefs = set(self.hrefs)
+        self.processed = set(processed or [])
+        self.collection_done = collection_done
+        self.finished = finished
+        self.lock = threading.Lock()
+
+    @property
+    def filepath(self):
+        return os.path.join(EXPORTS_DIR, self.filename)
+
+    @property
+    def checkpoint_path(self):
+        return os.path.join(CHECKPOINT_DIR, f"{os.path.splitext(self.filename)[0]}.json")
+
+    @property
+    def log_path(self):
+        return os.path.join(CHECKPOINT_DIR, f"{os.path.splitext(self.filename)[0]}.log")
+
+    @staticmethod
+    def make_run_key(params):
+        payload = json.dumps(params, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def start(cls, params, fieldnames, resume=True):
+        """
+        Resume the latest unfinished run with the same parameters, or start a new one
+        """
+        run_key = cls.make_run_key(params)
+        if resume:
+            checkpoint = cls.find_unfinished(run_key)
+            if checkpoint:
+                print(f"♻️ Resuming run {checkpoint.filename}: {len(checkpoint.hrefs)} leads collected, {len(checkpoint.processed)} already processed")
+                return checkpoint
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(EXPORTS_DIR, exist_ok=True)
+        # Exclusive create, a run started in the same second gets the next free suffix
+        for attempt in itertools.count():
+            suffix = f"_{attempt}" if attempt else ""
+            checkpoint = cls(run_key, params, fieldnames, f"linkedin_leads_{timestamp}{suffix}.csv")
+            try:
+                f = open(checkpoint.filepath, "x", newline="", encoding="utf-8")
+            except FileExistsError:
+                continue
+            with f:
+                csv.DictWriter(f, fieldnames=fieldnames).writeheader()
+            break
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def find_unfinished(cls, run_key):
+        if not os.path.isdir(CHECKPOINT_DIR):
+            return None
+        for name in sorted(os.listdir(CHECKPOINT_DIR), reverse=True):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(CHECKPOINT_DIR, name), encoding="utf-8") as f:
+                    state = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Skipping unreadable checkpoint {name}: {e}")
+                continue
+            if state.get("run_key") != run_key or state.get("finished"):
+                continue
+            checkpoint = cls(**state)
+            if os.path.exists(checkpoint.filepath):
+                checkpoint.replay_log()
+                return checkpoint
+        return None
+
+    def save(self):
+        """
+        Atomically write the checkpoint file and empty the log it now covers
+        (caller holds the lock or is single threaded)
+        """
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        state = {
+            "run_key": self.run_key,
+            "params": self.params,
+            "fieldnames": self.fieldnames,
+            "filename": self.filename,
+            "hrefs": self.hrefs,
+            "processed": sorted(self.processed),
+            "collection_done": self.collection_done,
+            "finished": self.finished
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+    def log(self, entry):
+        """
+        Append one state change to the log (caller holds the lock)
+        """
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def replay_log(self):
+        """
+        Apply the state changes logged since the checkpoint file was last written
+        """
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash, everything before it is intact
+                    break
+                new = [href for href in entry.get("hrefs", []) if href not in self.known_hrefs]
+                self.hrefs.extend(new)
+                self.known_hrefs.update(new)
+                if "processed" in entry:
+                    self.processed.add(entry["processed"])
+
+    def add_hrefs(self, hrefs):
+        with self.lock:
+            new = [href for href in hrefs if href not in self.known_hrefs]
+            if new:
+                self.hrefs.extend(new)
+                self.known_hrefs.update(new)
+                self.log({"hrefs": new})
+
+    def mark_collection_done(self):
+        with self.lock:
+            self.collection_done = True
+            self.save()
+
+    def pending_hrefs(self, limit):
+        return [href for href in self.hrefs[:limit] if href not in self.processed]
+
+    def append(self, profile):
+        """
+        Append one finished lead to the export and mark it processed
+        """
+        with self.lock:
+            if profile["url"] in self.processed:
+                return
+            with open(self.filepath, "a", newline="", encoding="utf-8") as f:
+                csv.DictWriter(f, fieldnames=self.fieldnames).writerow(build_row(profile, self.fieldnames))
+            self.processed.add(profile["url"])
+            self.log({"processed": profile["url"]})
+
+    def finalize(self, only_matches=False):
+        """
+        Mark the run finished. AI filtered runs are rewritten sorted by score with only matches kept.
+        Returns the number of leads in the export.
+        """
+        with self.lock:
+            with open(self.filepath, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f)) if only_matches else None
+                count = len(rows) if rows is not None else sum(1 for _ in csv.DictReader(f))
+
+            if only_matches:
+                # Sort by relevance score and filter to only include matches
+                rows = [row for row in rows if row.get("match", "").upper() == "YES"]
+                rows.sort(key=lambda row: float(row.get("score") or 0.0), reverse=True)
+                tmp_path = self.filepath + ".tmp"
+                with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+                    writer.writeheader()
+                    writer.writerows(rows)
+                os.replace(tmp_path, self.filepath)
+                count = len(rows)
+
+            self.finished = True
+            self.save()
+            return count
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Where cached GPT verdicts live between runs
+SCORE_CACHE_PATH = os.getenv('AI_CACHE_PATH', os.path.join('cache', 'ai_scores.db'))
+SCORE_CACHE_MAX_AGE_DAYS = float(os.getenv('AI_CACHE_MAX_AGE_DAYS', 30))
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', 50000))
+
+class ScoreCache:
+    """
+    On-disk cache of AI verdicts keyed by profile content, target description and model
+    """
+    def __init__(self, path=SCORE_CACHE_PATH, max_age_days=SCORE_CACHE_MAX_AGE_DAYS, max_entries=SCORE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shared by the scoring threads, access is serialized through self.lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ai_scores (
+                cache_key TEXT PRIMARY KEY,
+                match TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                score REAL NOT NULL,
+                model TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_scores_last_used ON ai_scores (last_used_at)")
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(headline, about, target_description, model):
+        """
+        Hash everything that influences the verdict into a stable cache key
+        """
+        payload = json.dumps([
+            (headline or "").strip(),
+            (about or "").strip(),
+            (target_description or "").strip(),
+            model
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key):
+        """
+        Return the cached verdict dict or None
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT match, reason, score, created_at FROM ai_scores WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+            if not row:
+                return None
+            if self.max_age_days and row[3] < time.time() - self.max_age_days * 86400:
+                self.conn.execute("DELETE FROM ai_scores WHERE cache_key = ?", (cache_key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE ai_scores SET last_used_at = ? WHERE cache_key = ?", (time.time(), cache_key))
+            self.conn.commit()
+        return {"match": row[0], "reason": row[1], "score": row[2]}
+
+    def set(self, cache_key, verdict, model):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ai_scores (cache_key, match, reason, score, model, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, verdict["match"], verdict["reason"], float(verdict["score"]), model, now, now)
+            )
+            self.conn.commit()
+
+    def evict(self):
+        """
+        Drop entries older than max_age_days, then the least recently used beyond max_entries
+        """
+        removed = 0
+        with self.lock:
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self.conn.execute("DELETE FROM ai_scores WHERE created_at < ?", (cutoff,)).rowcount
+            if self.max_entries:
+                removed += self.conn.execute("""
+                    DELETE FROM ai_scores WHERE cache_key IN (
+                        SELECT cache_key FROM ai_scores ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,)).rowcount
+            self.conn.commit()
+        if removed:
+            print(f"🧹 Evicted {removed} cached AI scores")
+        return removed
+
+    def size(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM ai_scores").fetchone()[0]
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from urllib.parse import quote
+from metrics import CACHE_LOOKUPS
+
+# Build the Sales Navigator search URL from the search term and filters instead of filling in the search page
+SEARCH_WITH_URL = os.getenv('SEARCH_WITH_URL', 'true').lower() == 'true'
+# Where resolved filter IDs (geography, job title) live between runs
+FILTER_CACHE_PATH = os.getenv('FILTER_CACHE_PATH', os.path.join('cache', 'filter_ids.db'))
+FILTER_CACHE_MAX_AGE_DAYS = float(os.getenv('FILTER_CACHE_MAX_AGE_DAYS', 90))
+
+# Filter kind -> (filter type in the search query, typeahead type resolving its IDs)
+FILTER_TYPES = {
+    "geography": ("REGION", "BING_GEO"),
+    "title": ("CURRENT_TITLE", "TITLE")
+}
+
+# Same typeahead the filter panels use, answered from the logged in session of the page
+TYPEAHEAD_JS = """
+const done = arguments[arguments.length - 1];
+const csrf = document.cookie.match(/JSESSIONID="?([^";]+)"?/);
+const url = '/sales-api/salesApiFacetTypeahead?q=query&type=' + encodeURIComponent(arguments[0])
+    + '&query=' + encodeURIComponent(arguments[1]) + '&start=0&count=10';
+fetch(url, {credentials: 'include', headers: {'csrf-token': csrf ? csrf[1] : '', 'x-restli-protocol-version': '2.0.0'}})
+    .then(response => response.ok ? response.text() : null)
+    .then(done)
+    .catch(() => done(null));
+"""
+
+class FilterIdCache:
+    """
+    On-disk cache of Sales Navigator filter IDs keyed by filter kind and the text typed by the user
+    """
+    def __init__(self, path=FILTER_CACHE_PATH, max_age_days=FILTER_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS filter_ids (
+                kind TEXT NOT NULL,
+                text TEXT NOT NULL,
+                filter_id TEXT NOT NULL,
+                display TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (kind, text)
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def normalize(text):
+        return " ".join((text or "").lower().split())
+
+    def get(self, kind, text):
+        """
+        Return (filter_id, display text) or None
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT filter_id, display, created_at FROM filter_ids WHERE kind = ? AND text = ?",
+                (kind, self.normalize(text))
+            ).fetchone()
+        if not row or (self.max_age_days and row[2] < time.time() - self.max_age_days * 86400):
+            return None
+        return row[0], row[1]
+
+    def set(self, kind, text, filter_id, display):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO filter_ids (kind, text, filter_id, display, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, self.normalize(text), str(filter_id), display, time.time())
+            )
+            self.conn.commit()
+
+def encode(value):
+    """
+    Percent-encode a value so its commas, colons and parentheses do not break the query structure
+    """
+    return quote(str(value), safe="")
+
+def search_query(keywords, filters):
+    """
+    The query parameter of a people search: keywords plus a list of (filter type, [(id, text, include)])
+    """
+    parts = ["spellCorrectionEnabled:true"]
+    if keywords:
+        parts.append(f"keywords:{encode(keywords)}")
+    filter_parts = []
+    for filter_type, values in filters:
+        items = []
+        for filter_id, text, include in values:
+            id_part = f"id:{encode(filter_id)}," if filter_id else ""
+            items.append(f"({id_part}text:{encode(text)},selectionType:{'INCLUDED' if include else 'EXCLUDED'})")
+        if items:
+            filter_parts.append(f"(type:{filter_type},values:List({','.join(items)}))")
+    if filter_parts:
+        parts.append(f"filters:List({','.join(filter_parts)})")
+    return f"({','.join(parts)})"
+
+class SearchUrlBuilder:
+    """
+    Turns a search term and include/exclude filters into a Sales Navigator search URL.
+    Filter IDs are resolved once through the typeahead of the logged in browser and
+    cached, repeated filters are built without any request.
+    """
+    def __init__(self, driver, base_url, cache=None):
+        self.driver = driver
+        self.base_url = base_url
+        self.cache = cache
+
+    def lookup(self, kind, text):
+        """
+        Return (filter_id, display text) from the typeahead, None if nothing matched
+        """
+        try:
+            self.driver.set_script_timeout(10)
+            raw = self.driver.execute_async_script(TYPEAHEAD_JS, FILTER_TYPES[kind][1], text)
+            elements = json.loads(raw or "{}").get("elements") or []
+        except Exception as e:
+            print(f"⚠️ Filter lookup failed for {text}: {e}")
+            return None
+        if not elements:
+            return None
+        wanted = FilterIdCache.normalize(text)
+        best = next((e for e in elements if FilterIdCache.normalize(e.get("displayValue")) == wanted), elements[0])
+        if best.get("id") is None:
+            return None
+        return str(best["id"]), best.get("displayValue") or text
+
+    def resolve(self, kind, text):
+        cached = self.cache.get(kind, text) if self.cache else None
+        CACHE_LOOKUPS.labels(cache="filter_ids", result="hit" if cached else "miss").inc()
+        if cached:
+            return cached
+        if not self.driver.current_url.startswith(self.base_url):
+            # The typeahead is only answered from a page of the Sales Navigator origin
+            self.driver.get(f"{self.base_url}/sales/search/people")
+        resolved = self.lookup(kind, text)
+        if resolved:
+            print(f"🆔 Resolved {kind} filter {text} -> {resolved[0]}")
+            if self.cache:
+                self.cache.set(kind, text, *resolved)
+        return resolved
+
+    def build(self, search_term='', country_filter=None, include_country=True, position_filter=None, include_position=True):
+        """
+        Search URL for the term and filters, None if a geography could not be resolved
+        """
+        filters = []
+        regions = []
+        for country in country_filter or []:
+            resolved = self.resolve("geography", country)
+            if not resolved:
+                print(f"⚠️ No geography ID found for {country}")
+                return None
+            regions.append((resolved[0], resolved[1], include_country))
+        filters.append((FILTER_TYPES["geography"][0], regions))
+
+        titles = []
+        for position in position_filter or []:
+            # Titles without an ID still work as free text
+            resolved = self.resolve("title", position)
+            filter_id, text = resolved if resolved else (None, position)
+            titles.append((filter_id, text, include_position))
+        filters.append((FILTER_TYPES["title"][0], titles))
+
+        return f"{self.base_url}/sales/search/people?query={search_query(search_term, filters)}"
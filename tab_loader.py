@@ -0,0 +1,150 @@
+import os
+import time
+from collections import deque
+from profile_parser import EXPAND_ABOUT_JS, NAME_CLASS, ABOUT_CLASS
+from launch_profiles import browser_stats
+from metrics import record_stage, selector_error
+
+# Profile pages loaded at once in tabs of the main browser, 1 keeps visiting them one by one
+PROFILE_TABS = int(os.getenv('PROFILE_TABS', 1))
+# Minimum seconds between two tab navigations, so K tabs do not mean K times the request rate
+PROFILE_TAB_INTERVAL = float(os.getenv('PROFILE_TAB_INTERVAL', 0.5))
+# A tab still loading after this long is captured as it is
+PROFILE_TAB_TIMEOUT = float(os.getenv('PROFILE_TAB_TIMEOUT', 20))
+# Seconds to wait for the About section after clicking "Show more"
+ABOUT_EXPAND_TIMEOUT = 3
+TAB_POLL_SECONDS = 0.2
+
+# Start a navigation without waiting for it; the marker tells the old document from the new one
+NAVIGATE_JS = """
+window.__snStaleTab = true;
+window.location.href = arguments[0];
+"""
+
+PROBE_JS = f"""
+return [
+    !window.__snStaleTab,
+    document.readyState,
+    !!document.querySelector('.{NAME_CLASS}'),
+    !!document.querySelector('.{ABOUT_CLASS}')
+];
+"""
+
+class TabLoader:
+    """
+    Loads a window of profile pages in parallel tabs of one browser. The tabs are
+    polled in turn, whichever page finished first is captured and its tab is
+    reused for the next URL. The window the driver was on is restored afterwards.
+    """
+    def __init__(self, driver, tabs=PROFILE_TABS, interval=PROFILE_TAB_INTERVAL, timeout=PROFILE_TAB_TIMEOUT):
+        self.driver = driver
+        self.tabs = max(1, tabs)
+        self.interval = interval
+        self.timeout = timeout
+
+    def open_tabs(self, origin):
+        handles = [origin]
+        for _ in range(self.tabs - 1):
+            try:
+                self.driver.switch_to.new_window('tab')
+                handles.append(self.driver.current_window_handle)
+            except Exception as e:
+                print(f"⚠️ Could not open another profile tab: {e}")
+                break
+        return handles
+
+    def close_tabs(self, origin, handles):
+        for handle in handles:
+            if handle == origin:
+                continue
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                pass
+        self.driver.switch_to.window(origin)
+
+    def load(self, urls, on_snapshot, should_stop=None):
+        """
+        Call on_snapshot(url, page_html) for every URL as its page becomes ready
+        (page_html is None when the tab failed). Returns the number of pages handled.
+        """
+        origin = self.driver.current_window_handle
+        handles = self.open_tabs(origin)
+        print(f"🗂️ Loading {len(urls)} profiles in {len(handles)} tabs")
+        todo = deque(urls)
+        states = {handle: None for handle in handles}
+        last_navigation = 0.0
+        done = 0
+        try:
+            while todo or any(states.values()):
+                if should_stop and should_stop():
+                    print("🛑 Extraction cancelled, skipping remaining profiles")
+                    break
+                for handle in handles:
+                    state = states[handle]
+                    if state is None:
+                        if todo and time.time() - last_navigation >= self.interval:
+                            states[handle] = self.navigate(handle, todo.popleft())
+                            last_navigation = time.time()
+                        continue
+                    page_html = self.poll(handle, state)
+                    if page_html is not False:
+                        elapsed = time.time() - state["started"]
+                        record_stage("profile_load", elapsed)
+                        browser_stats.record_page_load(self.driver, elapsed)
+                        on_snapshot(state["url"], page_html)
+                        states[handle] = None
+                        done += 1
+                time.sleep(TAB_POLL_SECONDS)
+        finally:
+            self.close_tabs(origin, handles)
+        return done
+
+    def navigate(self, handle, url):
+        print(f"🔍 Opening profile in a tab: {url}")
+        state = {"url": url, "started": time.time(), "expanding_since": None}
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.execute_script(NAVIGATE_JS, url)
+        except Exception as e:
+            print(f"❌ Error opening profile page {url}: {e}")
+            state["failed"] = True
+        return state
+
+    def poll(self, handle, state):
+        """
+        Returns the page HTML once the tab is ready, None if it failed, False while it is still loading
+        """
+        if state.get("failed"):
+            return None
+        now = time.time()
+        try:
+            self.driver.switch_to.window(handle)
+            fresh, ready_state, has_name, has_about = self.driver.execute_script(PROBE_JS)
+        except Exception:
+            # Scripts fail while the tab is between documents
+            fresh, ready_state, has_name, has_about = False, "loading", False, False
+
+        if now - state["started"] > self.timeout:
+            print(f"⚠️ Profile tab timed out after {self.timeout:.0f}s: {state['url']}")
+            selector_error("profile header")
+            return self.capture(state) if fresh else None
+        if not fresh or ready_state == "loading" or not has_name:
+            return False
+
+        if state["expanding_since"] is None:
+            if self.driver.execute_script(EXPAND_ABOUT_JS):
+                state["expanding_since"] = now
+                return False
+            return self.capture(state)
+        if has_about or now - state["expanding_since"] > ABOUT_EXPAND_TIMEOUT:
+            return self.capture(state)
+        return False
+
+    def capture(self, state):
+        try:
+            return self.driver.page_source
+        except Exception as e:
+            print(f"❌ Error capturing profile page {state['url']}: {e}")
+            return None